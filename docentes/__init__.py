@@ -0,0 +1,4 @@
+"""
+Pacote com a lógica de dados da DocentES, separada da interface em
+Streamlit para que possa ser importada por scripts e ferramentas.
+"""
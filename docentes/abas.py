@@ -0,0 +1,439 @@
+"""
+Funções de renderização das cinco abas temáticas.
+
+Cada função recebe o cubo do seu tema, os filtros da barra lateral e os
+caches de figuras e de resultados, e só é chamada para a aba que está aberta: as demais não
+calculam nada nem montam figuras até serem selecionadas. No modo de
+comparação, a aba aberta é renderizada por `aba_comparacao`, comum a todos
+os temas. As figuras são construídas em docentes.graficos. Fora do modo de
+comparação, cada aba recebe o cubo do modo de exibição escolhido em
+`seletor_modo` (valores absolutos, percentuais ou variação anual).
+
+As tabelas de dados e os mapas ficam em expanders que só são calculados
+quando abertos; o detalhamento por UF ou município é paginado no
+servidor, e só a página atual é enviada ao navegador.
+"""
+from functools import partial
+
+import streamlit as st
+
+from docentes.cubos import consultar_cubo, consultar_subdivisoes
+from docentes.dados import PASTA_ESTATICA, url_estatica
+from docentes.exportacao import FORMATOS, arquivo_exportacao, nome_exportacao
+from docentes.graficos import opcoes_seletor, tabela_comparacao
+from docentes.indicadores import MODOS
+from docentes.mapas import url_malha
+from docentes.metricas import MEDIR_TAMANHOS, medir, observar_tamanho
+from docentes.paginacao import contar_paginas, fatiar_pagina, filtrar_e_ordenar
+from docentes.temas import TEMAS
+from docentes.territorio import CODIGO_BRASIL, chave_de_busca, nivel_do_local, uf_do_municipio
+
+
+# --- GRÁFICOS ---
+def exibir_grafico(container, figura, tema, bloco, aviso):
+    """
+    Exibe a figura no container, medindo o st.plotly_chart (que serializa
+    a figura), ou o aviso quando não há dados para a seleção.
+    """
+    if figura is None:
+        container.warning(aviso)
+        return
+    with medir("plotly_chart", tema=tema, bloco=bloco):
+        container.plotly_chart(figura, width="stretch")
+
+
+def expander_sob_demanda(container, chave, rotulo="Ver tabela de dados"):
+    """
+    Cria o expander e retorna-o se estiver aberto, ou None se estiver
+    fechado. O rerun ao abrir permite que o conteúdo só seja calculado (e
+    enviado) quando for exibido.
+    """
+    expander = container.expander(rotulo, key=chave, on_change="rerun")
+    return expander if expander.open else None
+
+
+# --- TABELAS DE DADOS ---
+
+
+def tabela_paginada(consultar, tema, chave, resultados, chave_resultado):
+    """
+    Exibe uma tabela com filtro por nome, ordenação e paginação feitos no
+    servidor: só as linhas da página atual vão para o navegador. As linhas
+    vêm de `consultar()`, e a tabela filtrada e ordenada fica no cache de
+    resultados, compartilhada pelas sessões com os mesmos filtros.
+    """
+    col_filtro, col_ordem, col_sentido = st.columns([3, 2, 1])
+    filtro = col_filtro.text_input("Filtrar por nome", key=f"{chave}_filtro")
+    dimensao = TEMAS[tema]["dimensao"]
+    colunas = ["Local"] + ([dimensao] if dimensao else []) + TEMAS[tema]["colunas"]
+    ordenar_por = col_ordem.selectbox("Ordenar por", options=colunas, key=f"{chave}_ordem")
+    sentido = col_sentido.selectbox("Sentido", options=["Crescente", "Decrescente"], key=f"{chave}_sentido")
+
+    df = resultados.obter(
+        chave_resultado + (chave_de_busca(filtro), ordenar_por, sentido),
+        lambda: filtrar_e_ordenar(consultar(), filtro, ordenar_por, sentido == "Crescente"),
+    )
+    paginas = contar_paginas(df)
+    # Um filtro novo pode reduzir o número de páginas abaixo da página atual
+    chave_pagina = f"{chave}_pagina"
+    if st.session_state.get(chave_pagina, 1) > paginas:
+        st.session_state[chave_pagina] = paginas
+
+    pagina = fatiar_pagina(df, st.session_state.get(chave_pagina, 1))
+    if MEDIR_TAMANHOS:
+        observar_tamanho("tabela", int(pagina.memory_usage(deep=True).sum()), tabela=chave)
+    st.dataframe(pagina)
+    col_pagina, col_total = st.columns([1, 3])
+    col_pagina.number_input("Página", min_value=1, max_value=paginas, step=1, key=chave_pagina)
+    col_total.caption(f"{len(df)} linhas em {paginas} página(s)")
+
+
+def tabela_de_dados(container, cubo, tema, ano_selecionado, local_selecionado, resultados):
+    """
+    Tabela de dados de uma aba: as linhas do local selecionado e, para o
+    Brasil ou uma UF, o detalhamento paginado por UF ou por município.
+    """
+    expander = expander_sob_demanda(container, f"tabela_{tema}")
+    if expander is None:
+        return
+    with expander, medir("tabela", tema=tema):
+        # Buscando no cubo as linhas já agregadas do local (município, UF ou Brasil) no ano
+        st.dataframe(consultar_cubo(cubo, local_selecionado, ano_selecionado))
+        if nivel_do_local(local_selecionado) == "Município":
+            return
+        nivel = "UF" if local_selecionado == CODIGO_BRASIL else "Município"
+        st.markdown(f"###### Detalhamento por {nivel}")
+        tabela_paginada(
+            partial(consultar_subdivisoes, cubo, local_selecionado, ano_selecionado), tema, f"tabela_{tema}",
+            resultados, ("subdivisoes", tema, cubo.get("modo", "absoluto"), local_selecionado, ano_selecionado)
+        )
+
+
+# --- ABA 1: ETAPAS DE ENSINO ---
+def aba_etapas(cubo_etapas, ano_selecionado, local_selecionado, figuras, resultados):
+    """
+    Renderiza a aba de docentes por etapa de ensino.
+    """
+    st.markdown("#### Docentes por Etapa de Ensino")
+
+    # --- Definindo containers dentro da aba ---
+    # Container para o gráfico de barras
+    c1 = st.container(border=True)
+
+    # Selecionando as colunas para o gráfico
+    colunas_etapas = TEMAS["etapas"]["colunas"]
+
+    # Gerando o gráfico (ou reaproveitando-o do cache de figuras)
+    fig = figuras.obter(cubo_etapas, "etapas", "barras", ano_selecionado, local_selecionado)
+    exibir_grafico(c1, fig, "etapas", "barras", "Nenhum dado encontrado para a seleção atual.")
+        
+    # Exibindo a tabela de dados correspondente (só quando o expander está aberto)
+    tabela_de_dados(c1, cubo_etapas, "etapas", ano_selecionado, local_selecionado, resultados)
+
+    # --- Container 2: Gráfico de Linhas (a evolução temporal) ---
+    st.markdown("---") # Linha divisória
+    c1t = st.container(border=True)
+    c1t.markdown("##### Análise da Evolução Temporal (2022-2024)")
+
+    # 1. Criamos o FILTRO para a etapa de ensino que você sugeriu
+    col_filtro, col_vazia = c1t.columns([2, 3])
+    with col_filtro:
+        etapa_selecionada = st.selectbox(
+            "Selecione a Etapa para ver a tendência:",
+            options=colunas_etapas,
+            key="filtro_etapa_linha"
+        )
+
+    # 2. Obtemos o gráfico de linhas da etapa escolhida
+    fig_linha = figuras.obter(cubo_etapas, "etapas", "linha", ano_selecionado, local_selecionado, etapa_selecionada)
+    exibir_grafico(c1t, fig_linha, "etapas", "linha", "Nenhum dado encontrado para a seleção.")
+
+    # Mensagem explicativa sobre os dados
+    st.info("O mesmo docente pode ser contabilizado mais de uma vez, por atuar em diferentes etapas de ensino.")
+
+
+# --- ABA 2: FAIXA ETÁRIA E SEXO ---
+def aba_idade(cubo_idade, ano_selecionado, local_selecionado, figuras, resultados):
+    """
+    Renderiza a aba de docentes por faixa etária e sexo.
+    """
+    st.markdown("#### Docentes por Faixa Etária e Sexo")
+
+    c2 = st.container(border=True)
+
+    colunas_idade = TEMAS["idade"]["colunas"]
+
+    # Gerando o gráfico
+    fig = figuras.obter(cubo_idade, "idade", "barras", ano_selecionado, local_selecionado)
+    exibir_grafico(c2, fig, "idade", "barras", "Nenhum dado encontrado para a seleção atual.")
+
+    tabela_de_dados(c2, cubo_idade, "idade", ano_selecionado, local_selecionado, resultados)
+
+    # --- Container 2: Gráfico de Linhas (Evolução Temporal) ---
+    st.markdown("---")
+    c2t = st.container(border=True)
+    c2t.markdown("##### Análise Comparativa da Evolução Temporal (Feminino vs. Masculino), por Faixa Etária")
+
+    # Adicionamos o filtro para a Faixa Etária
+    col_filtro, col_vazia = c2t.columns([2, 3])
+    with col_filtro:
+        idade_selecionada = st.selectbox(
+            "Selecione a Faixa Etária para Análise:",
+            options=colunas_idade,
+            key="filtro_idade_linha_final"
+        )
+
+    # Gerando o Gráfico
+    fig_linha = figuras.obter(cubo_idade, "idade", "linha", ano_selecionado, local_selecionado, idade_selecionada)
+    exibir_grafico(c2t, fig_linha, "idade", "linha", "Nenhum dado encontrado para a seleção.")
+
+
+# --- ABA 3: NÍVEL DE FORMAÇÃO ---
+def aba_formacao(cubo_formacao, ano_selecionado, local_selecionado, figuras, resultados):
+    """
+    Renderiza a aba de docentes por nível de formação acadêmica.
+    """
+    st.markdown("#### Docentes por Escolaridade ou Nível de Formação Acadêmica")
+
+    c3 = st.container(border=True)
+
+    colunas_formacao = TEMAS["formacao"]["colunas"]
+
+    fig = figuras.obter(cubo_formacao, "formacao", "barras", ano_selecionado, local_selecionado)
+    exibir_grafico(c3, fig, "formacao", "barras", "Nenhum dado encontrado para a seleção atual.")
+    
+    tabela_de_dados(c3, cubo_formacao, "formacao", ano_selecionado, local_selecionado, resultados)
+
+    # --- Container 2: Gráfico de Linhas (Evolução Temporal) ---
+    st.markdown("---")
+    c3t = st.container(border=True)
+    c3t.markdown("##### Análise da Evolução Temporal por Nível de Formação")
+
+    col_filtro, col_vazia = c3t.columns([1, 1])
+    with col_filtro:
+        formacao_selecionada = st.selectbox(
+            "Selecione o Nível de Formação para ver a tendência:",
+            options=colunas_formacao,
+            key="filtro_formacao_linha"
+        )
+        
+    fig_linha = figuras.obter(cubo_formacao, "formacao", "linha", ano_selecionado, local_selecionado, formacao_selecionada)
+    exibir_grafico(c3t, fig_linha, "formacao", "linha", "Nenhum dado encontrado para a seleção.")
+
+
+# --- ABA 4: VÍNCULO FUNCIONAL ---
+def aba_vinculo(cubo_vinculo, ano_selecionado, local_selecionado, figuras, resultados):
+    """
+    Renderiza a aba de docentes por vínculo funcional.
+    """
+    st.markdown("#### Docentes por Vínculo Funcional e Dependência Administrativa")
+
+    c4 = st.container(border=True)
+
+    fig = figuras.obter(cubo_vinculo, "vinculo", "barras", ano_selecionado, local_selecionado)
+    exibir_grafico(c4, fig, "vinculo", "barras", "Nenhum dado encontrado para a seleção atual.")
+    
+    tabela_de_dados(c4, cubo_vinculo, "vinculo", ano_selecionado, local_selecionado, resultados)
+
+    # --- Container 2: Gráfico de Linhas (Evolução Temporal) ---
+    st.markdown("---")
+    c4t = st.container(border=True)
+    c4t.markdown("##### Análise Comparativa da Evolução Temporal (Dependências Administrativas), por Vínculo Funcional")
+
+    # Adicionamos o filtro para o Vínculo Funcional
+    lista_vinculos = opcoes_seletor(cubo_vinculo, "vinculo", local_selecionado)
+    col_filtro, col_vazia = c4t.columns([2, 3])
+    with col_filtro:
+        vinculo_selecionado = st.selectbox(
+            "Selecione o Vínculo para Análise:",
+            options=lista_vinculos,
+            key="filtro_vinculo_linha_final"
+        )
+
+    # Gerando o Gráfico (uma linha para cada dependência administrativa)
+    fig_linha = figuras.obter(cubo_vinculo, "vinculo", "linha", ano_selecionado, local_selecionado, vinculo_selecionado)
+    exibir_grafico(c4t, fig_linha, "vinculo", "linha", "Nenhum dado encontrado para a seleção.")
+
+    # Mensagem explicativa sobre os dados
+    st.info("O mesmo docente pode ser contabilizado mais de uma vez, por atuar com mais de um vínculo.")
+
+
+# --- ABA 5: DEPENDÊNCIA E LOCALIZAÇÃO ---
+def aba_dependencia(cubo_dependencia, ano_selecionado, local_selecionado, figuras, resultados):
+    """
+    Renderiza a aba de docentes por dependência administrativa e localização.
+    """
+    st.markdown("#### Docentes por Dependência Administrativa e Localização")
+
+    c5 = st.container(border=True)
+    colunas_dependencia = TEMAS["dependencia"]["colunas"]
+
+    fig = figuras.obter(cubo_dependencia, "dependencia", "barras", ano_selecionado, local_selecionado)
+    exibir_grafico(c5, fig, "dependencia", "barras", "Nenhum dado encontrado para a seleção atual.")
+
+    tabela_de_dados(c5, cubo_dependencia, "dependencia", ano_selecionado, local_selecionado, resultados)
+    
+    # --- Container 2: Gráfico de Linhas (Evolução Temporal) ---
+    st.markdown("---")
+    c5t = st.container(border=True)
+    c5t.markdown("##### Análise Comparativa da Evolução Temporal (Urbana vs. Rural), por Dependência Administrativa")
+
+    # Filtro de dependência administrativa
+    col_filtro, col_vazia = c5t.columns([2, 3])
+    with col_filtro:
+        dependencia_selecionada = st.selectbox(
+            "Selecione a Dependência para Análise:",
+            options=colunas_dependencia,
+            key="filtro_dependencia_linha"
+        )
+
+    # --- Gerando o Gráfico (uma linha para 'Urbana' e outra para 'Rural') ---
+    fig_linha = figuras.obter(cubo_dependencia, "dependencia", "linha", ano_selecionado, local_selecionado, dependencia_selecionada)
+    exibir_grafico(c5t, fig_linha, "dependencia", "linha", "Nenhum dado encontrado para a seleção atual.")
+
+    # Mensagem explicativa sobre os dados
+    st.info("O mesmo docente pode ser contabilizado mais de uma vez, por atuar em mais de uma localização e/ou dependência administrativa.")
+
+
+# --- MODO DE COMPARAÇÃO (todas as abas) ---
+def aba_comparacao(tema, cubo, ano_selecionado, locais_selecionados, figuras, resultados):
+    """
+    Renderiza a aba de um tema comparando vários locais: barras agrupadas
+    por local no ano selecionado e uma linha por local na evolução temporal.
+    Os dados de todos os locais saem de uma única consulta ao cubo.
+    """
+    titulo = TEMAS[tema]["titulo"].split(" ", 1)[1]
+    st.markdown(f"#### {titulo}: Comparação entre Locais")
+
+    cc = st.container(border=True)
+    locais = tuple(locais_selecionados)
+
+    fig = figuras.obter(cubo, tema, "barras_comparacao", ano_selecionado, locais)
+    exibir_grafico(cc, fig, tema, "barras", "Nenhum dado encontrado para a seleção atual.")
+
+    expander = expander_sob_demanda(cc, f"tabela_comparacao_{tema}")
+    if expander is not None:
+        expander.dataframe(resultados.obter(
+            ("comparacao", tema, locais, ano_selecionado),
+            partial(tabela_comparacao, cubo, tema, locais, ano_selecionado)
+        ))
+
+    # --- Container 2: Gráfico de Linhas (uma linha por local) ---
+    st.markdown("---")
+    cct = st.container(border=True)
+    cct.markdown("##### Análise Comparativa da Evolução Temporal, por Local")
+
+    col_filtro, col_vazia = cct.columns([2, 3])
+    with col_filtro:
+        item_selecionado = st.selectbox(
+            "Selecione o item para comparar a tendência:",
+            options=opcoes_seletor(cubo, tema),
+            key=f"comparacao_{tema}"
+        )
+
+    fig_linha = figuras.obter(cubo, tema, "linha_comparacao", ano_selecionado, locais, item_selecionado)
+    exibir_grafico(cct, fig_linha, tema, "linha", "Nenhum dado encontrado para a seleção.")
+
+
+# --- MAPA (todas as abas) ---
+def mapa_do_tema(tema, cubo, ano_selecionado, local_selecionado, figuras):
+    """
+    Mapa da aba, num expander calculado só quando aberto: as UFs (com o
+    Brasil selecionado) ou os municípios da UF do local, coloridos pelo
+    item escolhido no ano e no modo de exibição da aba.
+    """
+    expander = expander_sob_demanda(st, f"mapa_{tema}", "Ver mapa")
+    if expander is None:
+        return
+    if nivel_do_local(local_selecionado) == "Município":
+        area = int(uf_do_municipio(local_selecionado))
+    else:
+        area = local_selecionado
+    if url_malha(area) is None:
+        expander.info("A malha deste mapa ainda não foi gerada. Execute `python -m docentes.mapas`.")
+        return
+
+    modo = cubo.get("modo", "absoluto")
+    col_item, col_dimensao = expander.columns(2)
+    coluna = col_item.selectbox("Item", options=TEMAS[tema]["colunas"], key=f"mapa_{tema}_item")
+    valor_dimensao = None
+    dimensao = TEMAS[tema]["dimensao"]
+    if dimensao is not None:
+        # A soma de todos os valores da dimensão só faz sentido em valores absolutos
+        opcoes = ([None] if modo == "absoluto" else []) + list(cubo["valores_dimensao"].get(area, []))
+        valor_dimensao = col_dimensao.selectbox(
+            dimensao, options=opcoes, format_func=lambda valor: "Todos" if valor is None else valor,
+            key=f"mapa_{tema}_dimensao_{modo}"
+        )
+
+    with medir("mapa", tema=tema):
+        fig = figuras.obter(cubo, tema, "mapa", ano_selecionado, area, (coluna, valor_dimensao))
+        exibir_grafico(expander, fig, tema, "mapa", "Nenhum dado encontrado para a seleção atual.")
+
+
+# --- MODO DE EXIBIÇÃO (todas as abas) ---
+def seletor_modo(tema):
+    """
+    Seletor do modo de exibição dos valores da aba (absoluto, percentual
+    ou variação anual). Os indicadores já vêm calculados nos cubos
+    derivados (docentes.indicadores), então trocar o modo não recalcula
+    nada.
+    """
+    return st.radio(
+        "Exibir valores:",
+        options=list(MODOS),
+        format_func=lambda modo: MODOS[modo],
+        horizontal=True,
+        key=f"modo_{tema}"
+    )
+
+
+# --- EXPORTAÇÃO (todas as abas) ---
+def link_exportacao(container, caminho, rotulo, gerar, chave):
+    """
+    Link para um arquivo exportado, que o navegador baixa direto do
+    servidor de arquivos estáticos do Streamlit. Se o arquivo ainda não
+    existir, exibe no lugar um botão que o gera (`gerar()`) e então exibe o
+    link.
+    """
+    if not caminho.exists():
+        if not container.button(f"Gerar arquivo: {rotulo}", key=chave):
+            return
+        with container.spinner("Gerando o arquivo..."):
+            gerar()
+    container.link_button(rotulo, url_estatica(caminho.relative_to(PASTA_ESTATICA)))
+
+
+def botao_exportacao(tema, cubo, ano_selecionado, local, formato, pasta):
+    """
+    Exportação dos dados da aba com os filtros atuais (um local ou, no
+    modo de comparação, uma tupla de locais). O arquivo só é gerado quando
+    pedido, e depois fica no disco para todas as sessões.
+    """
+    link_exportacao(
+        st,
+        pasta / nome_exportacao(tema, local, ano_selecionado, formato),
+        f"Exportar dados ({FORMATOS[formato]['rotulo']})",
+        partial(arquivo_exportacao, pasta, cubo, tema, local, ano_selecionado, formato),
+        f"exportar_{tema}"
+    )
+
+
+# Função de renderização de cada tema, na mesma ordem de TEMAS
+ABAS = {
+    "etapas": aba_etapas,
+    "idade": aba_idade,
+    "formacao": aba_formacao,
+    "vinculo": aba_vinculo,
+    "dependencia": aba_dependencia,
+}
+
+# Chaves dos filtros internos das abas, cuja seleção deve ser mantida
+# enquanto a aba está fechada (e seus widgets não são renderizados)
+CHAVES_FILTROS = [
+    "filtro_etapa_linha",
+    "filtro_idade_linha_final",
+    "filtro_formacao_linha",
+    "filtro_vinculo_linha_final",
+    "filtro_dependencia_linha",
+] + [f"comparacao_{tema}" for tema in TEMAS] + [f"modo_{tema}" for tema in TEMAS]
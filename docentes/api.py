@@ -0,0 +1,339 @@
+"""
+API HTTP assíncrona, somente leitura, dos agregados de cada tema, em JSON
+ou Arrow.
+
+Uso:
+    python -m docentes.api [--porta 8600] [--endereco 127.0.0.1]
+
+Rotas (todas GET):
+    /api/versao     versão dos dados, anos, modos e temas (com as colunas
+                    e os valores da dimensão)
+    /api/locais     Brasil, UFs e municípios, com código, nome, nível e UF
+                    (?uf=32 restringe aos municípios da UF)
+    /api/<tema>     linhas agregadas do tema, com os parâmetros:
+                    local (código IBGE; padrão: o Brasil, ou a UF única),
+                    ano (padrão: todos), modo (absoluto, percentual ou
+                    variacao), dimensao (um valor da dimensão do tema),
+                    subdivisoes=1 (as UFs ou os municípios abaixo do local)
+                    e formato (json ou arrow)
+    /api/metricas   métricas do processo no formato do Prometheus
+
+As respostas saem dos mesmos cubos usados pelo app (docentes.cubos): com
+DOCENTES_MEMORIA_COMPARTILHADA=1, o processo mapeia os mesmos arquivos da
+base colunar; com DOCENTES_BACKEND, consulta o mesmo banco. Sem o
+parâmetro formato, o Arrow (IPC stream) é escolhido pelo cabeçalho
+Accept. Cada resposta pronta fica no cache de resultados do processo
+(docentes.cache_resultados), e a consulta e a serialização rodam numa
+thread, sem bloquear o laço de eventos.
+
+O ETag de toda resposta combina a versão dos dados com a consulta já
+validada e normalizada (rota, parâmetros e formato): um cliente que
+repete a pergunta com If-None-Match recebe 304, sem corpo, enquanto os
+dados não mudarem. Uma consulta inválida recebe o seu erro (400 ou 404)
+mesmo com um If-None-Match. A versão é verificada a cada INTERVALO_VERSAO
+segundos; quando muda, os cubos são recarregados numa thread e o cache de
+respostas é descartado.
+
+O servidor usa o Starlette e o uvicorn, que já são dependências do
+Streamlit.
+"""
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import os
+import time
+from functools import partial
+
+import pandas as pd
+import pyarrow as pa
+import uvicorn
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+from docentes.cache_resultados import CacheResultados, pasta_resultados
+from docentes.cubos import consultar_cubo, consultar_municipios, consultar_subdivisoes
+from docentes.dados import nome_da_versao, versao_dos_dados
+from docentes.indicadores import MODOS, visao
+from docentes.metricas import contar, medir, texto_prometheus
+from docentes.precalculo import carregar_cubos_do_processo
+from docentes.temas import TEMAS
+from docentes.territorio import CODIGO_BRASIL, montar_hierarquia, nivel_do_local, uf_do_municipio
+
+# Quantidade máxima de respostas mantidas no cache
+CAPACIDADE_RESPOSTAS = int(os.environ.get("DOCENTES_CACHE_API", "1024"))
+# Intervalo mínimo, em segundos, entre verificações da versão dos dados
+INTERVALO_VERSAO = 5
+
+FORMATOS_API = {
+    "json": "application/json",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+class ErroConsulta(ValueError):
+    """
+    Parâmetro inválido numa consulta, com o status HTTP da resposta.
+    """
+
+    def __init__(self, mensagem, status=400):
+        super().__init__(mensagem)
+        self.status = status
+
+
+# --- DADOS ---
+class Servico:
+    """
+    Cubos, hierarquia de locais e cache de respostas da versão atual dos
+    dados, compartilhados por todas as requisições do processo.
+    """
+
+    def __init__(self):
+        self.versao = versao_dos_dados()
+        self.carregar(self.versao)
+        self.verificada_em = time.monotonic()
+        self._trava = asyncio.Lock()
+
+    def carregar(self, versao):
+        cubos = carregar_cubos_do_processo()
+        self.hierarquia = montar_hierarquia(consultar_municipios(cubos["etapas"]))
+        self.cubos = cubos
+        self.nome_versao = nome_da_versao(versao)
+        self.respostas = CacheResultados("api", capacidade=CAPACIDADE_RESPOSTAS, pasta=pasta_resultados(versao))
+
+    async def atualizar(self):
+        """
+        Verifica a versão dos dados, no máximo a cada INTERVALO_VERSAO
+        segundos, e recarrega os cubos se ela mudou. As requisições que
+        chegam durante a recarga são respondidas com a versão anterior.
+        """
+        if time.monotonic() - self.verificada_em < INTERVALO_VERSAO or self._trava.locked():
+            return
+        async with self._trava:
+            self.verificada_em = time.monotonic()
+            versao = await run_in_threadpool(versao_dos_dados)
+            if versao != self.versao:
+                with medir("api_recarregar"):
+                    await run_in_threadpool(self.carregar, versao)
+                self.versao = versao
+
+    def etag(self, consulta):
+        """
+        ETag da resposta de uma consulta já normalizada, na versão atual
+        dos dados.
+        """
+        resumo = hashlib.sha256(repr(consulta).encode()).hexdigest()[:16]
+        return f'"{self.nome_versao}-{resumo}"'
+
+    async def resposta(self, chave):
+        """
+        Retorna o corpo da resposta da consulta (ver `chave_consulta`),
+        do cache ou calculado, numa thread.
+        """
+        return await run_in_threadpool(self.respostas.obter, chave, partial(self.calcular, chave))
+
+    def calcular(self, chave):
+        tema, local, ano, modo, dimensao, subdivisoes, formato = chave
+        with medir("api_consulta", tema=tema, formato=formato):
+            cubo = visao(self.cubos[tema], modo)
+            linhas = consultar_subdivisoes(cubo, local, ano) if subdivisoes else consultar_cubo(cubo, local, ano)
+            if dimensao is not None:
+                linhas = linhas[linhas[TEMAS[tema]["dimensao"]].astype(str).to_numpy() == dimensao]
+            # As categorias viram texto: o dicionário de cada coluna
+            # traria os nomes de todos os locais
+            linhas = linhas.astype({
+                coluna: str for coluna, tipo in linhas.dtypes.items() if isinstance(tipo, pd.CategoricalDtype)
+            }).reset_index(drop=True)
+            metadados = {"versao": self.nome_versao, "tema": tema, "modo": modo}
+            if formato == "arrow":
+                tabela = pa.Table.from_pandas(linhas, preserve_index=False)
+                tabela = tabela.replace_schema_metadata({**tabela.schema.metadata, **metadados})
+                saida = io.BytesIO()
+                with pa.ipc.new_stream(saida, tabela.schema) as escritor:
+                    escritor.write_table(tabela)
+                return saida.getvalue()
+            cabecalho = json.dumps(metadados, ensure_ascii=False)[:-1]
+            return f'{cabecalho}, "linhas": {linhas.to_json(orient="records", force_ascii=False)}}}'.encode()
+
+
+# --- PARÂMETROS ---
+def inteiro(parametros, nome):
+    valor = parametros.get(nome)
+    if valor in (None, ""):
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        raise ErroConsulta(f"Parâmetro {nome} deve ser um número inteiro: {valor}")
+
+
+def escolher_formato(requisicao):
+    formato = requisicao.query_params.get("formato")
+    if formato is None:
+        formato = "arrow" if FORMATOS_API["arrow"] in requisicao.headers.get("accept", "") else "json"
+    if formato not in FORMATOS_API:
+        raise ErroConsulta(f"Formato desconhecido: {formato} (use {' ou '.join(FORMATOS_API)})")
+    return formato
+
+
+def chave_consulta(servico, tema, parametros, formato):
+    """
+    Valida os parâmetros da consulta de um tema e os normaliza numa chave
+    do cache de respostas.
+    """
+    if tema not in TEMAS:
+        raise ErroConsulta(f"Tema desconhecido: {tema}", 404)
+    hierarquia = servico.hierarquia
+    local = inteiro(parametros, "local")
+    if local is None:
+        local = hierarquia["raiz"]
+    if local not in hierarquia["nomes"]:
+        raise ErroConsulta(f"Local desconhecido: {local}", 404)
+    ano = inteiro(parametros, "ano")
+    if ano is not None and ano not in hierarquia["anos"]:
+        raise ErroConsulta(f"Ano sem dados: {ano}", 404)
+    modo = parametros.get("modo", "absoluto")
+    if modo not in MODOS:
+        raise ErroConsulta(f"Modo desconhecido: {modo} (use {', '.join(MODOS)})")
+    dimensao = parametros.get("dimensao") or None
+    if dimensao is not None and TEMAS[tema]["dimensao"] is None:
+        raise ErroConsulta(f"O tema {tema} não tem dimensão")
+    subdivisoes = parametros.get("subdivisoes", "0") in ("1", "true", "sim")
+    return tema, local, ano, modo, dimensao, subdivisoes, formato
+
+
+# --- ROTAS ---
+async def responder(requisicao, rota, validar, gerar):
+    """
+    Envolve uma rota: atualiza a versão dos dados, valida e normaliza a
+    consulta (`validar(servico, formato)`, que levanta ErroConsulta), e só
+    então responde 304 quando o cliente já tem a resposta dessa consulta na
+    versão atual, ou a gera com `gerar(servico, consulta)`. Transforma
+    ErroConsulta em uma resposta JSON de erro e conta as requisições.
+    """
+    servico = requisicao.app.state.servico
+    await servico.atualizar()
+    try:
+        formato = escolher_formato(requisicao)
+        consulta = validar(servico, formato)
+        etag = servico.etag(consulta)
+        cabecalhos = {"ETag": etag, "Vary": "Accept", "Cache-Control": "no-cache"}
+        if requisicao.headers.get("if-none-match") == etag:
+            resposta = Response(status_code=304, headers=cabecalhos)
+        else:
+            resposta = Response(await gerar(servico, consulta), media_type=FORMATOS_API[formato], headers=cabecalhos)
+    except ErroConsulta as erro:
+        resposta = JSONResponse({"erro": str(erro)}, status_code=erro.status)
+    contar("api_requisicoes_total", rota=rota, status=resposta.status_code)
+    return resposta
+
+
+def json_ou_arrow(registros, formato):
+    if formato == "arrow":
+        tabela = pa.Table.from_pylist(registros)
+        saida = io.BytesIO()
+        with pa.ipc.new_stream(saida, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+        return saida.getvalue()
+    return json.dumps(registros, ensure_ascii=False).encode()
+
+
+async def rota_versao(requisicao):
+    def validar(servico, formato):
+        if formato == "arrow":
+            raise ErroConsulta("A versão só está disponível em JSON")
+        return "versao", formato
+
+    async def gerar(servico, consulta):
+        temas = {
+            tema: {
+                "titulo": dados["titulo"],
+                "dimensao": dados["dimensao"],
+                "colunas": dados["colunas"],
+                "valores_dimensao": sorted({
+                    valor for valores in servico.cubos[tema].get("valores_dimensao", {}).values() for valor in valores
+                }) if dados["dimensao"] else [],
+            }
+            for tema, dados in TEMAS.items()
+        }
+        return json.dumps({
+            "versao": servico.nome_versao,
+            "anos": servico.hierarquia["anos"],
+            "modos": list(MODOS),
+            "temas": temas,
+        }, ensure_ascii=False).encode()
+
+    return await responder(requisicao, "versao", validar, gerar)
+
+
+async def rota_locais(requisicao):
+    def validar(servico, formato):
+        uf = inteiro(requisicao.query_params, "uf")
+        if uf is not None and uf not in servico.hierarquia["municipios"]:
+            raise ErroConsulta(f"UF sem dados: {uf}", 404)
+        return "locais", uf, formato
+
+    async def gerar(servico, consulta):
+        _, uf, formato = consulta
+        hierarquia = servico.hierarquia
+        if uf is not None:
+            codigos = hierarquia["municipios"][uf]
+        else:
+            codigos = ([CODIGO_BRASIL] if hierarquia["raiz"] == CODIGO_BRASIL else []) + hierarquia["ufs"] + hierarquia["todos"]
+        registros = [
+            {
+                "codigo": codigo,
+                "nome": hierarquia["nomes"][codigo],
+                "nivel": nivel_do_local(codigo),
+                "uf": int(uf_do_municipio(codigo)) if nivel_do_local(codigo) == "Município" else None,
+            }
+            for codigo in codigos
+        ]
+        return json_ou_arrow(registros, formato)
+
+    return await responder(requisicao, "locais", validar, gerar)
+
+
+async def rota_tema(requisicao):
+    def validar(servico, formato):
+        return chave_consulta(servico, requisicao.path_params["tema"], requisicao.query_params, formato)
+
+    async def gerar(servico, chave):
+        return await servico.resposta(chave)
+
+    return await responder(requisicao, "tema", validar, gerar)
+
+
+async def rota_metricas(requisicao):
+    return PlainTextResponse(texto_prometheus())
+
+
+def criar_aplicacao(servico=None):
+    """
+    Cria a aplicação ASGI da API; os cubos são carregados aqui, antes da
+    primeira requisição.
+    """
+    aplicacao = Starlette(routes=[
+        Route("/api/versao", rota_versao),
+        Route("/api/locais", rota_locais),
+        Route("/api/metricas", rota_metricas),
+        Route("/api/{tema}", rota_tema),
+    ])
+    aplicacao.state.servico = servico or Servico()
+    return aplicacao
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Serve os agregados de cada tema numa API HTTP somente leitura.")
+    parser.add_argument("--endereco", default="127.0.0.1", help="Endereço de escuta")
+    parser.add_argument("--porta", type=int, default=8600, help="Porta de escuta")
+    args = parser.parse_args(argumentos)
+
+    uvicorn.run(criar_aplicacao(), host=args.endereco, port=args.porta, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Cubos consultados num banco embutido (SQLite), em vez de mantidos em
+DataFrames na memória de cada processo.
+
+Uso:
+    python -m docentes.banco [--destino PASTA]
+
+Com DOCENTES_BACKEND=sqlite, as tabelas dos cubos e as dos modos derivados (ver docentes.indicadores)
+são gravadas uma vez por versão dos dados num arquivo do banco, em
+DOCENTES_PASTA_BANCO, ordenadas como no cubo e indexadas por código e
+ano. As consultas das abas (consultar_cubo, consultar_subdivisoes e
+consultar_locais, em docentes.cubos) viram SELECTs que trazem só as
+linhas pedidas, e o processo guarda apenas os metadados de cada cubo (os
+valores da dimensão e os tipos das colunas). Assim, a memória não cresce
+com o número de anos ou de municípios.
+
+O arquivo é gerado pelo comando acima, que monta os cubos em memória uma
+única vez e os grava. Se o primeiro processo do app a abrir a versão não
+encontrar o arquivo, executa o comando num processo à parte e só lê o
+resultado: a memória da montagem é devolvida ao sistema quando o comando
+termina, e o processo do app nunca guarda os cubos. O arquivo é então
+compartilhado por todos, só para leitura. Sem a variável (ou com
+"memoria"), os cubos ficam em DataFrames, como antes.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from docentes.cubos import montar_cubos
+from docentes.dados import PASTA_DADOS, PASTA_PROJETO, carregar_tabelas, nome_da_versao, versao_dos_dados
+
+# Onde os cubos são consultados: "memoria" ou "sqlite"
+BACKENDS = ("memoria", "sqlite")
+BACKEND = os.environ.get("DOCENTES_BACKEND", "memoria")
+# Pasta dos arquivos do banco, um por versão dos dados
+PASTA_BANCO = Path(os.environ.get("DOCENTES_PASTA_BANCO", PASTA_DADOS / "banco"))
+
+# Linhas por bloco lidas por `percorrer`
+TAMANHO_BLOCO = 50000
+
+
+def caminho_banco(versao, pasta=PASTA_BANCO):
+    return Path(pasta) / f"cubos_{nome_da_versao(versao)}.sqlite"
+
+
+def nome_tabela(tema, modo):
+    return f"{tema}_{modo}"
+
+
+def citar(coluna):
+    """
+    Identificador SQL entre aspas (as colunas têm espaços e acentos).
+    """
+    return '"' + coluna.replace('"', '""') + '"'
+
+
+def conectar(caminho, somente_leitura=True):
+    if somente_leitura:
+        # A URI escapa os caracteres do caminho que ela reservaria (?, # e %)
+        uri = Path(caminho).resolve().as_uri() + "?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+    return sqlite3.connect(caminho)
+
+
+# --- GERAÇÃO ---
+def tipo_sql(tipo):
+    if pd.api.types.is_integer_dtype(tipo):
+        return "BIGINT"
+    if pd.api.types.is_float_dtype(tipo):
+        return "DOUBLE"
+    return "VARCHAR"
+
+
+def descrever_tipos(tabela):
+    """
+    Registra o tipo pandas de cada coluna, para que as consultas devolvam
+    DataFrames iguais aos do cubo em memória (as categorias, na ordem
+    original).
+    """
+    return {
+        coluna: {"categorias": tipo.categories.astype(str).tolist()} if isinstance(tipo, pd.CategoricalDtype) else str(tipo)
+        for coluna, tipo in tabela.dtypes.items()
+    }
+
+
+def gravar_tabela(conexao, nome, tabela):
+    """
+    Grava a tabela com a coluna "ordem" (a posição da linha no cubo), já
+    na ordem do cubo, por código e ano.
+    """
+    tabela = tabela.reset_index(drop=True)
+    colunas = ", ".join([f"{citar('ordem')} INTEGER PRIMARY KEY"] + [
+        f"{citar(coluna)} {tipo_sql(tipo)}" for coluna, tipo in tabela.dtypes.items()
+    ])
+    conexao.execute(f"CREATE TABLE {citar(nome)} ({colunas})")
+    marcadores = ", ".join("?" * (len(tabela.columns) + 1))
+    linhas = tabela.astype(object).where(tabela.notna(), None).itertuples(index=True, name=None)
+    conexao.executemany(f"INSERT INTO {citar(nome)} VALUES ({marcadores})", linhas)
+    conexao.execute(f"CREATE INDEX {citar(nome + '_local')} ON {citar(nome)} ({citar('Código')}, {citar('Ano')})")
+
+
+def gravar_banco(cubos, caminho):
+    """
+    Grava as tabelas de todos os cubos, e dos seus modos derivados, num
+    arquivo temporário que é renomeado ao final: processos que já abriram
+    a versão anterior não são afetados.
+    """
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_name(f"{caminho.name}.{os.getpid()}.tmp")
+    temporario.unlink(missing_ok=True)
+
+    conexao = conectar(temporario, somente_leitura=False)
+    try:
+        metadados = {}
+        for tema, cubo in cubos.items():
+            visoes = {"absoluto": cubo, **cubo.get("modos", {})}
+            for modo, visao in visoes.items():
+                gravar_tabela(conexao, nome_tabela(tema, modo), visao["tabela"])
+            metadados[tema] = {
+                "tipos": {modo: descrever_tipos(visao["tabela"]) for modo, visao in visoes.items()},
+                "valores_dimensao": {str(codigo): valores for codigo, valores in cubo.get("valores_dimensao", {}).items()},
+            }
+        conexao.execute("CREATE TABLE metadados (chave VARCHAR, valor VARCHAR)")
+        conexao.execute("INSERT INTO metadados VALUES (?, ?)", ("cubos", json.dumps(metadados, ensure_ascii=False)))
+        conexao.commit()
+    finally:
+        conexao.close()
+    temporario.replace(caminho)
+    return caminho
+
+
+# --- CONSULTAS ---
+class Banco:
+    """
+    Arquivo do banco de uma versão dos dados, com uma conexão somente
+    leitura por thread (cada sessão do Streamlit roda na sua thread).
+    """
+
+    def __init__(self, caminho):
+        self.caminho = Path(caminho)
+        self._local = threading.local()
+        (valor,), = self.executar("SELECT valor FROM metadados WHERE chave = 'cubos'").fetchall()
+        self.metadados = json.loads(valor)
+
+    def executar(self, sql, parametros=()):
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = self._local.conexao = conectar(self.caminho)
+        return conexao.execute(sql, parametros)
+
+    def cubos(self):
+        """
+        Retorna o cubo de cada tema: um dicionário com o banco, a tabela e
+        os metadados, com os modos derivados em "modos", como os cubos em
+        memória.
+        """
+        cubos = {}
+        for tema, metadados in self.metadados.items():
+            cubo = {
+                "banco": self,
+                "sql": nome_tabela(tema, "absoluto"),
+                **self.tipos(metadados["tipos"]["absoluto"]),
+                "valores_dimensao": {int(codigo): valores for codigo, valores in metadados["valores_dimensao"].items()},
+            }
+            cubo["modos"] = {
+                modo: {**cubo, "sql": nome_tabela(tema, modo), **self.tipos(tipos), "modo": modo}
+                for modo, tipos in metadados["tipos"].items() if modo != "absoluto"
+            }
+            cubos[tema] = cubo
+        return cubos
+
+    @staticmethod
+    def tipos(tipos):
+        """
+        Prepara, uma vez por cubo, os tipos pandas das colunas e o código de
+        cada categoria, usados para montar os resultados das consultas.
+        """
+        dtypes = {
+            coluna: pd.CategoricalDtype(tipo["categorias"]) if isinstance(tipo, dict) else pd.api.types.pandas_dtype(tipo)
+            for coluna, tipo in tipos.items()
+        }
+        codigos_categorias = {
+            coluna: {categoria: codigo for codigo, categoria in enumerate(tipo["categorias"])}
+            for coluna, tipo in tipos.items() if isinstance(tipo, dict)
+        }
+        return {"tipos": tipos, "dtypes": dtypes, "codigos_categorias": codigos_categorias}
+
+    def selecionar(self, cubo, condicoes="", parametros=()):
+        """
+        Retorna as linhas da tabela do cubo que atendem às condições, na
+        ordem do cubo, com o índice e os tipos do cubo em memória.
+        """
+        colunas = ", ".join(citar(coluna) for coluna in ["ordem"] + list(cubo["tipos"]))
+        onde = f" WHERE {condicoes}" if condicoes else ""
+        linhas = self.executar(
+            f"SELECT {colunas} FROM {citar(cubo['sql'])}{onde} ORDER BY {citar('ordem')}", parametros
+        ).fetchall()
+        # Monta cada coluna de uma vez, já no tipo do cubo em memória (as
+        # conversões coluna a coluna custariam mais que a própria consulta)
+        valores = list(zip(*linhas)) if linhas else [()] * (len(cubo["tipos"]) + 1)
+        dados = {}
+        for (coluna, tipo), coluna_valores in zip(cubo["dtypes"].items(), valores[1:]):
+            if isinstance(tipo, pd.CategoricalDtype):
+                codigos = cubo["codigos_categorias"][coluna]
+                dados[coluna] = pd.Categorical.from_codes([codigos[valor] for valor in coluna_valores], dtype=tipo)
+            elif isinstance(tipo, np.dtype):
+                dados[coluna] = np.array(coluna_valores, dtype=tipo)
+            else:
+                dados[coluna] = pd.array(coluna_valores, dtype=tipo)
+        return pd.DataFrame(dados, index=pd.Index(np.array(valores[0], dtype="int64")), copy=False)
+
+    def consultar(self, cubo, local, ano=None):
+        if ano is None:
+            return self.selecionar(cubo, f"{citar('Código')} = ?", (local,))
+        return self.selecionar(cubo, f"{citar('Código')} = ? AND {citar('Ano')} = ?", (local, ano))
+
+    def consultar_faixa(self, cubo, inicio, fim, ano=None):
+        condicoes = f"{citar('Código')} >= ? AND {citar('Código')} < ?"
+        if ano is None:
+            return self.selecionar(cubo, condicoes, (inicio, fim))
+        return self.selecionar(cubo, condicoes + f" AND {citar('Ano')} = ?", (inicio, fim, ano))
+
+    def consultar_locais(self, cubo, locais, ano=None):
+        locais = list(locais)
+        if not locais:
+            return self.selecionar(cubo, "1 = 0")
+        condicoes = f"{citar('Código')} IN ({', '.join('?' * len(locais))})"
+        parametros = tuple(locais)
+        if ano is not None:
+            condicoes += f" AND {citar('Ano')} = ?"
+            parametros += (ano,)
+        df = self.selecionar(cubo, condicoes, parametros)
+        # Na ordem dos locais pedidos, mantendo a ordem do cubo em cada um
+        posicao = df["Código"].map({local: posicao for posicao, local in enumerate(locais)})
+        return df.iloc[posicao.to_numpy().argsort(kind="stable")]
+
+    def consultar_tudo(self, cubo, ano=None):
+        if ano is None:
+            return self.selecionar(cubo)
+        return self.selecionar(cubo, f"{citar('Ano')} = ?", (ano,))
+
+    def consultar_municipios(self, cubo):
+        cursor = self.executar(
+            f"SELECT DISTINCT {citar('Código')}, {citar('Local')}, {citar('Ano')} FROM {citar(cubo['sql'])} "
+            f"WHERE {citar('Código')} >= 100"
+        )
+        return pd.DataFrame.from_records(cursor.fetchall(), columns=["Código do Município", "Município", "Ano"])
+
+    def percorrer(self, cubo, tamanho=TAMANHO_BLOCO):
+        """
+        Percorre a tabela do cubo em blocos de até `tamanho` linhas, sem
+        trazê-la inteira para a memória.
+        """
+        inicio = 0
+        while True:
+            bloco = self.selecionar(
+                cubo, f"{citar('ordem')} >= ? AND {citar('ordem')} < ?", (inicio, inicio + tamanho)
+            )
+            if inicio > 0 and bloco.empty:
+                return
+            yield bloco
+            if len(bloco) < tamanho:
+                return
+            inicio += tamanho
+
+
+def gerar_banco(versao, pasta=PASTA_BANCO):
+    """
+    Monta os cubos em memória e grava o banco da versão dos dados,
+    removendo os arquivos das outras versões. Retorna o caminho.
+    """
+    caminho = caminho_banco(versao, pasta)
+    gravar_banco(montar_cubos(carregar_tabelas()), caminho)
+    for antigo in Path(pasta).glob("cubos_*.sqlite"):
+        if antigo != caminho:
+            antigo.unlink(missing_ok=True)
+    return caminho
+
+
+def abrir_cubos(versao, pasta=PASTA_BANCO):
+    """
+    Retorna os cubos de cada tema consultados no banco da versão dos dados.
+    Se o arquivo ainda não existir, ele é gerado por `python -m
+    docentes.banco` num processo à parte (com o mesmo ambiente), e este
+    processo só o lê.
+    """
+    if BACKEND not in BACKENDS:
+        raise ValueError(f"DOCENTES_BACKEND desconhecido: {BACKEND} (use um de {', '.join(BACKENDS)})")
+    caminho = caminho_banco(versao, pasta)
+    if not caminho.exists():
+        subprocess.run(
+            [sys.executable, "-m", "docentes.banco", "--destino", str(pasta)],
+            cwd=PASTA_PROJETO,
+            check=True
+        )
+        if not caminho.exists():
+            # Os dados mudaram enquanto o banco era gerado; o próximo rerun abre a nova versão
+            raise FileNotFoundError(f"Banco da versão {nome_da_versao(versao)} não gerado em {pasta}")
+    return Banco(caminho).cubos()
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Gera o banco dos cubos da versão atual dos dados.")
+    parser.add_argument("--destino", default=PASTA_BANCO, help="Pasta dos arquivos do banco")
+    args = parser.parse_args(argumentos)
+
+    caminho = gerar_banco(versao_dos_dados(), args.destino)
+    print(f"Banco gravado em {caminho} ({caminho.stat().st_size / 1024:.1f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
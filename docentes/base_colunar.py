@@ -0,0 +1,314 @@
+"""
+Geração da base colunar a partir dos CSVs das Sinopses do INEP.
+
+Uso:
+    python -m docentes.base_colunar [--origem PASTA_CSV] [--destino PASTA] [--completa] [--ignorar-validacao]
+
+Cada tema vira um arquivo Arrow IPC (Feather v2) sem compressão, com as
+colunas já tipadas por `preparar_tabela`, acompanhado da tabela agregada
+do seu cubo (`cubo_<tema>.arrow`, com os totais das UFs e do Brasil), e um `manifesto.json` registra
+os arquivos, tipos, anos e o hash dos CSVs de origem. A versão da base é
+derivada desses hashes, então regerar a base com os mesmos CSVs mantém a
+versão (e os caches da aplicação) inalterada.
+
+A geração é incremental: cada CSV de origem (partição, ver
+docentes.dados.arquivos_do_tema) é convertido e agregado em
+`particoes/`, e uma partição cujo CSV tem o mesmo hash da geração
+anterior é reaproveitada sem reler o CSV. As partições novas ficam em
+`particoes_novas/` até a validação aprovar a versão, então uma versão
+rejeitada nunca deixa partições que uma geração seguinte reaproveitaria. Acrescentar o arquivo de um ano
+novo só processa esse ano; os arquivos de cada tema são então remontados
+juntando as partições. A aplicação em execução percebe a nova versão no
+rerun seguinte, sem reiniciar o servidor.
+
+Antes de publicar uma versão, as tabelas de todos os temas passam pela
+validação de docentes.validacao, e o relatório é gravado em
+`validacao.csv` na base. Com erros, nem os arquivos dos temas nem o
+manifesto são gravados, e a aplicação continua com a versão anterior (a
+não ser com `--ignorar-validacao`).
+"""
+import argparse
+import hashlib
+import json
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.feather as feather
+
+from docentes.cubos import FORMATO_CUBOS, agregar_tema, juntar_tabelas_agregadas
+from docentes.dados import (
+    ARQUIVO_MANIFESTO, PASTA_BASE, PASTA_DADOS, arquivos_do_tema, hash_arquivo, ler_arrow,
+    ler_csv, ler_manifesto, preparar_tabela, verificar_anos
+)
+from docentes.temas import TEMAS
+from docentes.validacao import ErroValidacao, ler_excecoes, tem_erros, validar
+
+# Subpasta da base com os arquivos de cada partição
+PASTA_PARTICOES = "particoes"
+# Subpasta onde as partições geradas esperam a validação
+PASTA_PARTICOES_NOVAS = "particoes_novas"
+# Relatório da última validação, na pasta da base
+ARQUIVO_VALIDACAO = "validacao.csv"
+
+
+def gravar_arrow(df, caminho):
+    """
+    Grava um DataFrame como Arrow IPC sem compressão, para que o arquivo
+    possa ser mapeado em memória. Grava num arquivo temporário e o
+    renomeia: processos que já mapearam a versão anterior continuam lendo
+    o arquivo antigo sem corrompê-lo.
+    """
+    caminho_temporario = caminho.with_name(caminho.name + ".tmp")
+    feather.write_feather(df, caminho_temporario, compression="uncompressed")
+    caminho_temporario.replace(caminho)
+
+
+def reduzir_cubo(cubo, nome):
+    """
+    Prepara a tabela agregada de um cubo para a base: colunas de texto
+    categóricas e inteiros reduzidos, como nas tabelas dos temas.
+    """
+    dimensao = TEMAS[nome]["dimensao"]
+    cubo = cubo.astype({coluna: "category" for coluna in ["Local"] + ([dimensao] if dimensao else [])})
+    for coluna in TEMAS[nome]["colunas"]:
+        cubo[coluna] = pd.to_numeric(cubo[coluna], downcast="integer")
+    return cubo
+
+
+def gerar_particao(caminho_csv, nome, pasta, hash_origem):
+    """
+    Converte um CSV de origem nos arquivos da sua partição (tabela e
+    tabela agregada), gravados em `pasta`, e retorna a entrada da partição
+    no manifesto, com os caminhos que os arquivos terão em `particoes/`.
+    """
+    df = preparar_tabela(ler_csv(caminho_csv), nome)
+    arquivo = f"{PASTA_PARTICOES}/{caminho_csv.stem}.arrow"
+    cubo = f"{PASTA_PARTICOES}/cubo_{caminho_csv.stem}.arrow"
+    gravar_arrow(df, pasta / Path(arquivo).name)
+    gravar_arrow(reduzir_cubo(agregar_tema(df, nome), nome), pasta / Path(cubo).name)
+    return {
+        "origem": caminho_csv.name,
+        "hash_origem": hash_origem,
+        "arquivo": arquivo,
+        "cubo": cubo,
+        "linhas": len(df),
+        "anos": sorted(int(ano) for ano in df["Ano"].unique()),
+    }
+
+
+def particoes_anteriores(manifesto, destino):
+    """
+    Retorna as partições da geração anterior que ainda podem ser
+    reaproveitadas, indexadas pelo nome do CSV de origem.
+    """
+    if manifesto is None or manifesto.get("formato_cubos") != FORMATO_CUBOS:
+        return {}
+    return {
+        particao["origem"]: particao
+        for tema in manifesto["temas"].values()
+        for particao in tema.get("particoes", [])
+        if (destino / particao["arquivo"]).exists() and (destino / particao["cubo"]).exists()
+    }
+
+
+def impressao(hashes):
+    """
+    Resume uma sequência de hashes numa impressão digital curta.
+    """
+    return hashlib.sha256("".join(hashes).encode()).hexdigest()[:16]
+
+
+def construir_base(origem=PASTA_DADOS, destino=PASTA_BASE, completa=False, validacao="bloquear"):
+    """
+    Converte os CSVs de `origem` em arquivos Arrow na pasta `destino` e
+    grava o manifesto. Só as partições novas ou alteradas são processadas,
+    a não ser que `completa` seja verdadeiro. Retorna o manifesto gerado.
+
+    `validacao` define o que fazer com os erros de validação dos dados:
+    "bloquear" levanta ErroValidacao antes de publicar a versão,
+    "ignorar" publica mesmo assim e "desligar" nem valida.
+    """
+    origem, destino = Path(origem), Path(destino)
+    (destino / PASTA_PARTICOES).mkdir(parents=True, exist_ok=True)
+    novas = destino / PASTA_PARTICOES_NOVAS
+    shutil.rmtree(novas, ignore_errors=True)
+    novas.mkdir()
+    try:
+        return publicar_base(origem, destino, novas, completa, validacao)
+    finally:
+        shutil.rmtree(novas, ignore_errors=True)
+
+
+def publicar_base(origem, destino, novas, completa, validacao):
+    """
+    Gera as partições novas em `novas`, valida as tabelas e, se a versão
+    for aprovada, move as partições para `particoes/` e grava os arquivos
+    dos temas e o manifesto (ver `construir_base`).
+    """
+
+    anterior = None if completa else ler_manifesto(destino)
+    reaproveitaveis = particoes_anteriores(anterior, destino)
+
+    # Partições de cada tema (só as novas ou alteradas são geradas)
+    particoes_por_tema = {}
+    geradas = set()
+
+    def localizar(arquivo):
+        return novas / Path(arquivo).name if arquivo in geradas else destino / arquivo
+
+    for nome in TEMAS:
+        particoes = []
+        for caminho_csv in arquivos_do_tema(origem, nome):
+            hash_origem = hash_arquivo(caminho_csv)
+            particao = reaproveitaveis.get(caminho_csv.name)
+            if particao is None or particao["hash_origem"] != hash_origem:
+                particao = gerar_particao(caminho_csv, nome, novas, hash_origem)
+                geradas.update((particao["arquivo"], particao["cubo"]))
+            particoes.append(particao)
+        verificar_anos([(particao["origem"], particao["anos"]) for particao in particoes], nome)
+        particoes_por_tema[nome] = particoes
+
+    # Tabelas dos temas, juntando as partições, validadas antes de qualquer
+    # arquivo lido pela aplicação ser substituído
+    tabelas = {
+        nome: preparar_tabela(
+            pd.concat([ler_arrow(localizar(particao["arquivo"])) for particao in particoes], ignore_index=True),
+            nome
+        )
+        for nome, particoes in particoes_por_tema.items()
+    }
+    resumo_validacao = None
+    if validacao != "desligar":
+        relatorio = validar(tabelas, ler_excecoes(origem))
+        relatorio.to_csv(destino / ARQUIVO_VALIDACAO, sep=";", index=False)
+        if validacao == "bloquear" and tem_erros(relatorio):
+            raise ErroValidacao(relatorio)
+        resumo_validacao = relatorio["Severidade"].value_counts().reindex(["erro", "aviso"], fill_value=0).to_dict()
+
+    # Versão aprovada: as partições novas passam a valer
+    for arquivo in geradas:
+        (novas / Path(arquivo).name).replace(destino / arquivo)
+
+    temas = {}
+    cubos = {}
+    for nome, particoes in particoes_por_tema.items():
+        # Tema sem nenhuma partição alterada: os arquivos juntados continuam valendo
+        tema_anterior = anterior["temas"].get(nome) if reaproveitaveis else None
+        if (
+            tema_anterior is not None
+            and tema_anterior.get("particoes") == particoes
+            and (destino / tema_anterior["arquivo"]).exists()
+            and (destino / anterior["cubos"][nome]["arquivo"]).exists()
+        ):
+            temas[nome] = tema_anterior
+            cubos[nome] = anterior["cubos"][nome]
+            continue
+
+        # Tabela do tema e tabela agregada do cubo, juntando as partições
+        df = tabelas[nome]
+        arquivo = f"{nome}.arrow"
+        gravar_arrow(df, destino / arquivo)
+
+        cubo = juntar_tabelas_agregadas([ler_arrow(destino / particao["cubo"]) for particao in particoes])
+        cubo = reduzir_cubo(cubo, nome)
+        gravar_arrow(cubo, destino / f"cubo_{nome}.arrow")
+        cubos[nome] = {"arquivo": f"cubo_{nome}.arrow", "linhas": len(cubo)}
+
+        temas[nome] = {
+            "arquivo": arquivo,
+            "linhas": len(df),
+            "anos": sorted(int(ano) for ano in df["Ano"].unique()),
+            "colunas": {coluna: str(tipo) for coluna, tipo in df.dtypes.items()},
+            "particoes": particoes,
+        }
+
+    # A versão depende apenas do conteúdo dos CSVs de origem; a de cada
+    # ano, só das partições que contêm esse ano
+    hashes_por_ano = {}
+    for nome in TEMAS:
+        for particao in temas[nome]["particoes"]:
+            for ano in particao["anos"]:
+                hashes_por_ano.setdefault(ano, []).append(particao["hash_origem"])
+    manifesto = {
+        "versao": impressao(
+            particao["hash_origem"] for nome in TEMAS for particao in temas[nome]["particoes"]
+        ),
+        "versoes_anos": {str(ano): impressao(hashes) for ano, hashes in sorted(hashes_por_ano.items())},
+        "gerado_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "formato_cubos": FORMATO_CUBOS,
+        "validacao": resumo_validacao,
+        "temas": temas,
+        "cubos": cubos,
+    }
+    # O manifesto é gravado por último: a base só é considerada pronta
+    # depois que todos os arquivos Arrow foram escritos
+    caminho_temporario = destino / (ARQUIVO_MANIFESTO + ".tmp")
+    with open(caminho_temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(manifesto, arquivo, ensure_ascii=False, indent=2)
+    caminho_temporario.replace(destino / ARQUIVO_MANIFESTO)
+
+    # Remove as partições que não fazem mais parte da base (processos que
+    # ainda as mapeiam continuam lendo o conteúdo antigo)
+    em_uso = {
+        destino / particao[chave]
+        for tema in temas.values() for particao in tema["particoes"] for chave in ("arquivo", "cubo")
+    }
+    for caminho in (destino / PASTA_PARTICOES).glob("*.arrow"):
+        if caminho not in em_uso:
+            caminho.unlink()
+    return manifesto
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(
+        description="Gera a base colunar (Arrow/Feather) a partir dos CSVs do INEP."
+    )
+    parser.add_argument("--origem", default=PASTA_DADOS, help="Pasta com os arquivos docentes_*.csv")
+    parser.add_argument("--destino", default=PASTA_BASE, help="Pasta onde a base colunar será gravada")
+    parser.add_argument("--completa", action="store_true", help="Refaz todas as partições")
+    parser.add_argument(
+        "--ignorar-validacao", action="store_true", help="Publica a versão mesmo com erros de validação"
+    )
+    args = parser.parse_args(argumentos)
+
+    anterior = None if args.completa else ler_manifesto(args.destino)
+    inicio = time.perf_counter()
+    try:
+        manifesto = construir_base(
+            args.origem, args.destino, args.completa, "ignorar" if args.ignorar_validacao else "bloquear"
+        )
+    except ErroValidacao as erro:
+        print(erro, file=sys.stderr)
+        print(
+            f"A versão não foi publicada. Relatório completo em {Path(args.destino) / ARQUIVO_VALIDACAO}",
+            file=sys.stderr
+        )
+        sys.exit(1)
+    except ValueError as erro:
+        parser.error(str(erro))
+    duracao = time.perf_counter() - inicio
+
+    hashes_anteriores = set()
+    if anterior is not None:
+        hashes_anteriores = {
+            particao["hash_origem"]
+            for tema in anterior["temas"].values() for particao in tema.get("particoes", [])
+        }
+    for nome, tema in manifesto["temas"].items():
+        tamanho = (Path(args.destino) / tema["arquivo"]).stat().st_size
+        novas = sum(particao["hash_origem"] not in hashes_anteriores for particao in tema["particoes"])
+        print(
+            f"{nome:<12} {tema['linhas']:>9} linhas  {tamanho / 1024:>9.1f} KiB  "
+            f"{len(tema['particoes'])} partições ({novas} processadas)"
+        )
+    validacao = manifesto["validacao"]
+    print(f"Validação: {validacao['erro']} erro(s), {validacao['aviso']} aviso(s)")
+    print(f"Base versão {manifesto['versao']} gerada em {duracao:.2f}s em {args.destino}")
+
+
+if __name__ == "__main__":
+    main()
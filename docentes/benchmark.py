@@ -0,0 +1,253 @@
+"""
+Benchmark, sem navegador, das etapas de preparação de dados e de figuras.
+
+Uso:
+    python -m docentes.benchmark [--escala N] [--amostra N | --municipio NOME ...] [--app] [--json ARQUIVO]
+
+Mede cada etapa separadamente (leitura dos CSVs, validação, geração completa e
+incremental e leitura da base colunar, construção dos cubos, consultas,
+construção e serialização das figuras) para todos os temas e combinações
+de ano e local, e informa as latências p50/p95 e o pico de memória alocada por chamada. Com
+`--escala N`, os dados reais são replicados N vezes (docentes.sintetico)
+numa pasta temporária antes da medição. Com `--app`, executa também o
+script da aplicação (streamlit.testing.v1.AppTest) aba por aba, medindo o
+rerun completo sobre os dados configurados (DOCENTES_PASTA_DADOS).
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import plotly.io as pio
+
+from docentes.base_colunar import construir_base
+from docentes.cubos import consultar_cubo, construir_cubo, montar_cubos
+from docentes.dados import PASTA_DADOS, PASTA_PROJETO, carregar_base, carregar_csvs
+from docentes.graficos import construir_figura, opcoes_seletor
+from docentes.sintetico import gerar_tabelas, gravar_csvs
+from docentes.temas import TEMAS
+from docentes.territorio import CODIGO_BRASIL, buscar_municipios, montar_hierarquia, nivel_do_local, uf_do_municipio
+from docentes.validacao import validar
+
+# Quantas chamadas de cada etapa são repetidas sob o tracemalloc, que
+# deixa a execução bem mais lenta, para medir o pico de memória
+CHAMADAS_MEMORIA = 5
+
+
+class Medicoes:
+    """
+    Acumula, por etapa, as durações das chamadas e o maior pico de memória.
+    """
+
+    def __init__(self):
+        self.tempos = {}
+        self.picos = {}
+
+    def medir(self, etapa, funcao, *args):
+        """
+        Executa a função, registra sua duração e retorna o resultado.
+        """
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        self.tempos.setdefault(etapa, []).append(time.perf_counter() - inicio)
+        return resultado
+
+    def medir_memoria(self, etapa, funcao, *args):
+        """
+        Executa a função sob o tracemalloc e registra o pico de memória.
+        """
+        tracemalloc.start()
+        try:
+            funcao(*args)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.picos[etapa] = max(self.picos.get(etapa, 0), pico)
+
+    def resumo(self):
+        """
+        Retorna, por etapa, o número de chamadas, p50, p95 e o total em
+        milissegundos e o pico de memória em MiB.
+        """
+        resumo = {}
+        for etapa, tempos in self.tempos.items():
+            tempos_ms = np.array(tempos) * 1000
+            resumo[etapa] = {
+                "chamadas": len(tempos),
+                "p50_ms": round(float(np.percentile(tempos_ms, 50)), 3),
+                "p95_ms": round(float(np.percentile(tempos_ms, 95)), 3),
+                "total_ms": round(float(tempos_ms.sum()), 1),
+                "pico_mib": round(self.picos.get(etapa, 0) / 2**20, 2),
+            }
+        return resumo
+
+
+def escolher_locais(tabelas, amostra, nomes=None, semente=0):
+    """
+    Retorna o local mais alto da hierarquia (o Brasil, ou a UF quando há
+    só uma) seguido dos códigos dos municípios com os `nomes` informados,
+    de uma amostra aleatória (reprodutível) de `amostra` municípios ou,
+    sem nenhum dos dois, de todos eles.
+    """
+    hierarquia = montar_hierarquia(tabelas["etapas"])
+    if nomes:
+        municipios = []
+        for nome in nomes:
+            codigos = buscar_municipios(hierarquia, nome)
+            if not codigos:
+                raise ValueError(f"Município não encontrado: {nome}")
+            municipios.extend(codigos)
+        return [hierarquia["raiz"]] + municipios
+
+    municipios = sorted(int(m) for m in tabelas["etapas"]["Código do Município"].unique())
+    if amostra:
+        municipios = sorted(random.Random(semente).sample(municipios, min(amostra, len(municipios))))
+    return [hierarquia["raiz"]] + municipios
+
+
+def medir_carga(medicoes, pasta, repeticoes):
+    """
+    Mede a leitura dos CSVs, a validação, a geração (sem a validação) e a
+    leitura da base colunar e a construção dos cubos. Retorna as tabelas e
+    os cubos.
+    """
+    pasta_base = Path(pasta) / "base_colunar"
+    for _ in range(repeticoes):
+        tabelas = medicoes.medir("carregar_csv", carregar_csvs, pasta)
+        medicoes.medir("validar", validar, tabelas)
+        medicoes.medir("construir_base", construir_base, pasta, pasta_base, True, "desligar")
+        # Sem CSVs alterados, a geração incremental reaproveita todas as partições
+        medicoes.medir("atualizar_base", construir_base, pasta, pasta_base, False, "desligar")
+        medicoes.medir("carregar_base", carregar_base, pasta_base)
+        medicoes.medir("construir_cubos", lambda: {nome: construir_cubo(tabelas[nome], nome) for nome in TEMAS})
+        cubos = medicoes.medir("montar_cubos_base", montar_cubos, tabelas, pasta_base)
+
+    medicoes.medir_memoria("carregar_csv", carregar_csvs, pasta)
+    medicoes.medir_memoria("validar", validar, tabelas)
+    medicoes.medir_memoria("construir_base", construir_base, pasta, pasta_base, True, "desligar")
+    medicoes.medir_memoria("atualizar_base", construir_base, pasta, pasta_base, False, "desligar")
+    medicoes.medir_memoria("carregar_base", carregar_base, pasta_base)
+    medicoes.medir_memoria("construir_cubos", lambda: {nome: construir_cubo(tabelas[nome], nome) for nome in TEMAS})
+    medicoes.medir_memoria("montar_cubos_base", montar_cubos, tabelas, pasta_base)
+    return tabelas, cubos
+
+
+def medir_abas(medicoes, cubos, anos, locais):
+    """
+    Mede, para cada tema, as consultas e as figuras de todas as
+    combinações de ano, local e opção do seletor.
+    """
+    chamadas = {"consulta": [], "figura_barras": [], "figura_linha": [], "serializacao": []}
+    for tema in TEMAS:
+        cubo = cubos[tema]
+        for local in locais:
+            for ano in anos:
+                medicoes.medir("consulta", consultar_cubo, cubo, local, ano)
+                figura = medicoes.medir("figura_barras", construir_figura, cubo, tema, "barras", ano, local)
+                if figura is not None:
+                    medicoes.medir("serializacao", pio.to_json, figura, False)
+                chamadas["consulta"].append((consultar_cubo, cubo, local, ano))
+                chamadas["figura_barras"].append((construir_figura, cubo, tema, "barras", ano, local))
+            for seletor in opcoes_seletor(cubo, tema, local):
+                figura = medicoes.medir("figura_linha", construir_figura, cubo, tema, "linha", None, local, seletor)
+                if figura is not None:
+                    medicoes.medir("serializacao", pio.to_json, figura, False)
+                    chamadas["serializacao"].append((pio.to_json, figura, False))
+                chamadas["figura_linha"].append((construir_figura, cubo, tema, "linha", None, local, seletor))
+
+    for etapa, lista in chamadas.items():
+        for funcao, *args in lista[:CHAMADAS_MEMORIA]:
+            medicoes.medir_memoria(etapa, funcao, *args)
+
+
+def selecionar_local(app, local):
+    """
+    Ajusta no AppTest os filtros de UF e de município para exibir o local.
+    O filtro de UF só existe quando os dados têm mais de uma UF; trocar a
+    UF muda as opções de município, o que exige um rerun (não medido)
+    antes de escolher o município.
+    """
+    uf = uf_do_municipio(local) if nivel_do_local(local) == "Município" else local
+    if any(filtro.key == "filtro_uf" for filtro in app.sidebar.selectbox):
+        if app.selectbox(key="filtro_uf").value != uf:
+            app.selectbox(key="filtro_uf").set_value(uf)
+            app.run()
+    if local != CODIGO_BRASIL:
+        app.selectbox(key="filtro_municipio").set_value(local)
+
+
+def medir_app(medicoes, anos, locais):
+    """
+    Executa o script da aplicação com o AppTest, aba por aba, para cada
+    combinação de ano e local, medindo o rerun completo.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(str(PASTA_PROJETO / "streamlit_app.py"), default_timeout=120)
+    medicoes.medir("app_primeiro_rerun", app.run)
+    for tema in TEMAS.values():
+        for local in locais:
+            for ano in anos:
+                app.selectbox(key="filtro_ano").set_value(ano)
+                selecionar_local(app, local)
+                # A aba aberta precisa ser reenviada a cada rerun do AppTest
+                app.session_state["aba_selecionada"] = tema["titulo"]
+                medicoes.medir("app_rerun", app.run)
+                if app.exception:
+                    raise RuntimeError(f"Erro na aba {tema['titulo']}: {app.exception[0].value}")
+    medicoes.medir_memoria("app_rerun", app.run)
+
+
+def imprimir_resumo(resumo):
+    print(f"{'etapa':<20} {'chamadas':>9} {'p50 ms':>10} {'p95 ms':>10} {'total ms':>11} {'pico MiB':>9}")
+    for etapa, valores in resumo.items():
+        print(
+            f"{etapa:<20} {valores['chamadas']:>9} {valores['p50_ms']:>10.3f} {valores['p95_ms']:>10.3f} "
+            f"{valores['total_ms']:>11.1f} {valores['pico_mib']:>9.2f}"
+        )
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Mede as etapas de dados e de figuras da DocentES.")
+    parser.add_argument("--origem", default=PASTA_DADOS, help="Pasta com os arquivos docentes_*.csv")
+    parser.add_argument("--escala", type=int, default=1, help="Replica os municípios N vezes (dados sintéticos)")
+    parser.add_argument("--amostra", type=int, default=0, help="Mede só N municípios sorteados (0 = todos)")
+    parser.add_argument(
+        "--municipio", action="append", help="Mede só este município (pelo nome; pode ser repetido)"
+    )
+    parser.add_argument("--repeticoes", type=int, default=3, help="Repetições das etapas de carga")
+    parser.add_argument("--app", action="store_true", help="Mede também o rerun completo do app (AppTest)")
+    parser.add_argument("--json", help="Grava o resumo neste arquivo JSON")
+    args = parser.parse_args(argumentos)
+
+    if args.app and args.escala > 1:
+        parser.error("--app usa os dados configurados; gere-os com docentes.sintetico e use DOCENTES_PASTA_DADOS")
+
+    medicoes = Medicoes()
+    with tempfile.TemporaryDirectory() as pasta:
+        # Trabalha sempre numa cópia, para não sobrescrever a base colunar real
+        gravar_csvs(gerar_tabelas(carregar_csvs(args.origem), args.escala), pasta)
+        tabelas, cubos = medir_carga(medicoes, pasta, args.repeticoes)
+        anos = sorted(int(ano) for ano in tabelas["etapas"]["Ano"].unique())
+        try:
+            locais = escolher_locais(tabelas, args.amostra, args.municipio)
+        except ValueError as erro:
+            parser.error(str(erro))
+        medir_abas(medicoes, cubos, anos, locais)
+
+    if args.app:
+        medir_app(medicoes, anos, locais)
+
+    resumo = medicoes.resumo()
+    imprimir_resumo(resumo)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump({"escala": args.escala, "locais": len(locais), "etapas": resumo}, arquivo, indent=2)
+
+
+if __name__ == "__main__":
+    main()
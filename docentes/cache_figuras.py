@@ -0,0 +1,186 @@
+"""
+Cache de figuras já construídas, compartilhado por todas as sessões.
+
+O universo de figuras é finito (tema × tipo × ano × local × opção do
+seletor) e a construção com Plotly Express é a etapa mais cara de cada
+rerun, então as figuras prontas ficam num cache LRU limitado em
+quantidade. O cache guarda o objeto Figure: o st.plotly_chart ainda o
+serializa a cada exibição, mas essa etapa custa uma fração da construção
+(e um dicionário pré-serializado seria revalidado pelo Streamlit, o que
+custa mais do que serializar a Figure).
+
+Com DOCENTES_AQUECER_FIGURAS=1, um job em segundo plano pré-constrói as
+combinações mais acessadas (o Brasil, ou a UF quando os dados têm uma só,
+no ano mais recente) assim que o cache é criado.
+
+Quando os dados são atualizados (um ano novo, por exemplo), o cache da
+nova versão herda do anterior as figuras dos anos que não mudaram.
+
+Se as figuras da versão foram pré-calculadas (python -m
+docentes.precalculo), uma figura que falta no cache é lida do disco, e só
+é construída se também não estiver lá.
+"""
+import os
+import threading
+from collections import Counter, OrderedDict
+
+from docentes.graficos import construir_figura, opcoes_seletor
+from docentes.metricas import MEDIR_TAMANHOS, contar, medir, observar_tamanho
+from docentes.temas import TEMAS
+
+# Quantidade máxima de figuras mantidas no cache
+CAPACIDADE_PADRAO = int(os.environ.get("DOCENTES_CACHE_FIGURAS", "2048"))
+# Pré-constrói as figuras mais acessadas em segundo plano
+AQUECER_FIGURAS = os.environ.get("DOCENTES_AQUECER_FIGURAS", "0") == "1"
+
+
+def chave_figura(tema, tipo, ano, local, seletor=None, modo="absoluto"):
+    """
+    Normaliza a chave de uma figura: o gráfico de barras não depende do
+    seletor, e o de linhas não depende do ano (o mapa depende dos dois).
+    O local é identificado pelo
+    código, já que nomes de municípios se repetem entre UFs (ou por uma
+    tupla de códigos, nas figuras de comparação). O modo de exibição
+    (docentes.indicadores) distingue as figuras dos cubos derivados.
+    """
+    if tipo.startswith("barras"):
+        return (tema, tipo, int(ano), local, None, modo)
+    if tipo == "mapa":
+        return (tema, tipo, int(ano), local, seletor, modo)
+    return (tema, tipo, None, local, seletor, modo)
+
+
+class CacheFiguras:
+    """
+    Cache LRU de figuras, seguro para uso simultâneo por várias sessões.
+    As figuras devolvidas são compartilhadas e não devem ser alteradas.
+    """
+
+    def __init__(self, capacidade=CAPACIDADE_PADRAO, disco=None):
+        self.capacidade = capacidade
+        # Figuras pré-calculadas da versão (docentes.precalculo.DiscoFiguras)
+        self.disco = disco
+        self.acertos = 0
+        self.faltas = 0
+        self.pedidos = Counter()
+        self._figuras = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, cubo, tema, tipo, ano, local, seletor=None):
+        """
+        Retorna a figura pedida, construindo-a (fora da trava) se ela ainda
+        não estiver no cache. O modo de exibição vem do cubo recebido.
+        """
+        chave = chave_figura(tema, tipo, ano, local, seletor, cubo.get("modo", "absoluto"))
+        contar("cache_consultas_total", cache="figuras")
+        with self._trava:
+            self.pedidos[chave] += 1
+            if chave in self._figuras:
+                self.acertos += 1
+                self._figuras.move_to_end(chave)
+                return self._figuras[chave]
+            self.faltas += 1
+
+        contar("cache_faltas_total", cache="figuras")
+        figura = self.produzir(cubo, chave)
+        self.guardar(chave, figura)
+        return figura
+
+    def produzir(self, cubo, chave):
+        """
+        Obtém a figura de uma chave que não está no cache: lida das figuras
+        pré-calculadas, se houver, ou construída.
+        """
+        tema, tipo, ano, local, seletor, _ = chave
+        if self.disco is not None:
+            contar("cache_consultas_total", cache="figuras_disco")
+            with medir("ler_figura", tema=tema, tipo=tipo):
+                encontrada, figura = self.disco.ler(chave)
+            if encontrada:
+                return figura
+            contar("cache_faltas_total", cache="figuras_disco")
+        with medir("construir_figura", tema=tema, tipo=tipo):
+            figura = construir_figura(cubo, tema, tipo, ano, local, seletor)
+        if MEDIR_TAMANHOS and figura is not None:
+            observar_tamanho("figura", len(figura.to_json(validate=False)), tema=tema, tipo=tipo)
+        return figura
+
+    def contem(self, chave):
+        with self._trava:
+            return chave in self._figuras
+
+    def mais_pedidas(self, quantidade=20):
+        """
+        Retorna as chaves mais pedidas desde a criação do cache.
+        """
+        with self._trava:
+            return [chave for chave, _ in self.pedidos.most_common(quantidade)]
+
+    def herdar(self, anterior, anos):
+        """
+        Copia do cache de uma versão anterior dos dados os gráficos de
+        barras e os mapas dos `anos` cujos dados não mudaram (na variação
+        anual, o ano anterior também não pode ter mudado). Os gráficos de
+        linhas cobrem todos os anos e são descartados. Retorna quantas
+        figuras foram copiadas.
+        """
+        anos = set(anos)
+        with anterior._trava:
+            itens = [
+                (chave, figura) for chave, figura in anterior._figuras.items()
+                if chave[2] in anos
+                and (chave[5] != "variacao" or chave[2] - 1 in anos)
+            ]
+        for chave, figura in itens:
+            self.guardar(chave, figura)
+        return len(itens)
+
+    def __len__(self):
+        return len(self._figuras)
+
+    def guardar(self, chave, figura):
+        with self._trava:
+            self._figuras[chave] = figura
+            self._figuras.move_to_end(chave)
+            while len(self._figuras) > self.capacidade:
+                self._figuras.popitem(last=False)
+
+
+def combinacoes(cubos, anos, locais, modos=("absoluto",), temas=TEMAS):
+    """
+    Gera as chaves de todas as figuras das combinações de anos, locais e
+    modos de exibição informadas, para os temas e todas as opções de
+    seletor.
+    """
+    for tema in temas:
+        for local in locais:
+            opcoes = opcoes_seletor(cubos[tema], tema, local)
+            for modo in modos:
+                for ano in anos:
+                    yield chave_figura(tema, "barras", ano, local, modo=modo)
+                for seletor in opcoes:
+                    yield chave_figura(tema, "linha", None, local, seletor, modo)
+
+
+def aquecer(cache, cubos, anos, locais):
+    """
+    Pré-constrói no cache (ou lê das figuras pré-calculadas) as figuras
+    das combinações informadas que ainda não estão nele. Retorna quantas
+    figuras foram acrescentadas.
+    """
+    construidas = 0
+    for chave in combinacoes(cubos, anos, locais):
+        if cache.contem(chave):
+            continue
+        cache.guardar(chave, cache.produzir(cubos[chave[0]], chave))
+        construidas += 1
+    return construidas
+
+
+def aquecer_em_segundo_plano(cache, cubos, anos, locais):
+    """
+    Executa `aquecer` numa thread daemon, sem atrasar a primeira resposta.
+    """
+    thread = threading.Thread(target=aquecer, args=(cache, cubos, anos, locais), daemon=True)
+    thread.start()
+    return thread
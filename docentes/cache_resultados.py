@@ -0,0 +1,185 @@
+"""
+Cache de resultados de consultas, compartilhado por todas as sessões do
+processo.
+
+As figuras têm o seu próprio cache (docentes.cache_figuras). Este guarda
+os demais resultados calculados a partir dos filtros, como as tabelas
+de detalhamento já filtradas e ordenadas, a tabela do modo de comparação
+e as respostas da API (docentes.api). A chave é o estado normalizado dos
+filtros, e cada versão dos dados tem as suas instâncias, criadas uma vez
+por versão como os demais caches. Assim, mil sessões na mesma visão
+calculam o resultado uma única vez.
+
+Os resultados saem do cache pelo que acontecer primeiro:
+
+- o mais antigo sem uso, quando passa da quantidade máxima de entradas;
+- o mais antigo sem uso, quando passa do tamanho máximo em bytes;
+- o próprio resultado, quando passa da validade, se houver uma.
+
+Se duas sessões pedem ao mesmo tempo um resultado que falta, só a
+primeira o calcula e a outra espera por ele. Com DOCENTES_PASTA_RESULTADOS,
+os resultados também são gravados em disco, numa pasta por versão dos
+dados compartilhada pelos processos da máquina. Consultas e faltas são
+contadas nas métricas (docentes.metricas) com o nome de cada cache.
+"""
+import hashlib
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+
+from docentes.dados import pasta_da_versao
+from docentes.metricas import contar
+
+# Quantidade máxima de resultados e tamanho máximo, em MiB, de cada cache
+CAPACIDADE_RESULTADOS = int(os.environ.get("DOCENTES_CACHE_RESULTADOS", "4096"))
+LIMITE_MIB_RESULTADOS = int(os.environ.get("DOCENTES_CACHE_RESULTADOS_MIB", "256"))
+# Validade dos resultados, em segundos (0: até a próxima versão dos dados)
+VALIDADE_RESULTADOS = float(os.environ.get("DOCENTES_CACHE_RESULTADOS_VALIDADE", "0"))
+# Pasta da cópia em disco (desligada sem a variável)
+PASTA_RESULTADOS = os.environ.get("DOCENTES_PASTA_RESULTADOS")
+
+
+def tamanho(valor):
+    """
+    Tamanho aproximado do resultado em bytes.
+    """
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, (bytes, bytearray, str)):
+        return len(valor)
+    return sys.getsizeof(valor)
+
+
+def pasta_resultados(versao, pasta=PASTA_RESULTADOS):
+    """
+    Cria a pasta em disco dos resultados da versão dos dados, removendo as
+    das versões mais antigas que a anterior (ver
+    docentes.dados.pasta_da_versao), ou retorna None se a cópia em disco
+    estiver desligada.
+    """
+    if pasta is None:
+        return None
+    return pasta_da_versao(pasta, versao)
+
+
+class CacheResultados:
+    """
+    Cache LRU de resultados, com limite de entradas e de bytes, validade
+    opcional e cópia opcional em disco, seguro para uso simultâneo por
+    várias sessões. Os resultados devolvidos são compartilhados e não
+    devem ser alterados.
+    """
+
+    def __init__(self, nome, capacidade=CAPACIDADE_RESULTADOS, limite_bytes=LIMITE_MIB_RESULTADOS * 1024 ** 2,
+                 validade=VALIDADE_RESULTADOS, pasta=None):
+        self.nome = nome
+        self.capacidade = capacidade
+        self.limite_bytes = limite_bytes
+        self.validade = validade
+        self.pasta = None if pasta is None else Path(pasta) / nome
+        if self.pasta is not None:
+            self.pasta.mkdir(parents=True, exist_ok=True)
+        self.bytes = 0
+        self.acertos = 0
+        self.faltas = 0
+        # chave -> (resultado, tamanho, instante em que foi calculado)
+        self._resultados = OrderedDict()
+        # Chaves sendo calculadas, com o evento que avisa quem espera por elas
+        self._calculando = {}
+        self._trava = threading.Lock()
+
+    def obter(self, chave, calcular):
+        """
+        Retorna o resultado da chave, chamando `calcular()` (fora da trava)
+        só se ele não estiver no cache, nem em disco, nem sendo calculado
+        por outra sessão.
+        """
+        contar("cache_consultas_total", cache=self.nome)
+        while True:
+            with self._trava:
+                resultado = self._consultar(chave)
+                if resultado is not None:
+                    self.acertos += 1
+                    return resultado[0]
+                evento = self._calculando.get(chave)
+                if evento is None:
+                    self.faltas += 1
+                    evento = self._calculando[chave] = threading.Event()
+                    break
+            # Outra sessão está calculando o mesmo resultado
+            evento.wait()
+
+        contar("cache_faltas_total", cache=self.nome)
+        try:
+            encontrado, valor = self._ler_disco(chave)
+            if not encontrado:
+                valor = calcular()
+                self._gravar_disco(chave, valor)
+            self.guardar(chave, valor)
+            return valor
+        finally:
+            with self._trava:
+                del self._calculando[chave]
+            evento.set()
+
+    def _consultar(self, chave):
+        item = self._resultados.get(chave)
+        if item is None:
+            return None
+        if self.validade and time.monotonic() - item[2] > self.validade:
+            self._remover(chave)
+            return None
+        self._resultados.move_to_end(chave)
+        return item
+
+    def _remover(self, chave):
+        _, tamanho_item, _ = self._resultados.pop(chave)
+        self.bytes -= tamanho_item
+
+    def guardar(self, chave, valor):
+        tamanho_item = tamanho(valor)
+        with self._trava:
+            if chave in self._resultados:
+                self._remover(chave)
+            self._resultados[chave] = (valor, tamanho_item, time.monotonic())
+            self.bytes += tamanho_item
+            while len(self._resultados) > self.capacidade or (self.bytes > self.limite_bytes and len(self._resultados) > 1):
+                self._remover(next(iter(self._resultados)))
+
+    # --- CÓPIA EM DISCO ---
+    def _arquivo(self, chave):
+        return self.pasta / (hashlib.sha256(repr(chave).encode()).hexdigest()[:32] + ".pkl")
+
+    def _ler_disco(self, chave):
+        if self.pasta is None:
+            return False, None
+        arquivo = self._arquivo(chave)
+        try:
+            if self.validade and time.time() - arquivo.stat().st_mtime > self.validade:
+                return False, None
+            with open(arquivo, "rb") as entrada:
+                chave_gravada, valor = pickle.load(entrada)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+        # O nome do arquivo é um resumo da chave: confere a chave inteira
+        return chave_gravada == chave, valor
+
+    def _gravar_disco(self, chave, valor):
+        if self.pasta is None:
+            return
+        arquivo = self._arquivo(chave)
+        temporario = arquivo.with_name(f"{arquivo.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temporario, "wb") as saida:
+            pickle.dump((chave, valor), saida, protocol=pickle.HIGHEST_PROTOCOL)
+        temporario.replace(arquivo)
+
+    def __len__(self):
+        return len(self._resultados)
@@ -0,0 +1,301 @@
+"""
+Teste de carga aproximado: várias sessões simuladas usando o app no mesmo
+processo, com os reruns serializados.
+
+Uso:
+    python -m docentes.carga [--sessoes N] [--interacoes N] [--pausa S] [--semente N] [--json ARQUIVO]
+
+Cada sessão é um streamlit.testing.v1.AppTest numa thread própria,
+executando o script da aplicação no mesmo processo, como as sessões de
+um servidor Streamlit, e compartilhando com as demais os caches do
+processo (st.cache_resource, figuras e resultados). Tudo roda sem rede,
+sobre os dados configurados (DOCENTES_PASTA_DADOS e as demais variáveis
+do app), então duas configurações podem ser comparadas na mesma máquina.
+
+O AppTest instala um runtime global a cada rerun, então os reruns de
+sessões diferentes não podem se sobrepor: cada um espera a sua vez numa
+trava, e a espera entra na latência medida. O resultado é uma aproximação
+serializada, útil para comparar configurações (caches, backend, dados)
+sem rede, mas não para dimensionar réplicas: a vazão e as latências não
+são as de um servidor, e a memória medida inclui os objetos do AppTest.
+Para isso, use docentes.carga_servidor, que conversa com um servidor
+Streamlit de verdade pelo websocket, com as mesmas interações.
+
+Cada sessão abre o app e faz uma sequência sorteada de interações, com
+uma pausa aleatória (média de `--pausa` segundos) entre elas, imitando
+um usuário: trocar o ano, o local, a aba, o item do gráfico de linhas ou
+o modo de exibição, abrir a tabela de dados e comparar locais (pesos em
+PESOS_INTERACOES). Metade das escolhas de local fica na visão padrão,
+que é a mais acessada.
+
+O relatório traz:
+
+- a vazão (reruns por segundo) e as latências p50/p95/p99 de cada tipo
+  de interação;
+- a memória residente do processo antes e depois de abrir as sessões, e
+  o acréscimo médio por sessão (no AppTest, cada sessão também guarda a
+  árvore de elementos do último rerun, o que um servidor não faz);
+- as consultas, faltas e a taxa de acerto de cada cache, pelos
+  contadores de docentes.metricas.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import threading
+import time
+
+import numpy as np
+
+from docentes.benchmark import selecionar_local
+from docentes.dados import PASTA_PROJETO
+from docentes.indicadores import MODOS
+from docentes.metricas import METRICAS
+from docentes.temas import TEMAS
+
+# Peso de cada tipo de interação no sorteio
+PESOS_INTERACOES = {
+    "ano": 3,
+    "local": 4,
+    "aba": 3,
+    "seletor": 3,
+    "modo": 1,
+    "tabela": 1,
+    "comparar": 1,
+}
+# Chance de uma escolha de local ficar na visão padrão
+CHANCE_VISAO_PADRAO = 0.5
+# Seletor do gráfico de linhas de cada aba (no modo de comparação, `comparacao_<tema>`)
+SELETORES = {
+    "etapas": "filtro_etapa_linha",
+    "idade": "filtro_idade_linha_final",
+    "formacao": "filtro_formacao_linha",
+    "vinculo": "filtro_vinculo_linha_final",
+    "dependencia": "filtro_dependencia_linha",
+}
+# Quantidade de locais comparados
+LOCAIS_COMPARADOS = (2, 4)
+
+# Um rerun do AppTest por vez no processo (ver a descrição do módulo)
+TRAVA_RERUN = threading.Lock()
+
+
+def memoria_residente():
+    """
+    Memória residente atual do processo, em bytes (Linux).
+    """
+    with open("/proc/self/statm") as arquivo:
+        return int(arquivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def percentis(tempos):
+    tempos_ms = np.array(tempos) * 1000
+    return {
+        "reruns": len(tempos),
+        "p50_ms": round(float(np.percentile(tempos_ms, 50)), 1),
+        "p95_ms": round(float(np.percentile(tempos_ms, 95)), 1),
+        "p99_ms": round(float(np.percentile(tempos_ms, 99)), 1),
+    }
+
+
+class Sessao:
+    """
+    Uma sessão simulada: o AppTest e o estado que ele não guarda entre os
+    reruns (a aba aberta e os expanders abertos precisam ser reenviados a
+    cada rerun).
+    """
+
+    def __init__(self, locais, anos, raiz, sorteio):
+        from streamlit.testing.v1 import AppTest
+
+        self.app = AppTest.from_file(str(PASTA_PROJETO / "streamlit_app.py"), default_timeout=300)
+        self.locais = locais
+        self.anos = anos
+        self.raiz = raiz
+        self.sorteio = sorteio
+        self.tema = next(iter(TEMAS))
+        self.abertos = set()
+        self.tempos = {}
+        self.erros = []
+
+    def executar(self, interacao):
+        """
+        Reaplica o estado das abas e executa um rerun, medindo-o desde o
+        pedido, com a espera pela vez.
+        """
+        self.app.session_state["aba_selecionada"] = TEMAS[self.tema]["titulo"]
+        for chave in self.abertos:
+            self.app.session_state[chave] = True
+        inicio = time.perf_counter()
+        with TRAVA_RERUN:
+            self.app.run()
+        self.tempos.setdefault(interacao, []).append(time.perf_counter() - inicio)
+        if self.app.exception:
+            self.erros.append(f"{interacao}: {self.app.exception[0].value}")
+
+    def comparando(self):
+        return bool(self.app.session_state["modo_comparacao"]) if "modo_comparacao" in self.app.session_state else False
+
+    def interagir(self):
+        """
+        Sorteia e aplica uma interação, e executa o rerun dela.
+        """
+        interacao = self.sorteio.choices(list(PESOS_INTERACOES), weights=list(PESOS_INTERACOES.values()))[0]
+        app = self.app
+        if interacao == "ano":
+            app.selectbox(key="filtro_ano").set_value(self.sorteio.choice(self.anos))
+        elif interacao == "local":
+            if self.comparando():
+                app.toggle(key="modo_comparacao").set_value(False)
+                self.executar("sair_comparacao")
+            local = self.raiz if self.sorteio.random() < CHANCE_VISAO_PADRAO else self.sorteio.choice(self.locais)
+            # Trocar a UF pode exigir um rerun
+            with TRAVA_RERUN:
+                selecionar_local(app, local)
+        elif interacao == "aba":
+            self.tema = self.sorteio.choice([tema for tema in TEMAS if tema != self.tema])
+        elif interacao == "seletor":
+            seletor = app.selectbox(key=f"comparacao_{self.tema}" if self.comparando() else SELETORES[self.tema])
+            seletor.set_value(self.sorteio.choice(seletor.options))
+        elif interacao == "modo" and not self.comparando():
+            app.radio(key=f"modo_{self.tema}").set_value(self.sorteio.choice(list(MODOS)))
+        elif interacao == "tabela":
+            self.abertos.add(f"tabela_{self.tema}")
+        elif interacao == "comparar":
+            app.toggle(key="modo_comparacao").set_value(True)
+            self.executar("comparar")
+            interacao = "comparar_locais"
+            quantidade = self.sorteio.randint(*LOCAIS_COMPARADOS)
+            app.multiselect(key="filtro_comparacao").set_value(self.sorteio.sample(self.locais, quantidade))
+        self.executar(interacao)
+
+
+def simular(sessoes, interacoes, pausa, semente, locais, anos, raiz):
+    """
+    Abre as sessões em threads e executa as interações de cada uma.
+    Retorna as sessões (com os tempos medidos), a memória residente
+    depois de abrir a primeira sessão e depois de abrir todas, e a
+    duração total.
+    """
+    simuladas = [Sessao(locais, anos, raiz, random.Random(semente + numero)) for numero in range(sessoes)]
+    # A primeira sessão carrega os caches do processo, medida à parte
+    simuladas[0].executar("abrir_primeira")
+    memoria_base = memoria_residente()
+    abertas = threading.Barrier(sessoes)
+    memoria = {}
+
+    def rodar(sessao, primeira):
+        if not primeira:
+            sessao.executar("abrir")
+        # Todas as sessões abertas antes da medição de memória e das interações
+        if abertas.wait() == 0:
+            memoria["sessoes"] = memoria_residente()
+        abertas.wait()
+        for _ in range(interacoes):
+            time.sleep(sessao.sorteio.expovariate(1 / pausa) if pausa else 0)
+            try:
+                sessao.interagir()
+            except Exception as erro:
+                # Um widget ausente numa sessão não interrompe as demais
+                sessao.erros.append(f"{type(erro).__name__}: {erro}")
+
+    inicio = time.perf_counter()
+    threads = [
+        threading.Thread(target=rodar, args=(sessao, numero == 0), daemon=True)
+        for numero, sessao in enumerate(simuladas)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return simuladas, memoria_base, memoria["sessoes"], time.perf_counter() - inicio
+
+
+def eficiencia_caches(antes, depois):
+    """
+    Consultas, faltas e taxa de acerto de cada cache entre duas leituras
+    dos contadores.
+    """
+    caches = {}
+    for (nome, rotulos), valor in depois.items():
+        if nome not in ("cache_consultas_total", "cache_faltas_total"):
+            continue
+        cache = dict(rotulos)["cache"]
+        campo = "consultas" if nome == "cache_consultas_total" else "faltas"
+        caches.setdefault(cache, {"consultas": 0, "faltas": 0})[campo] = valor - antes.get((nome, rotulos), 0)
+    for valores in caches.values():
+        valores["acerto"] = round(1 - valores["faltas"] / valores["consultas"], 3) if valores["consultas"] else None
+    return dict(sorted(caches.items()))
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Simula várias sessões simultâneas do app e mede a carga.")
+    parser.add_argument("--sessoes", type=int, default=8, help="Sessões simultâneas")
+    parser.add_argument("--interacoes", type=int, default=30, help="Interações de cada sessão")
+    parser.add_argument("--pausa", type=float, default=0.5, help="Pausa média, em segundos, entre interações")
+    parser.add_argument("--semente", type=int, default=0, help="Semente do sorteio das interações")
+    parser.add_argument("--json", help="Grava o relatório neste arquivo JSON")
+    args = parser.parse_args(argumentos)
+
+    from docentes.cubos import consultar_municipios
+    from docentes.precalculo import carregar_cubos_do_processo, locais_do_nivel
+    from docentes.territorio import montar_hierarquia
+
+    hierarquia = montar_hierarquia(consultar_municipios(carregar_cubos_do_processo()["etapas"]))
+    locais = locais_do_nivel(hierarquia)
+
+    contadores_antes = METRICAS.instantaneo()[0]
+    sessoes, memoria_base, memoria_sessoes, duracao = simular(
+        args.sessoes, args.interacoes, args.pausa, args.semente, locais, hierarquia["anos"], hierarquia["raiz"]
+    )
+
+    tempos = {}
+    for sessao in sessoes:
+        for interacao, lista in sessao.tempos.items():
+            tempos.setdefault(interacao, []).extend(lista)
+    todas = [tempo for interacao, lista in tempos.items() if interacao != "abrir_primeira" for tempo in lista]
+    relatorio = {
+        "modo": "apptest_serializado",
+        "sessoes": args.sessoes,
+        "interacoes": args.interacoes,
+        "pausa_s": args.pausa,
+        "duracao_s": round(duracao, 1),
+        "reruns_por_s": round(len(todas) / duracao, 2),
+        "latencias": {"todas": percentis(todas), **{nome: percentis(lista) for nome, lista in sorted(tempos.items())}},
+        "memoria_mib": {
+            "apos_primeira_sessao": round(memoria_base / 2 ** 20, 1),
+            "apos_todas_as_sessoes": round(memoria_sessoes / 2 ** 20, 1),
+            "por_sessao": round((memoria_sessoes - memoria_base) / max(1, args.sessoes - 1) / 2 ** 20, 2),
+            "pico": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        },
+        "caches": eficiencia_caches(contadores_antes, METRICAS.instantaneo()[0]),
+        "erros": [erro for sessao in sessoes for erro in sessao.erros],
+    }
+
+    print("Aproximação serializada (AppTest, um rerun por vez); para dimensionar réplicas, use docentes.carga_servidor")
+    print(
+        f"{args.sessoes} sessões × {args.interacoes} interações em {relatorio['duracao_s']} s: "
+        f"{relatorio['reruns_por_s']} reruns/s, {len(relatorio['erros'])} erros"
+    )
+    print(f"{'interação':<18} {'reruns':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for nome, valores in relatorio["latencias"].items():
+        print(f"{nome:<18} {valores['reruns']:>7} {valores['p50_ms']:>9.1f} {valores['p95_ms']:>9.1f} {valores['p99_ms']:>9.1f}")
+    memoria = relatorio["memoria_mib"]
+    print(
+        f"memória (com os objetos do AppTest): {memoria['apos_primeira_sessao']} MiB com uma sessão, {memoria['apos_todas_as_sessoes']} MiB "
+        f"com todas ({memoria['por_sessao']} MiB por sessão), pico {memoria['pico']} MiB"
+    )
+    print(f"{'cache':<18} {'consultas':>9} {'faltas':>9} {'acerto':>8}")
+    for nome, valores in relatorio["caches"].items():
+        acerto = "-" if valores["acerto"] is None else f"{valores['acerto']:.1%}"
+        print(f"{nome:<18} {valores['consultas']:>9} {valores['faltas']:>9} {acerto:>8}")
+    for erro in relatorio["erros"][:10]:
+        print(f"erro: {erro}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+"""
+Teste de carga contra um servidor Streamlit de verdade: várias sessões
+simultâneas falando com o servidor pelo websocket, como navegadores.
+
+Uso:
+    python -m docentes.carga_servidor [--sessoes N] [--interacoes N] [--pausa S] [--semente N]
+                                      [--url URL] [--metricas ARQUIVO] [--json ARQUIVO]
+
+Sem --url, inicia `streamlit run streamlit_app.py` numa porta livre, com
+os dados e a configuração do ambiente (DOCENTES_PASTA_DADOS e as demais
+variáveis do app), e o encerra ao final. Com --url, usa um servidor já em
+execução (por exemplo, uma réplica igual à de produção).
+
+Cada sessão abre o websocket do Streamlit (/_stcore/stream) e pede os
+reruns com o mesmo protocolo do navegador: a cada interação reenvia o
+valor de todos os widgets que já alterou e espera o fim do script. Os
+widgets (ids, opções) são lidos das mensagens do próprio servidor, então
+as sessões seguem o app como ele é. As interações e os pesos são os de
+docentes.carga (PESOS_INTERACOES). As sessões rodam como tarefas asyncio
+de um só processo cliente, e os reruns delas se sobrepõem no servidor
+como os de usuários reais, então a vazão e as latências medidas servem
+para dimensionar as réplicas.
+
+O relatório traz:
+
+- a vazão (reruns por segundo) e as latências p50/p95/p99 de cada tipo
+  de interação, medidas do envio do pedido até o fim do script;
+- a memória residente do servidor com uma sessão e com todas, o
+  acréscimo médio por sessão e o pico (só quando o servidor é iniciado
+  aqui, já que ela é lida em /proc);
+- as consultas, faltas e a taxa de acerto de cada cache, lidas no arquivo
+  de métricas do servidor (DOCENTES_METRICAS_ARQUIVO, ver
+  docentes.metricas), que inclui a abertura da primeira sessão. O
+  servidor só regrava o arquivo num rerun e no máximo a cada
+  INTERVALO_ARQUIVO segundos, então ao final o teste espera esse
+  intervalo e faz mais um rerun antes de lê-lo.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from docentes.carga import CHANCE_VISAO_PADRAO, LOCAIS_COMPARADOS, PESOS_INTERACOES, SELETORES, eficiencia_caches, percentis
+from docentes.dados import PASTA_PROJETO
+from docentes.metricas import INTERVALO_ARQUIVO
+from docentes.temas import TEMAS
+
+# Tempo máximo, em segundos, de espera pelo início do servidor e por um rerun
+ESPERA_SERVIDOR = 120
+ESPERA_RERUN = 300
+
+# Tipo do valor de cada widget no protocolo (WidgetState)
+TIPOS_VALOR = {
+    "selectbox": "string_value",
+    "radio": "string_value",
+    "text_input": "string_value",
+    "checkbox": "bool_value",
+    "multiselect": "string_array_value",
+    "tab_container": "string_value",
+    "expandable": "bool_value",
+}
+# Séries do arquivo de métricas lidas para a eficiência dos caches
+SERIES_CACHES = ("cache_consultas_total", "cache_faltas_total")
+
+
+def chave_do_widget(identificador):
+    """
+    Chave (key=) de um widget a partir do id enviado pelo servidor
+    ("$$ID-<hash>-<chave>"), ou None se ele não tiver chave.
+    """
+    chave = identificador.split("-", 2)[-1]
+    return None if chave == "None" else chave
+
+
+class SessaoServidor:
+    """
+    Uma sessão no servidor: o websocket, os widgets vistos no último rerun
+    (por chave: id, tipo e opções) e os valores que a sessão já alterou,
+    reenviados a cada rerun como faz o navegador.
+    """
+
+    def __init__(self, url, sorteio):
+        self.url = url.rstrip("/").replace("http", "ws", 1) + "/_stcore/stream"
+        self.sorteio = sorteio
+        self.conexao = None
+        self.widgets = {}
+        self.valores = {}
+        self.tempos = {}
+        self.erros = []
+
+    async def abrir(self):
+        import websockets
+
+        self.conexao = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+        await self.executar("abrir")
+
+    async def fechar(self):
+        if self.conexao is not None:
+            await self.conexao.close()
+
+    def registrar_widget(self, mensagem):
+        """
+        Guarda o id, o tipo e as opções do widget (ou das abas e expanders
+        com chave) de um delta.
+        """
+        delta = mensagem.delta
+        if delta.WhichOneof("type") == "new_element":
+            tipo = delta.new_element.WhichOneof("type")
+            elemento = getattr(delta.new_element, tipo)
+            if tipo == "exception":
+                self.erros.append(f"{elemento.type}: {elemento.message}")
+                return
+            if tipo == "checkbox":
+                opcoes = [True, False]
+            else:
+                opcoes = list(getattr(elemento, "options", []))
+        elif delta.WhichOneof("type") == "add_block":
+            # Nas abas e nos expanders, o id fica no próprio bloco
+            tipo = delta.add_block.WhichOneof("type")
+            elemento = delta.add_block
+            opcoes = []
+        else:
+            return
+        if tipo not in TIPOS_VALOR or not getattr(elemento, "id", ""):
+            return
+        chave = chave_do_widget(elemento.id)
+        if chave is not None:
+            self.widgets[chave] = {"id": elemento.id, "tipo": tipo, "opcoes": opcoes}
+
+    async def executar(self, interacao):
+        """
+        Pede um rerun com os valores alterados pela sessão e espera o fim
+        do script, medindo-o desde o pedido.
+        """
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        pedido = BackMsg()
+        pedido.rerun_script.query_string = ""
+        pedido.rerun_script.page_script_hash = ""
+        for chave, valor in self.valores.items():
+            if chave not in self.widgets:
+                continue
+            estado = pedido.rerun_script.widget_states.widgets.add()
+            estado.id = self.widgets[chave]["id"]
+            tipo_valor = TIPOS_VALOR[self.widgets[chave]["tipo"]]
+            if tipo_valor == "string_array_value":
+                estado.string_array_value.data.extend(valor)
+            else:
+                setattr(estado, tipo_valor, valor)
+
+        inicio = time.perf_counter()
+        await self.conexao.send(pedido.SerializeToString())
+        self.widgets = {}
+        while True:
+            mensagem = ForwardMsg()
+            mensagem.ParseFromString(await asyncio.wait_for(self.conexao.recv(), ESPERA_RERUN))
+            tipo = mensagem.WhichOneof("type")
+            if tipo == "delta":
+                self.registrar_widget(mensagem)
+            elif tipo == "script_finished":
+                if mensagem.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    break
+        self.tempos.setdefault(interacao, []).append(time.perf_counter() - inicio)
+
+    def escolher(self, chave):
+        """
+        Sorteia uma das opções atuais do widget.
+        """
+        return self.sorteio.choice(self.widgets[chave]["opcoes"])
+
+    def tema(self):
+        titulo = self.valores.get("aba_selecionada", TEMAS[next(iter(TEMAS))]["titulo"])
+        return next(nome for nome, tema in TEMAS.items() if tema["titulo"] == titulo)
+
+    def comparando(self):
+        return self.valores.get("modo_comparacao", False)
+
+    async def interagir(self):
+        """
+        Sorteia e aplica uma interação, e executa o rerun dela.
+        """
+        interacao = self.sorteio.choices(list(PESOS_INTERACOES), weights=list(PESOS_INTERACOES.values()))[0]
+        tema = self.tema()
+        if interacao == "ano":
+            self.valores["filtro_ano"] = self.escolher("filtro_ano")
+        elif interacao == "local":
+            if self.comparando():
+                self.valores["modo_comparacao"] = False
+                await self.executar("sair_comparacao")
+            padrao = self.sorteio.random() < CHANCE_VISAO_PADRAO
+            if "filtro_uf" in self.widgets:
+                # Trocar a UF muda as opções de município, como no navegador
+                uf = self.widgets["filtro_uf"]["opcoes"][0] if padrao else self.escolher("filtro_uf")
+                if uf != self.valores.get("filtro_uf", self.widgets["filtro_uf"]["opcoes"][0]):
+                    self.valores["filtro_uf"] = uf
+                    self.valores.pop("filtro_municipio", None)
+                    await self.executar("uf")
+            if "filtro_municipio" in self.widgets:
+                opcoes = self.widgets["filtro_municipio"]["opcoes"]
+                self.valores["filtro_municipio"] = opcoes[0] if padrao else self.sorteio.choice(opcoes)
+        elif interacao == "aba":
+            titulos = [TEMAS[nome]["titulo"] for nome in TEMAS if nome != tema]
+            self.valores["aba_selecionada"] = self.sorteio.choice(titulos)
+        elif interacao == "seletor":
+            chave = f"comparacao_{tema}" if self.comparando() else SELETORES[tema]
+            self.valores[chave] = self.escolher(chave)
+        elif interacao == "modo" and not self.comparando():
+            self.valores[f"modo_{tema}"] = self.escolher(f"modo_{tema}")
+        elif interacao == "tabela":
+            self.valores[f"tabela_{tema}"] = True
+        elif interacao == "comparar":
+            self.valores["modo_comparacao"] = True
+            await self.executar("comparar")
+            interacao = "comparar_locais"
+            opcoes = self.widgets["filtro_comparacao"]["opcoes"]
+            self.valores["filtro_comparacao"] = self.sorteio.sample(opcoes, self.sorteio.randint(*LOCAIS_COMPARADOS))
+        await self.executar(interacao)
+
+
+# --- SERVIDOR ---
+def porta_livre():
+    with socket.socket() as conexao:
+        conexao.bind(("localhost", 0))
+        return conexao.getsockname()[1]
+
+
+def iniciar_servidor(arquivo_metricas):
+    """
+    Inicia o app com `streamlit run` numa porta livre, gravando as métricas
+    no arquivo, e espera ele responder. Retorna o processo e a URL.
+    """
+    porta = porta_livre()
+    processo = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", str(PASTA_PROJETO / "streamlit_app.py"),
+            "--server.headless", "true", "--server.port", str(porta),
+        ],
+        cwd=PASTA_PROJETO,
+        env={**os.environ, "DOCENTES_METRICAS_ARQUIVO": str(arquivo_metricas)},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://localhost:{porta}"
+    limite = time.monotonic() + ESPERA_SERVIDOR
+    while True:
+        try:
+            with urllib.request.urlopen(f"{url}/_stcore/health", timeout=1):
+                return processo, url
+        except OSError:
+            if processo.poll() is not None or time.monotonic() > limite:
+                processo.kill()
+                raise RuntimeError("O servidor Streamlit não respondeu.")
+            time.sleep(0.2)
+
+
+def memoria_do_processo(pid):
+    """
+    Memória residente atual e pico de um processo, em bytes (Linux).
+    """
+    campos = {}
+    with open(f"/proc/{pid}/status") as arquivo:
+        for linha in arquivo:
+            nome, _, valor = linha.partition(":")
+            if nome in ("VmRSS", "VmHWM"):
+                campos[nome] = int(valor.split()[0]) * 1024
+    return campos["VmRSS"], campos["VmHWM"]
+
+
+def ler_contadores_caches(arquivo):
+    """
+    Lê os contadores dos caches no arquivo de métricas do servidor, no
+    formato de METRICAS.instantaneo()[0].
+    """
+    contadores = {}
+    try:
+        with open(arquivo, encoding="utf-8") as entrada:
+            linhas = entrada.read().splitlines()
+    except OSError:
+        return contadores
+    for linha in linhas:
+        for nome in SERIES_CACHES:
+            prefixo = f'docentes_{nome}{{cache="'
+            if linha.startswith(prefixo):
+                cache, _, valor = linha[len(prefixo):].partition('"} ')
+                contadores[(nome, (("cache", cache),))] = int(float(valor))
+    return contadores
+
+
+# --- SIMULAÇÃO ---
+async def simular(url, sessoes, interacoes, pausa, semente, pid):
+    """
+    Abre as sessões e executa as interações de cada uma, todas ao mesmo
+    tempo. Retorna as sessões (com os tempos medidos), a memória do
+    servidor com uma sessão e com todas (None sem o pid) e a duração.
+    """
+    simuladas = [SessaoServidor(url, random.Random(semente + numero)) for numero in range(sessoes)]
+    # A primeira sessão carrega os caches do processo, medida à parte
+    await simuladas[0].abrir()
+    simuladas[0].tempos["abrir_primeira"] = simuladas[0].tempos.pop("abrir")
+    memoria = {"base": memoria_do_processo(pid)[0] if pid else None}
+    await asyncio.gather(*(sessao.abrir() for sessao in simuladas[1:]))
+    memoria["sessoes"] = memoria_do_processo(pid)[0] if pid else None
+
+    async def rodar(sessao):
+        for _ in range(interacoes):
+            await asyncio.sleep(sessao.sorteio.expovariate(1 / pausa) if pausa else 0)
+            try:
+                await sessao.interagir()
+            except (KeyError, IndexError, ValueError) as erro:
+                # Um widget ausente numa sessão não interrompe as demais
+                sessao.erros.append(f"{type(erro).__name__}: {erro}")
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(rodar(sessao) for sessao in simuladas))
+    duracao = time.perf_counter() - inicio
+    return simuladas, memoria["base"], memoria["sessoes"], duracao
+
+
+async def forcar_gravacao_metricas(sessao):
+    """
+    Espera o intervalo mínimo entre gravações do arquivo de métricas e faz
+    um rerun, para que o servidor o regrave com os contadores atuais.
+    """
+    await asyncio.sleep(INTERVALO_ARQUIVO)
+    await sessao.executar("gravar_metricas")
+
+
+async def executar_teste(args, url, pid):
+    sessoes, memoria_base, memoria_sessoes, duracao = await simular(
+        url, args.sessoes, args.interacoes, args.pausa, args.semente, pid
+    )
+    if args.metricas:
+        await forcar_gravacao_metricas(sessoes[0])
+        sessoes[0].tempos.pop("gravar_metricas")
+    for sessao in sessoes:
+        await sessao.fechar()
+    return sessoes, memoria_base, memoria_sessoes, duracao
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Simula várias sessões simultâneas num servidor Streamlit e mede a carga.")
+    parser.add_argument("--sessoes", type=int, default=8, help="Sessões simultâneas")
+    parser.add_argument("--interacoes", type=int, default=30, help="Interações de cada sessão")
+    parser.add_argument("--pausa", type=float, default=0.5, help="Pausa média, em segundos, entre interações")
+    parser.add_argument("--semente", type=int, default=0, help="Semente do sorteio das interações")
+    parser.add_argument("--url", help="URL de um servidor já em execução (por padrão, inicia um)")
+    parser.add_argument("--metricas", help="Arquivo de métricas do servidor (DOCENTES_METRICAS_ARQUIVO), com --url")
+    parser.add_argument("--json", help="Grava o relatório neste arquivo JSON")
+    args = parser.parse_args(argumentos)
+
+    processo = None
+    if args.url is None:
+        args.metricas = os.path.join(tempfile.mkdtemp(prefix="docentes_carga_"), "metricas.prom")
+        processo, url = iniciar_servidor(args.metricas)
+    else:
+        url = args.url
+    try:
+        sessoes, memoria_base, memoria_sessoes, duracao = asyncio.run(
+            executar_teste(args, url, processo.pid if processo else None)
+        )
+        pico = memoria_do_processo(processo.pid)[1] if processo else None
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait()
+
+    tempos = {}
+    for sessao in sessoes:
+        for interacao, lista in sessao.tempos.items():
+            tempos.setdefault(interacao, []).extend(lista)
+    todas = [tempo for interacao, lista in tempos.items() if interacao not in ("abrir_primeira", "abrir") for tempo in lista]
+    relatorio = {
+        "modo": "servidor",
+        "url": url,
+        "sessoes": args.sessoes,
+        "interacoes": args.interacoes,
+        "pausa_s": args.pausa,
+        "duracao_s": round(duracao, 1),
+        "reruns_por_s": round(len(todas) / duracao, 2),
+        "latencias": {"todas": percentis(todas), **{nome: percentis(lista) for nome, lista in sorted(tempos.items())}},
+        "memoria_mib": None if processo is None else {
+            "apos_primeira_sessao": round(memoria_base / 2 ** 20, 1),
+            "apos_todas_as_sessoes": round(memoria_sessoes / 2 ** 20, 1),
+            "por_sessao": round((memoria_sessoes - memoria_base) / max(1, args.sessoes - 1) / 2 ** 20, 2),
+            "pico": round(pico / 2 ** 20, 1),
+        },
+        "caches": eficiencia_caches({}, ler_contadores_caches(args.metricas)) if args.metricas else {},
+        "erros": [erro for sessao in sessoes for erro in sessao.erros],
+    }
+
+    print(
+        f"{args.sessoes} sessões × {args.interacoes} interações em {relatorio['duracao_s']} s contra {url}: "
+        f"{relatorio['reruns_por_s']} reruns/s, {len(relatorio['erros'])} erros"
+    )
+    print(f"{'interação':<18} {'reruns':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for nome, valores in relatorio["latencias"].items():
+        print(f"{nome:<18} {valores['reruns']:>7} {valores['p50_ms']:>9.1f} {valores['p95_ms']:>9.1f} {valores['p99_ms']:>9.1f}")
+    memoria = relatorio["memoria_mib"]
+    if memoria is not None:
+        print(
+            f"memória do servidor: {memoria['apos_primeira_sessao']} MiB com uma sessão, "
+            f"{memoria['apos_todas_as_sessoes']} MiB com todas ({memoria['por_sessao']} MiB por sessão), "
+            f"pico {memoria['pico']} MiB"
+        )
+    print(f"{'cache':<18} {'consultas':>9} {'faltas':>9} {'acerto':>8}")
+    for nome, valores in relatorio["caches"].items():
+        acerto = "-" if valores["acerto"] is None else f"{valores['acerto']:.1%}"
+        print(f"{nome:<18} {valores['consultas']:>9} {valores['faltas']:>9} {acerto:>8}")
+    for erro in relatorio["erros"][:10]:
+        print(f"erro: {erro}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Cubos pré-agregados por tema.
+
+Um cubo guarda, numa única tabela, as quantidades de cada local da
+hierarquia (Brasil, UFs e municípios, identificados pelo código, ver
+docentes.territorio) por ano e pela dimensão secundária do tema. Os
+totais das UFs e do Brasil são somados uma única vez, na construção do
+cubo. As linhas ficam ordenadas de forma que cada local, e cada par
+(local, ano), ocupe um trecho contíguo; as posições desses trechos são
+guardadas num dicionário, o que torna cada consulta uma simples busca.
+
+As tabelas dos cubos também podem ser gravadas na base colunar, de modo
+que os processos apenas as mapeiam em memória e refazem o índice, ou num
+banco embutido (ver docentes.banco). Um cubo do banco tem a chave "banco"
+no lugar da tabela e das posições, e as funções de consulta abaixo repassam
+a ele a mesma consulta, que devolve as mesmas linhas.
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from docentes.dados import PASTA_BASE, ler_arrow, ler_manifesto
+from docentes.indicadores import acrescentar_modos
+from docentes.temas import TEMAS
+from docentes.territorio import CODIGO_BRASIL, NOME_BRASIL, nivel_do_local, nome_uf, uf_do_municipio
+
+# Formato das tabelas agregadas, registrado no manifesto da base colunar.
+# Deve ser incrementado sempre que agregar_tema mudar as colunas geradas,
+# para que cubos gravados por versões anteriores não sejam reaproveitados.
+FORMATO_CUBOS = 2
+
+
+def agregar_tema(df, tema):
+    """
+    Agrega o DataFrame de um tema por município, ano e dimensão e acrescenta
+    os totais de cada UF e do Brasil, já na ordem usada pelo índice do cubo.
+    A tabela resultante tem as colunas 'Código' e 'Local' no lugar das
+    colunas do município.
+    """
+    colunas = TEMAS[tema]["colunas"]
+    dimensao = TEMAS[tema]["dimensao"]
+    chaves = ["Ano"] if dimensao is None else ["Ano", dimensao]
+
+    # As somas das UFs e do Brasil não cabem nos inteiros estreitos da base
+    df = df.astype(dict.fromkeys(colunas + ["Código do Município"], "int64"))
+    df["UF"] = uf_do_municipio(df["Código do Município"])
+
+    # Somas por município, por UF e do Brasil (sort=False mantém a ordem
+    # em que as categorias da dimensão aparecem no arquivo)
+    por_municipio = (
+        df.groupby(["Código do Município", "Município"] + chaves, sort=False, observed=True)[colunas]
+        .sum()
+        .reset_index()
+        .rename(columns={"Código do Município": "Código", "Município": "Local"})
+    )
+    por_uf = df.groupby(["UF"] + chaves, sort=False, observed=True)[colunas].sum().reset_index()
+    por_uf.insert(1, "Local", por_uf["UF"].map(nome_uf))
+    por_uf = por_uf.rename(columns={"UF": "Código"})
+    brasil = df.groupby(chaves, sort=False, observed=True)[colunas].sum().reset_index()
+    brasil.insert(0, "Código", CODIGO_BRASIL)
+    brasil.insert(1, "Local", NOME_BRASIL)
+
+    # Ordenação estável: agrupa os trechos sem embaralhar a dimensão
+    tabela = pd.concat([brasil, por_uf, por_municipio], ignore_index=True)
+    tabela["Código"] = tabela["Código"].astype("int32")
+    tabela["Local"] = tabela["Local"].astype(str)
+    return tabela.sort_values(["Código", "Ano"], kind="stable", ignore_index=True)
+
+
+def juntar_tabelas_agregadas(partes):
+    """
+    Junta tabelas agregadas de partições com anos distintos, restaurando a
+    ordem por código e ano. Como cada linha do cubo depende só dos dados
+    do seu ano, as quantidades são as mesmas de agregar as partições juntas.
+    """
+    tabela = pd.concat(partes, ignore_index=True)
+    tabela["Local"] = tabela["Local"].astype(str)
+    return tabela.sort_values(["Código", "Ano"], kind="stable", ignore_index=True)
+
+
+def trechos(chaves):
+    """
+    Recebe um array de chaves já ordenado e retorna os arrays de início e
+    fim de cada trecho de valores iguais. As chaves são não negativas, então
+    o -1 acrescentado no começo garante que a primeira linha abre um trecho.
+    """
+    inicios = np.flatnonzero(np.diff(chaves, prepend=-1) != 0)
+    fins = np.append(inicios[1:], len(chaves))
+    return inicios, fins
+
+
+def indexar_cubo(tabela, dimensao=None):
+    """
+    Monta o cubo a partir de uma tabela agregada, guardando as posições
+    (início, fim) de cada local e de cada (local, ano). Como a tabela está
+    ordenada por código e ano, os trechos são achados comparando cada linha
+    com a anterior, sem agrupar a tabela. Guarda também o código de cada
+    linha (para buscar faixas de códigos) e, com `dimensao`, os valores da
+    dimensão presentes em cada local, na ordem em que aparecem.
+    """
+    codigos = tabela["Código"].to_numpy(dtype="int64")
+    anos = tabela["Ano"].to_numpy(dtype="int64")
+
+    inicios, fins = trechos(codigos)
+    posicoes = dict(zip(codigos[inicios].tolist(), zip(inicios.tolist(), fins.tolist())))
+    # Chave combinada (código, ano): muda sempre que um dos dois muda
+    inicios, fins = trechos(codigos * 10000 + anos)
+    chaves = zip(codigos[inicios].tolist(), anos[inicios].tolist())
+    posicoes.update(zip(chaves, zip(inicios.tolist(), fins.tolist())))
+
+    cubo = {"tabela": tabela, "posicoes": posicoes, "codigos": codigos}
+    if dimensao is not None:
+        # drop_duplicates mantém a primeira ocorrência e a ordem por código
+        distintos = tabela[["Código", dimensao]].drop_duplicates()
+        codigos = distintos["Código"].to_numpy(dtype="int64")
+        valores = distintos[dimensao].astype(str).tolist()
+        inicios, fins = trechos(codigos)
+        cubo["valores_dimensao"] = {
+            codigo: valores[inicio:fim]
+            for codigo, inicio, fim in zip(codigos[inicios].tolist(), inicios.tolist(), fins.tolist())
+        }
+    return cubo
+
+
+def construir_cubo(df, tema):
+    """
+    Agrega o DataFrame de um tema, indexa os trechos de cada local e ano e
+    calcula os indicadores derivados (docentes.indicadores).
+    """
+    return acrescentar_modos(indexar_cubo(agregar_tema(df, tema), TEMAS[tema]["dimensao"]), tema)
+
+
+def montar_cubos(tabelas, pasta_base=PASTA_BASE, compartilhada=False):
+    """
+    Retorna o cubo de cada tema. Se a base colunar trouxer as tabelas
+    agregadas no formato atual, elas são mapeadas em memória e apenas
+    indexadas; senão, os cubos são construídos a partir dos DataFrames em
+    `tabelas`.
+    """
+    manifesto = ler_manifesto(pasta_base)
+    if manifesto is None or manifesto.get("formato_cubos") != FORMATO_CUBOS:
+        return {nome: construir_cubo(tabelas[nome], nome) for nome in TEMAS}
+
+    return {
+        nome: acrescentar_modos(
+            indexar_cubo(
+                ler_arrow(Path(pasta_base) / manifesto["cubos"][nome]["arquivo"], compartilhada),
+                TEMAS[nome]["dimensao"]
+            ),
+            nome
+        )
+        for nome in TEMAS
+    }
+
+
+def consultar_cubo(cubo, local, ano=None):
+    """
+    Retorna as linhas do cubo para o local (código do município, da UF ou
+    CODIGO_BRASIL) no ano informado; sem ano, retorna a série de todos os
+    anos.
+    """
+    if "banco" in cubo:
+        return cubo["banco"].consultar(cubo, local, ano)
+    chave = local if ano is None else (local, ano)
+    inicio, fim = cubo["posicoes"].get(chave, (0, 0))
+    return cubo["tabela"].iloc[inicio:fim]
+
+
+def consultar_subdivisoes(cubo, local, ano=None):
+    """
+    Retorna as linhas do cubo das subdivisões do local: as UFs, para o
+    Brasil, e os municípios, para uma UF. Um município não tem subdivisões
+    e retorna as próprias linhas. Como a tabela está ordenada por código,
+    as subdivisões ocupam um único trecho, achado por busca binária.
+    """
+    if nivel_do_local(local) == "Município":
+        return consultar_cubo(cubo, local, ano)
+    if local == CODIGO_BRASIL:
+        faixa = (CODIGO_BRASIL + 1, 100)
+    else:
+        faixa = (local * 100000, (local + 1) * 100000)
+    if "banco" in cubo:
+        return cubo["banco"].consultar_faixa(cubo, *faixa, ano)
+    inicio, fim = np.searchsorted(cubo["codigos"], faixa)
+    trecho = cubo["tabela"].iloc[inicio:fim]
+    if ano is not None:
+        trecho = trecho[trecho["Ano"].to_numpy() == ano]
+    return trecho
+
+
+def consultar_locais(cubo, locais, ano=None):
+    """
+    Retorna, numa única seleção, as linhas do cubo de vários locais no ano
+    informado (ou em todos os anos), na ordem dos locais.
+    """
+    if "banco" in cubo:
+        return cubo["banco"].consultar_locais(cubo, locais, ano)
+    trechos_locais = [cubo["posicoes"].get(local if ano is None else (local, ano), (0, 0)) for local in locais]
+    indices = np.concatenate([np.arange(inicio, fim) for inicio, fim in trechos_locais] + [np.arange(0)])
+    return cubo["tabela"].iloc[indices]
+
+
+def consultar_tudo(cubo, ano=None):
+    """
+    Retorna todas as linhas do cubo (de todos os locais) no ano informado,
+    ou em todos os anos.
+    """
+    if "banco" in cubo:
+        return cubo["banco"].consultar_tudo(cubo, ano)
+    tabela = cubo["tabela"]
+    if ano is not None:
+        tabela = tabela[tabela["Ano"].to_numpy() == ano]
+    return tabela
+
+
+def percorrer_cubo(cubo, tamanho):
+    """
+    Percorre todas as linhas do cubo em blocos de até `tamanho` linhas. Um
+    cubo vazio produz um único bloco vazio.
+    """
+    if "banco" in cubo:
+        yield from cubo["banco"].percorrer(cubo, tamanho)
+        return
+    tabela = cubo["tabela"]
+    for inicio in range(0, max(len(tabela), 1), tamanho):
+        yield tabela.iloc[inicio:inicio + tamanho]
+
+
+def consultar_municipios(cubo):
+    """
+    Retorna os municípios do cubo, uma linha por município e ano, com as
+    colunas 'Código do Município', 'Município' e 'Ano' das tabelas dos
+    temas (para montar a hierarquia dos filtros, ver
+    docentes.territorio.montar_hierarquia).
+    """
+    if "banco" in cubo:
+        return cubo["banco"].consultar_municipios(cubo)
+    tabela = cubo["tabela"]
+    municipios = tabela[cubo["codigos"] >= 100][["Código", "Local", "Ano"]].drop_duplicates()
+    return municipios.rename(columns={"Código": "Código do Município", "Local": "Município"})
@@ -0,0 +1,263 @@
+"""
+Leitura dos dados dos cinco temas.
+
+Os dados podem vir dos CSVs das Sinopses do INEP (separados por ';') ou da
+base colunar gerada por `python -m docentes.base_colunar`, que é lida por
+mapeamento de memória e dispensa a leitura dos CSVs a cada processo.
+Nos dois casos as tabelas saem com o mesmo formato: nomes de municípios
+sem espaços sobrando, colunas de texto categóricas e inteiros estreitos.
+
+Os dados de cada tema podem estar divididos em partições: além do CSV
+principal (ex.: docentes_etapas.csv), cada ano novo pode chegar num
+arquivo próprio com as mesmas colunas (ex.: docentes_etapas_2025.csv).
+Um mesmo ano não pode aparecer em mais de uma partição.
+
+Com a variável de ambiente DOCENTES_MEMORIA_COMPARTILHADA=1, a base
+colunar é lida com tipos Arrow: as colunas apontam diretamente para as
+páginas do arquivo mapeado, que o sistema operacional compartilha entre
+todos os processos do servidor, em vez de cada processo ter sua cópia.
+
+O pandas e o pyarrow só são importados ao ler as tabelas: identificar a
+versão dos dados não depende deles, e o app desenha a barra lateral antes
+de importá-los (ver docentes.inicio).
+"""
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+from docentes.temas import TEMAS
+
+# Pasta onde ficam os CSVs (por padrão, a raiz do projeto) e a base colunar.
+# DOCENTES_PASTA_DADOS aponta a aplicação para outro conjunto de dados.
+PASTA_PROJETO = Path(__file__).resolve().parent.parent
+PASTA_DADOS = Path(os.environ.get("DOCENTES_PASTA_DADOS", PASTA_PROJETO))
+PASTA_BASE = PASTA_DADOS / "base_colunar"
+ARQUIVO_MANIFESTO = "manifesto.json"
+
+# Pasta servida pelo Streamlit como arquivos estáticos (server.enableStaticServing),
+# com os arquivos gerados (malhas, exportações), e a rota dela no servidor
+PASTA_ESTATICA = PASTA_PROJETO / "static"
+ROTA_ESTATICA = "app/static"
+
+# Lê a base colunar sem cópia, compartilhando as páginas entre processos
+MEMORIA_COMPARTILHADA = os.environ.get("DOCENTES_MEMORIA_COMPARTILHADA", "0") == "1"
+
+# Colunas de texto que viram categorias (a dimensão de cada tema também)
+COLUNAS_CATEGORICAS = ["Município"]
+
+
+def url_estatica(caminho):
+    """
+    URL absoluta de um arquivo de PASTA_ESTATICA (caminho relativo a ela),
+    com o prefixo de server.baseUrlPath, para funcionar atrás de um proxy
+    que sirva o app num subcaminho.
+    """
+    from streamlit import config
+
+    base = config.get_option("server.baseUrlPath").strip("/")
+    partes = [base, ROTA_ESTATICA, Path(caminho).as_posix()]
+    return "/" + "/".join(parte for parte in partes if parte)
+
+
+def ler_csv(caminho):
+    """
+    Lê um CSV do INEP usando ';' como separador e remove os espaços
+    sobrando dos nomes das colunas (ex.: 'EM Propedêutico ').
+    """
+    import pandas as pd
+
+    df = pd.read_csv(caminho, delimiter=';')
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def preparar_tabela(df, tema):
+    """
+    Padroniza o DataFrame de um tema: remove espaços dos nomes dos
+    municípios, transforma as colunas de texto em categorias e reduz os
+    inteiros ao menor tipo que comporta os valores.
+    """
+    import pandas as pd
+
+    df = df.copy()
+    dimensao = TEMAS[tema]["dimensao"]
+    for coluna in COLUNAS_CATEGORICAS + ([dimensao] if dimensao else []):
+        df[coluna] = df[coluna].astype(str).str.strip().astype("category")
+    df["Ano"] = df["Ano"].astype("int16")
+    df["Código do Município"] = df["Código do Município"].astype("int32")
+    for coluna in TEMAS[tema]["colunas"]:
+        df[coluna] = pd.to_numeric(df[coluna], downcast="integer")
+    return df
+
+
+def arquivos_do_tema(pasta, nome):
+    """
+    Retorna os CSVs (partições) de um tema: o arquivo principal, se
+    existir, seguido dos arquivos de anos avulsos em ordem de nome.
+    """
+    principal = Path(pasta) / TEMAS[nome]["arquivo"]
+    avulsos = sorted(Path(pasta).glob(f"{principal.stem}_*.csv"))
+    if not avulsos:
+        # Sem partições, o arquivo principal é obrigatório (e sua ausência
+        # gera o FileNotFoundError de sempre)
+        return [principal]
+    return ([principal] if principal.exists() else []) + avulsos
+
+
+def verificar_anos(particoes, nome):
+    """
+    Garante que nenhum ano aparece em mais de uma partição do tema.
+    `particoes` é uma lista de pares (origem, anos da partição).
+    """
+    vistos = {}
+    for origem, anos in particoes:
+        for ano in anos:
+            if int(ano) in vistos:
+                raise ValueError(
+                    f"O ano {ano} do tema '{nome}' aparece em {vistos[int(ano)]} e em {origem}"
+                )
+            vistos[int(ano)] = origem
+
+
+def carregar_csvs(pasta=PASTA_DADOS):
+    """
+    Carrega e padroniza os CSVs dos 5 temas (com todas as partições),
+    retornando um dicionário de DataFrames indexado pelo nome do tema.
+    """
+    import pandas as pd
+
+    tabelas = {}
+    for nome in TEMAS:
+        particoes = [(caminho.name, ler_csv(caminho)) for caminho in arquivos_do_tema(pasta, nome)]
+        verificar_anos([(origem, df["Ano"].unique()) for origem, df in particoes], nome)
+        tabelas[nome] = preparar_tabela(pd.concat([df for _, df in particoes], ignore_index=True), nome)
+    return tabelas
+
+
+def ler_manifesto(pasta=PASTA_BASE):
+    """
+    Lê o manifesto da base colunar, ou retorna None se a base não existir.
+    """
+    caminho = Path(pasta) / ARQUIVO_MANIFESTO
+    if not caminho.exists():
+        return None
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def ler_arrow(caminho, compartilhada=False):
+    """
+    Lê um arquivo Arrow IPC/Feather sem compressão por mapeamento de
+    memória. Com `compartilhada`, o DataFrame usa tipos Arrow e não copia
+    nenhuma coluna; senão, só as colunas numéricas sem nulos escapam da
+    cópia e as categorias viram pd.Categorical.
+    """
+    import pandas as pd
+    import pyarrow.feather as feather
+
+    tabela = feather.read_table(caminho, memory_map=True)
+    if compartilhada:
+        return tabela.to_pandas(types_mapper=pd.ArrowDtype)
+    return tabela.to_pandas(split_blocks=True)
+
+
+def carregar_base(pasta=PASTA_BASE, compartilhada=False):
+    """
+    Carrega a base colunar, retornando um dicionário de DataFrames
+    indexado pelo nome do tema.
+    """
+    manifesto = ler_manifesto(pasta)
+    if manifesto is None:
+        raise FileNotFoundError(2, "Base colunar não encontrada", str(Path(pasta) / ARQUIVO_MANIFESTO))
+
+    return {
+        nome: ler_arrow(Path(pasta) / manifesto["temas"][nome]["arquivo"], compartilhada)
+        for nome in TEMAS
+    }
+
+
+def carregar_tabelas(pasta_base=PASTA_BASE, pasta_csv=PASTA_DADOS, compartilhada=False):
+    """
+    Carrega os DataFrames dos cinco temas, preferindo a base colunar e
+    recorrendo aos CSVs quando ela ainda não foi gerada.
+    """
+    if ler_manifesto(pasta_base) is not None:
+        return carregar_base(pasta_base, compartilhada)
+    return carregar_csvs(pasta_csv)
+
+
+def hash_arquivo(caminho):
+    """
+    Calcula o SHA-256 do conteúdo de um arquivo.
+    """
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(1 << 20), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def versao_dos_dados(pasta_base=PASTA_BASE, pasta_csv=PASTA_DADOS):
+    """
+    Identifica a versão dos dados: o hash registrado no manifesto da base
+    colunar ou, sem ela, a data de modificação e o tamanho de cada CSV
+    (de todas as partições). Serve de chave para os caches: quando os
+    dados mudam, a versão muda.
+    """
+    manifesto = ler_manifesto(pasta_base)
+    if manifesto is not None:
+        return manifesto["versao"]
+
+    versao = []
+    for nome in TEMAS:
+        for caminho in arquivos_do_tema(pasta_csv, nome):
+            info = os.stat(caminho)
+            versao.append((caminho.name, info.st_mtime_ns, info.st_size))
+    return tuple(versao)
+
+
+def nome_da_versao(versao):
+    """
+    Retorna a versão dos dados (ver `versao_dos_dados`) como um texto que
+    pode ser usado em nomes de arquivos e pastas: o hash da base colunar,
+    ou um hash dos dados dos CSVs.
+    """
+    if isinstance(versao, str):
+        return versao
+    return hashlib.sha256(repr(versao).encode()).hexdigest()[:16]
+
+
+def pasta_da_versao(pasta, versao):
+    """
+    Cria em `pasta` a subpasta da versão dos dados e remove as das versões
+    mais antigas que a anterior. A da versão anterior fica: as sessões e
+    os processos que ainda estão nela (só passam à nova no próximo rerun)
+    continuam encontrando os seus arquivos. A anterior é a última subpasta
+    usada, pela data de modificação, atualizada a cada chamada.
+    """
+    pasta = Path(pasta)
+    atual = pasta / nome_da_versao(versao)
+    atual.mkdir(parents=True, exist_ok=True)
+    os.utime(atual)
+    antigas = sorted(
+        (outra for outra in pasta.iterdir() if outra.is_dir() and outra != atual),
+        key=lambda outra: outra.stat().st_mtime,
+        reverse=True
+    )
+    for antiga in antigas[1:]:
+        shutil.rmtree(antiga, ignore_errors=True)
+    return atual
+
+
+def versoes_dos_anos(pasta_base=PASTA_BASE):
+    """
+    Retorna, para cada ano, a impressão digital das partições que o contêm
+    (registrada no manifesto da base colunar), ou um dicionário vazio sem a
+    base. Anos com a mesma impressão em duas versões têm os mesmos dados.
+    """
+    manifesto = ler_manifesto(pasta_base)
+    if manifesto is None:
+        return {}
+    return {int(ano): versao for ano, versao in manifesto.get("versoes_anos", {}).items()}
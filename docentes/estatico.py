@@ -0,0 +1,277 @@
+"""
+Páginas estáticas pré-renderizadas das abas, servidas sem o Streamlit.
+
+Uso:
+    python -m docentes.estatico [--destino PASTA] [--processos N] [--ano ANO ...]
+                                [--nivel raiz|ufs|todos] [--url-app URL]
+
+Gera, com as mesmas funções de figuras do app (docentes.graficos), uma
+página HTML por tema, ano e local, com o gráfico de barras já embutido, e
+um arquivo JSON por tema e local com os gráficos de linhas de todas as
+opções do seletor (que não dependem do ano, então são compartilhados pelas
+páginas de todos os anos). A pasta gerada é um site estático, que pode ser
+publicado num servidor de arquivos ou CDN:
+
+    destino/
+        index.html                 redireciona para a visão padrão
+        plotly.min.js              o Plotly.js, baixado uma vez pelo navegador
+        locais.json                anos, temas e locais, para a navegação
+        manifesto.json             versão dos dados e contagens da geração
+        <tema>/<ano>/<local>.html  uma página por tema, ano e local
+        <tema>/linhas/<local>.json os gráficos de linhas do local
+
+Os locais são os mesmos dos filtros do app: o Brasil (quando os dados
+têm mais de uma UF), as UFs e os municípios, identificados pelo código
+IBGE. Com `--nivel`, só a visão padrão ("raiz") ou o Brasil e as UFs
+("ufs") são gerados. As páginas mostram os valores absolutos; os modos
+percentual e de variação anual, a comparação, as tabelas e os mapas
+continuam no app (`--url-app` acrescenta um link para ele).
+
+O trabalho é dividido entre processos: cada um carrega os cubos uma vez
+(ou os consulta no banco, com DOCENTES_BACKEND) e gera lotes de locais de
+um tema. Cada arquivo é gravado num temporário e então renomeado, então o
+servidor nunca entrega um arquivo pela metade. As páginas buscam os JSON
+com fetch, por isso precisam ser servidas por HTTP
+(`python -m http.server -d PASTA`, por exemplo), e não abertas do disco.
+"""
+import argparse
+import json
+import os
+import time
+from html import escape
+from pathlib import Path
+from string import Template
+
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+
+from docentes.cubos import consultar_municipios
+from docentes.dados import PASTA_PROJETO, nome_da_versao, versao_dos_dados
+from docentes.graficos import construir_figura, opcoes_seletor
+from docentes.precalculo import NIVEIS, carregar_cubos_do_processo, executar_lotes, locais_do_nivel
+from docentes.temas import TEMAS
+from docentes.territorio import montar_hierarquia, nivel_do_local, sigla_uf, uf_do_municipio
+
+PASTA_ESTATICO = PASTA_PROJETO / "site"
+# Locais de um mesmo tema gerados por tarefa de cada processo
+LOCAIS_POR_LOTE = 50
+
+# Avisos exibidos quando não há dados, os mesmos das abas
+AVISO_BARRAS = "Nenhum dado encontrado para a seleção atual."
+AVISO_LINHA = "Nenhum dado encontrado para a seleção."
+# Destaque da aba da página atual na navegação
+ATUAL = ' class="atual"'
+
+MODELO_PAGINA = Template("""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>DocentES | $titulo_tema · $nome_local · $ano</title>
+<script src="../../plotly.min.js"></script>
+<style>
+body { font-family: sans-serif; margin: 0 auto; max-width: 1100px; padding: 1rem; color: #31333f; }
+nav a { margin-right: 1rem; }
+nav a.atual { font-weight: bold; }
+.filtros { display: flex; gap: 1rem; margin: 1rem 0; }
+.bloco { border: 1px solid #ddd; border-radius: .5rem; padding: 1rem; margin-bottom: 1rem; }
+.aviso { background: #fffce7; padding: .75rem; border-radius: .5rem; }
+</style>
+</head>
+<body>
+<h1>👩🏽‍🏫 DocentES 👨🏻‍🏫</h1>
+<nav>$abas</nav>
+<div class="filtros">
+<label>Ano <select id="ano">$anos</select></label>
+<label>Local <select id="local"><option value="$local">$nome_local</option></select></label>
+$link_app
+</div>
+<h3>$titulo_tema · $nome_local · $ano</h3>
+<div class="bloco" id="barras"></div>
+<div class="bloco">
+<h5>Análise da Evolução Temporal</h5>
+<label>Selecione o item para ver a tendência: <select id="opcao"></select></label>
+<div id="linha"></div>
+</div>
+<script type="application/json" id="figura-barras">$figura_barras</script>
+<script>
+var tema = "$tema", ano = "$ano", local = "$local";
+function pagina(novoAno, novoLocal) { return "../" + novoAno + "/" + novoLocal + ".html"; }
+function exibir(id, figura, aviso) {
+  var div = document.getElementById(id);
+  if (figura === null) { div.innerHTML = '<p class="aviso">' + aviso + "</p>"; return; }
+  Plotly.newPlot(div, figura.data, figura.layout, {responsive: true});
+}
+exibir("barras", JSON.parse(document.getElementById("figura-barras").textContent), "$aviso_barras");
+document.getElementById("ano").onchange = function () { location.href = pagina(this.value, local); };
+fetch("../linhas/" + local + ".json").then(function (r) { return r.json(); }).then(function (linhas) {
+  var seletor = document.getElementById("opcao");
+  Object.keys(linhas).forEach(function (opcao) { seletor.add(new Option(opcao, opcao)); });
+  seletor.onchange = function () { exibir("linha", linhas[this.value], "$aviso_linha"); };
+  if (seletor.options.length) { seletor.onchange(); }
+  else { exibir("linha", null, "$aviso_linha"); }
+});
+fetch("../../locais.json").then(function (r) { return r.json(); }).then(function (indice) {
+  var seletor = document.getElementById("local");
+  seletor.options.length = 0;
+  indice.locais.forEach(function (item) { seletor.add(new Option(item[1], item[0], false, String(item[0]) === local)); });
+  seletor.onchange = function () { location.href = pagina(ano, this.value); };
+});
+</script>
+</body>
+</html>
+""")
+
+MODELO_INDICE = Template("""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<meta http-equiv="refresh" content="0; url=$pagina">
+<title>DocentES</title>
+</head>
+<body><a href="$pagina">DocentES</a></body>
+</html>
+""")
+
+
+# --- LOCAIS ---
+def rotulo_local(hierarquia, codigo):
+    """
+    Nome do local na navegação; municípios levam a sigla da UF quando os
+    dados têm mais de uma UF, como no app.
+    """
+    if nivel_do_local(codigo) == "Município" and len(hierarquia["ufs"]) > 1:
+        return f"{hierarquia['nomes'][codigo]} ({sigla_uf(uf_do_municipio(codigo))})"
+    return hierarquia["nomes"][codigo]
+
+
+# --- GERAÇÃO ---
+def gravar_texto(caminho, texto):
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    caminho_temporario = caminho.with_name(caminho.name + ".tmp")
+    caminho_temporario.write_text(texto, encoding="utf-8")
+    caminho_temporario.replace(caminho)
+
+
+def figura_json(figura):
+    """
+    Serializa a figura (ou None, quando não há dados) para embutir na
+    página ou num arquivo JSON.
+    """
+    return "null" if figura is None else pio.to_json(figura, validate=False)
+
+
+def pagina_html(tema, ano, local, nome_local, anos, figura_barras, url_app=None):
+    abas = "".join(
+        f'<a href="../../{outro}/{ano}/{local}.html"{ATUAL if outro == tema else ""}>{escape(dados["titulo"])}</a>'
+        for outro, dados in TEMAS.items()
+    )
+    opcoes_anos = "".join(
+        f'<option value="{outro}"{" selected" if outro == ano else ""}>{outro}</option>' for outro in anos
+    )
+    link_app = f'<a href="{escape(url_app)}">Explorar no app interativo</a>' if url_app else ""
+    return MODELO_PAGINA.substitute(
+        tema=tema,
+        ano=ano,
+        local=local,
+        nome_local=escape(nome_local),
+        titulo_tema=escape(TEMAS[tema]["titulo"]),
+        abas=abas,
+        anos=opcoes_anos,
+        link_app=link_app,
+        # Um "</" dentro do JSON fecharia a tag script
+        figura_barras=figura_json(figura_barras).replace("</", "<\\/"),
+        aviso_barras=AVISO_BARRAS,
+        aviso_linha=AVISO_LINHA,
+    )
+
+
+def gerar_lote(cubos, destino, tema, locais, nomes, anos, url_app=None):
+    """
+    Gera as páginas de todos os anos e o arquivo de gráficos de linhas de
+    cada local do lote, para um tema. Retorna quantas páginas e figuras
+    foram gravadas.
+    """
+    destino = Path(destino)
+    cubo = cubos[tema]
+    paginas = figuras = 0
+    for local in locais:
+        linhas = [
+            f"{json.dumps(opcao, ensure_ascii=False)}:{figura_json(construir_figura(cubo, tema, 'linha', None, local, opcao))}"
+            for opcao in opcoes_seletor(cubo, tema, local)
+        ]
+        gravar_texto(destino / tema / "linhas" / f"{local}.json", "{" + ",".join(linhas) + "}")
+        figuras += len(linhas)
+        for ano in anos:
+            figura = construir_figura(cubo, tema, "barras", ano, local)
+            pagina = pagina_html(tema, ano, local, nomes[local], anos, figura, url_app)
+            gravar_texto(destino / tema / str(ano) / f"{local}.html", pagina)
+            paginas += 1
+            figuras += 1
+    return paginas, figuras
+
+
+def gerar_site(destino=PASTA_ESTATICO, processos=None, anos=None, nivel="todos", url_app=None):
+    """
+    Gera o site estático em `destino`, dividindo os lotes de locais de cada
+    tema entre `processos` processos (ou gerando tudo neste processo, com
+    processos=1). Retorna o manifesto gravado.
+    """
+    inicio = time.perf_counter()
+    destino = Path(destino)
+    cubos = carregar_cubos_do_processo()
+    hierarquia = montar_hierarquia(consultar_municipios(cubos["etapas"]))
+    anos = sorted(set(anos or hierarquia["anos"]) & set(hierarquia["anos"]), reverse=True)
+    locais = locais_do_nivel(hierarquia, nivel)
+    nomes = {local: rotulo_local(hierarquia, local) for local in locais}
+
+    lotes = [
+        (destino, tema, locais[posicao:posicao + LOCAIS_POR_LOTE], nomes, anos, url_app)
+        for tema in TEMAS
+        for posicao in range(0, len(locais), LOCAIS_POR_LOTE)
+    ]
+    processos = processos or os.cpu_count() or 1
+    resultados = list(executar_lotes(gerar_lote, lotes, cubos, processos))
+
+    gravar_texto(destino / "plotly.min.js", get_plotlyjs())
+    indice = {
+        "anos": anos,
+        "temas": {tema: dados["titulo"] for tema, dados in TEMAS.items()},
+        "locais": [[local, nomes[local]] for local in locais],
+    }
+    gravar_texto(destino / "locais.json", json.dumps(indice, ensure_ascii=False))
+    pagina_padrao = f"{next(iter(TEMAS))}/{anos[0]}/{hierarquia['raiz']}.html"
+    gravar_texto(destino / "index.html", MODELO_INDICE.substitute(pagina=pagina_padrao))
+
+    manifesto = {
+        "versao": nome_da_versao(versao_dos_dados()),
+        "nivel": nivel,
+        "anos": anos,
+        "locais": len(locais),
+        "paginas": sum(paginas for paginas, _ in resultados),
+        "figuras": sum(figuras for _, figuras in resultados),
+        "processos": processos,
+        "segundos": round(time.perf_counter() - inicio, 1),
+    }
+    gravar_texto(destino / "manifesto.json", json.dumps(manifesto, indent=2))
+    return manifesto
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Gera as páginas estáticas de todas as abas, anos e locais.")
+    parser.add_argument("--destino", default=PASTA_ESTATICO, help="Pasta onde o site será gravado")
+    parser.add_argument("--processos", type=int, help="Processos de geração (padrão: um por CPU)")
+    parser.add_argument("--ano", type=int, action="append", help="Ano a gerar (pode ser repetido; padrão: todos)")
+    parser.add_argument("--nivel", choices=NIVEIS, default="todos", help="Até que nível de local gerar")
+    parser.add_argument("--url-app", help="Endereço do app interativo, para o link das páginas")
+    args = parser.parse_args(argumentos)
+
+    manifesto = gerar_site(args.destino, args.processos, args.ano, args.nivel, args.url_app)
+    print(
+        f"{manifesto['paginas']} páginas e {manifesto['figuras']} figuras de {manifesto['locais']} locais "
+        f"gravadas em {args.destino} ({manifesto['processos']} processos, {manifesto['segundos']} s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
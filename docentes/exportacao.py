@@ -0,0 +1,236 @@
+"""
+Exportação dos dados agregados em CSV, Parquet ou XLSX.
+
+Uso:
+    python -m docentes.exportacao --destino ARQUIVO.zip [--formato csv|parquet|xlsx] [--tema TEMA ...]
+
+Os arquivos são gerados em blocos de linhas (`blocos`), que cada formato
+grava à medida que recebe, sem montar o arquivo inteiro em memória. A
+exportação de uma aba traz as linhas do cubo do local selecionado e dos
+locais abaixo dele; a exportação completa traz, num ZIP com um arquivo
+por tema, todos os locais, anos e temas.
+
+Na aplicação, os arquivos ficam numa pasta por versão dos dados
+(`pasta_exportacoes`), nomeados pelo tema, filtros e formato, então cada
+combinação é gerada uma única vez e reaproveitada por todas as sessões e
+processos. A pasta fica em static/, e o navegador baixa os arquivos
+direto do servidor de arquivos estáticos do Streamlit, por um link (ver
+docentes.abas.link_exportacao): o conteúdo nunca passa pela memória do
+processo nem pelo websocket da sessão.
+"""
+import argparse
+import importlib.util
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from docentes.cubos import consultar_cubo, consultar_locais, consultar_subdivisoes, consultar_tudo, montar_cubos, percorrer_cubo
+from docentes.dados import PASTA_ESTATICA, carregar_tabelas, pasta_da_versao
+from docentes.temas import TEMAS
+from docentes.territorio import CODIGO_BRASIL, nivel_do_local
+
+# Pasta onde ficam os arquivos exportados pela aplicação, uma subpasta por
+# versão dos dados, entre os arquivos estáticos servidos pelo Streamlit
+PASTA_EXPORTACOES = PASTA_ESTATICA / "exportacoes"
+
+# Linhas por bloco gravado
+TAMANHO_BLOCO = 50000
+
+# Rótulo e compactação no ZIP da exportação completa de cada formato
+# (Parquet e XLSX já são compactados)
+FORMATOS = {
+    "csv": {"rotulo": "CSV", "compressao": zipfile.ZIP_DEFLATED},
+    "parquet": {"rotulo": "Parquet", "compressao": zipfile.ZIP_STORED},
+    "xlsx": {"rotulo": "Excel (XLSX)", "compressao": zipfile.ZIP_STORED},
+}
+
+
+def formatos_disponiveis():
+    """
+    Retorna os formatos que podem ser gerados no ambiente: o XLSX depende
+    do pacote openpyxl.
+    """
+    return [
+        formato for formato in FORMATOS
+        if formato != "xlsx" or importlib.util.find_spec("openpyxl") is not None
+    ]
+
+
+def blocos(df, tamanho=TAMANHO_BLOCO):
+    """
+    Percorre o DataFrame em blocos de até `tamanho` linhas (sem copiá-lo).
+    Um DataFrame vazio produz um único bloco vazio, para que o arquivo
+    ainda tenha o cabeçalho.
+    """
+    for inicio in range(0, max(len(df), 1), tamanho):
+        yield df.iloc[inicio:inicio + tamanho]
+
+
+# --- FORMATOS ---
+def escrever_csv(partes, arquivo):
+    """
+    Grava os blocos como CSV separado por ';', como os arquivos do INEP.
+    """
+    for numero, parte in enumerate(partes):
+        arquivo.write(parte.to_csv(sep=";", index=False, header=numero == 0).encode("utf-8"))
+
+
+def escrever_parquet(partes, arquivo):
+    """
+    Grava cada bloco como um row group do arquivo Parquet.
+    """
+    escritor = None
+    for parte in partes:
+        tabela = pa.Table.from_pandas(parte, preserve_index=False)
+        if escritor is None:
+            escritor = pq.ParquetWriter(arquivo, tabela.schema)
+        escritor.write_table(tabela)
+    escritor.close()
+
+
+def escrever_xlsx(partes, arquivo):
+    """
+    Grava os blocos numa planilha com o modo somente escrita do openpyxl,
+    que descarrega as linhas em disco à medida que são acrescentadas.
+    """
+    from openpyxl import Workbook
+
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet("dados")
+    for numero, parte in enumerate(partes):
+        if numero == 0:
+            planilha.append([str(coluna) for coluna in parte.columns])
+        for linha in parte.astype(object).itertuples(index=False):
+            planilha.append(list(linha))
+    livro.save(arquivo)
+
+
+ESCRITORES = {"csv": escrever_csv, "parquet": escrever_parquet, "xlsx": escrever_xlsx}
+
+
+# --- DADOS EXPORTADOS ---
+def linhas_exportacao(cubo, local, ano=None):
+    """
+    Retorna as linhas do cubo a exportar: as do local e, para o Brasil ou
+    uma UF, as de todos os locais abaixo dele; para uma tupla de códigos
+    (modo de comparação), as dos locais comparados. Sem ano, traz todos os
+    anos.
+    """
+    if isinstance(local, tuple):
+        return consultar_locais(cubo, local, ano)
+    if local == CODIGO_BRASIL:
+        return consultar_tudo(cubo, ano)
+    if nivel_do_local(local) == "UF":
+        tabela = pd.concat([consultar_cubo(cubo, local), consultar_subdivisoes(cubo, local)])
+    else:
+        tabela = consultar_cubo(cubo, local)
+    if ano is not None:
+        tabela = tabela[tabela["Ano"].to_numpy() == ano]
+    return tabela
+
+
+def nome_exportacao(tema, local, ano, formato):
+    """
+    Nome do arquivo exportado de uma aba, que também identifica a
+    combinação de filtros no cache em disco.
+    """
+    if isinstance(local, tuple):
+        local = "comparacao_" + "-".join(str(codigo) for codigo in local)
+    return f"docentes_{tema}_{local}_{'todos' if ano is None else ano}.{formato}"
+
+
+def nome_exportacao_completa(formato):
+    return f"docentes_completo_{formato}.zip"
+
+
+# --- ARQUIVOS ---
+def gravar_arquivo(caminho, gerar):
+    """
+    Grava o arquivo chamando `gerar(arquivo)` sobre um arquivo temporário
+    (único por chamada, já que duas sessões podem pedir a mesma exportação
+    ao mesmo tempo) e o renomeia ao final.
+    """
+    caminho = Path(caminho)
+    descritor, temporario = tempfile.mkstemp(dir=caminho.parent, prefix=caminho.name, suffix=".tmp")
+    try:
+        with os.fdopen(descritor, "wb") as arquivo:
+            gerar(arquivo)
+        Path(temporario).replace(caminho)
+    except BaseException:
+        Path(temporario).unlink(missing_ok=True)
+        raise
+    return caminho
+
+
+def exportar_completo(cubos, formato, arquivo, temas=None):
+    """
+    Grava num ZIP, aberto em `arquivo`, um arquivo por tema com todas as
+    linhas do seu cubo.
+    """
+    escrever = ESCRITORES[formato]
+    with zipfile.ZipFile(arquivo, "w", FORMATOS[formato]["compressao"]) as pacote:
+        for nome in TEMAS if temas is None else temas:
+            with pacote.open(f"docentes_{nome}.{formato}", "w", force_zip64=True) as membro:
+                escrever(percorrer_cubo(cubos[nome], TAMANHO_BLOCO), membro)
+
+
+def pasta_exportacoes(versao, pasta=PASTA_EXPORTACOES):
+    """
+    Cria a pasta dos arquivos exportados da versão dos dados e remove as
+    das versões mais antigas que a anterior (ver
+    docentes.dados.pasta_da_versao), cujos links ainda podem estar abertos.
+    """
+    return pasta_da_versao(pasta, versao)
+
+
+def arquivo_exportacao(pasta, cubo, tema, local, ano, formato):
+    """
+    Retorna o caminho do arquivo exportado de uma aba, gerando-o na pasta
+    da versão só se ainda não existir.
+    """
+    caminho = Path(pasta) / nome_exportacao(tema, local, ano, formato)
+    if not caminho.exists():
+        linhas = linhas_exportacao(cubo, local, ano)
+        gravar_arquivo(caminho, lambda arquivo: ESCRITORES[formato](blocos(linhas), arquivo))
+    return caminho
+
+
+def arquivo_exportacao_completa(pasta, cubos, formato):
+    """
+    Retorna o caminho do ZIP da exportação completa, gerando-o na pasta da
+    versão só se ainda não existir.
+    """
+    caminho = Path(pasta) / nome_exportacao_completa(formato)
+    if not caminho.exists():
+        gravar_arquivo(caminho, lambda arquivo: exportar_completo(cubos, formato, arquivo))
+    return caminho
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(
+        description="Exporta todos os locais, anos e temas num ZIP com um arquivo por tema."
+    )
+    parser.add_argument("--destino", required=True, help="Arquivo ZIP a ser gravado")
+    parser.add_argument("--formato", choices=list(FORMATOS), default="csv", help="Formato dos arquivos")
+    parser.add_argument(
+        "--tema", action="append", choices=list(TEMAS), help="Exporta só este tema (pode ser repetido)"
+    )
+    args = parser.parse_args(argumentos)
+
+    if args.formato not in formatos_disponiveis():
+        parser.error("o formato xlsx precisa do pacote openpyxl")
+
+    cubos = montar_cubos(carregar_tabelas())
+    destino = Path(args.destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    gravar_arquivo(destino, lambda arquivo: exportar_completo(cubos, args.formato, arquivo, args.tema))
+    print(f"Exportação gravada em {destino} ({destino.stat().st_size / 1024:.1f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
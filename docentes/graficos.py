@@ -0,0 +1,506 @@
+"""
+Construção das figuras Plotly de cada aba, sem depender do Streamlit.
+
+Cada tema tem um gráfico de barras (local e ano selecionados) e um
+gráfico de linhas (evolução temporal de um item escolhido no seletor da
+aba), além do mapa das subdivisões do local (ver docentes.mapas). No
+modo de comparação, os dois gráficos são montados para
+vários locais de uma vez. As funções retornam None quando não há dados
+para a seleção.
+
+Nos modos percentual e de variação anual (docentes.indicadores), as
+mesmas funções recebem o cubo derivado, e `ajustar_modo` troca os rótulos
+e o formato dos números da figura pronta.
+"""
+import importlib
+from collections import Counter
+
+import pandas as pd
+import plotly.graph_objects as go
+
+from docentes.cubos import consultar_cubo, consultar_locais, consultar_subdivisoes
+from docentes.indicadores import MODOS
+from docentes.mapas import url_malha
+from docentes.temas import TEMAS
+from docentes.territorio import CODIGO_BRASIL, NOME_BRASIL, nivel_do_local, nome_uf, sigla_uf, uf_do_municipio
+
+
+class _ImportacaoAdiada:
+    """
+    Módulo importado só no primeiro uso. O plotly.express custa várias
+    vezes o resto do Plotly para importar, e um processo que lê as figuras
+    pré-calculadas (docentes.precalculo) não precisa dele.
+    """
+
+    def __init__(self, nome):
+        self._nome = nome
+
+    def __getattr__(self, atributo):
+        return getattr(importlib.import_module(self._nome), atributo)
+
+
+px = _ImportacaoAdiada("plotly.express")
+
+
+# --- ETAPAS DE ENSINO ---
+def barras_etapas(cubo, ano, local):
+    # Buscando no cubo a linha já agregada do local (município, UF ou Brasil) no ano
+    df_filtrado = consultar_cubo(cubo, local, ano)
+    # TRANSFORMA a tabela larga em longa usando .melt()
+    dados_grafico = df_filtrado[TEMAS["etapas"]["colunas"]].melt(var_name='Etapa de Ensino', value_name='Quant. de Docentes')
+    if dados_grafico.empty:
+        return None
+
+    # Parametrizando o px.bar
+    fig = px.bar(
+                    dados_grafico,
+                    x='Etapa de Ensino',
+                    y='Quant. de Docentes',
+                    color='Etapa de Ensino',
+                    text_auto=True,
+                    title=f"Docentes por Etapa de Ensino em {df_filtrado['Local'].iloc[0]} ({ano})"
+                )
+    # Adicionando a formatação de números brasileiros
+    fig.update_layout(
+                        separators=',.',
+                        showlegend=False
+                    )
+    fig.update_yaxes(tickformat=",.0f")
+    return fig
+
+
+def linha_etapas(cubo, local, etapa):
+    # A série de todos os anos já vem agregada do cubo; só definimos o ano como índice
+    dados_temporais = consultar_cubo(cubo, local).set_index('Ano')[TEMAS["etapas"]["colunas"]]
+    # Selecionamos apenas a coluna (etapa) escolhida
+    dados_linha = dados_temporais[[etapa]] # Usar colchetes duplos mantém como DataFrame
+    if dados_linha.empty:
+        return None
+
+    # Criando a figura base com Plotly Express
+    fig_linha = px.line(
+                        dados_linha,
+                        markers=True, # Adiciona pontos sobre a linha para destacar os anos
+                        labels={'value': 'Quant. de Docentes', 'Ano': 'Ano'}
+                    )
+
+    # Formata os separadores para o padrão brasileiro
+    fig_linha.update_layout(separators=',.',showlegend=False)
+
+    # Formata o eixo Y (quantidade) para ter separador de milhar e sem decimais
+    fig_linha.update_yaxes(tickformat=",.0f")
+
+    # Formata o eixo X (ano) para mostrar apenas os números inteiros
+    # O 'd' em tickformat significa 'decimal integer'
+    fig_linha.update_xaxes(tickformat='d', tickvals=dados_temporais.index)
+    return fig_linha
+
+
+# --- FAIXA ETÁRIA E SEXO ---
+def barras_idade(cubo, ano, local):
+    # Linhas por Sexo, já agregadas no cubo
+    dados_base = consultar_cubo(cubo, local, ano)
+
+    # Transformação com .melt()
+    dados_grafico = dados_base.melt(
+        id_vars=['Sexo'],
+        value_vars=TEMAS["idade"]["colunas"],
+        var_name='Faixa Etária',
+        value_name='Quant. de Docentes'
+    )
+    if dados_grafico.empty:
+        return None
+
+    # Ordenação correta das categorias
+    ordem_faixa_etaria = ['Até 24 anos', 'De 25 a 29 anos', 'De 30 a 39 anos', 'De 40 a 49 anos', 'De 50 a 54 anos', 'De 55 a 59 anos', '60 anos ou mais']
+    dados_grafico['Faixa Etária'] = pd.Categorical(dados_grafico['Faixa Etária'], categories=ordem_faixa_etaria, ordered=True)
+
+    fig = px.bar(
+        dados_grafico,
+        x='Faixa Etária',
+        y='Quant. de Docentes',
+        color='Sexo',
+        barmode='group',
+        text_auto=True,
+        title=f"Docentes por Faixa Etária e Sexo em {dados_base['Local'].iloc[0]} ({ano})"
+    )
+    fig.update_layout(separators=',.')
+    fig.update_yaxes(tickformat=",.0f")
+    return fig
+
+
+def linha_idade(cubo, local, faixa_etaria):
+    # O .pivot() transforma 'Feminino' e 'Masculino' em colunas, com o Ano como índice
+    dados_base = consultar_cubo(cubo, local)
+    dados_para_plotar = dados_base.pivot(index='Ano', columns='Sexo', values=faixa_etaria)
+    if dados_para_plotar.empty:
+        return None
+
+    fig_linha = px.line(
+        dados_para_plotar,
+        markers=True,
+        labels={'value': f'Quant. de Docentes ({faixa_etaria})', 'Ano': 'Ano', 'variable': 'Sexo'}
+    )
+    fig_linha.update_layout(separators=',.')
+    fig_linha.update_yaxes(tickformat=",.0f")
+    fig_linha.update_xaxes(tickformat='d', tickvals=dados_para_plotar.index)
+    return fig_linha
+
+
+# --- NÍVEL DE FORMAÇÃO ---
+def barras_formacao(cubo, ano, local):
+    df_filtrado = consultar_cubo(cubo, local, ano)
+    dados_para_plotar = df_filtrado[TEMAS["formacao"]["colunas"]].melt(var_name='Formação Acadêmica', value_name='Quant. de Docentes')
+    if dados_para_plotar.empty:
+        return None
+
+    # Ordenação correta das categorias
+    ordem_formacao = ['Ensino Fundamental', 'Ensino Médio', 'Graduação - Licenciatura', 'Graduação - Sem Licenciatura', 'Especialização', 'Mestrado', 'Doutorado']
+    dados_para_plotar['Formação Acadêmica'] = pd.Categorical(dados_para_plotar['Formação Acadêmica'], categories=ordem_formacao, ordered=True)
+    dados_para_plotar = dados_para_plotar.sort_values('Formação Acadêmica')
+
+    fig = px.bar(
+        dados_para_plotar,
+        x='Quant. de Docentes',
+        y='Formação Acadêmica',
+        color='Formação Acadêmica',
+        orientation='h',
+        text_auto=True,
+        title=f"Docentes por Escolaridade ou Formação Acadêmica em {df_filtrado['Local'].iloc[0]} ({ano})"
+    )
+    fig.update_layout(separators=',.', showlegend=False)
+    fig.update_xaxes(tickformat=",.0f")
+    return fig
+
+
+def linha_formacao(cubo, local, formacao):
+    dados_temporais = consultar_cubo(cubo, local).set_index('Ano')[TEMAS["formacao"]["colunas"]]
+    dados_linha = dados_temporais[[formacao]]
+    if dados_linha.empty:
+        return None
+
+    fig_linha = px.line(dados_linha, markers=True, labels={'value': 'Quant. de Docentes', 'Ano': 'Ano'})
+    fig_linha.update_layout(separators=',.', showlegend=False)
+    fig_linha.update_yaxes(tickformat=",.0f")
+    fig_linha.update_xaxes(tickformat='d', tickvals=dados_temporais.index)
+    return fig_linha
+
+
+# --- VÍNCULO FUNCIONAL ---
+def barras_vinculo(cubo, ano, local):
+    dados_base = consultar_cubo(cubo, local, ano)
+
+    dados_para_plotar = dados_base.melt(
+        id_vars=['Vínculo Funcional'],
+        value_vars=TEMAS["vinculo"]["colunas"],
+        var_name='Dependência Administrativa',
+        value_name='Quant. de Docentes'
+    )
+    # Sem as combinações vazias (nos modos derivados, os valores podem ser negativos ou vazios)
+    dados_para_plotar = dados_para_plotar[dados_para_plotar['Quant. de Docentes'].fillna(0) != 0]
+    if dados_para_plotar.empty:
+        return None
+
+    fig = px.bar(
+        dados_para_plotar,
+        x='Quant. de Docentes',
+        y='Vínculo Funcional',
+        color='Dependência Administrativa',
+        facet_col='Dependência Administrativa',
+        facet_col_spacing=0.05, # Usando o parâmetro correto de espaçamento
+        orientation='h',
+        text_auto=True,
+        title=f"Docentes por Vínculo em {dados_base['Local'].iloc[0]} ({ano})"
+    )
+    fig.for_each_annotation(lambda a: a.update(text="")) # Remove títulos dos subplots
+    fig.update_layout(separators=',.')
+    fig.update_xaxes(tickformat=",.0f", title_text="Quantidade de Docentes")
+    return fig
+
+
+def linha_vinculo(cubo, local, vinculo):
+    # Filtramos a série pelo vínculo selecionado e definimos o Ano como
+    # índice (as dependências já vêm somadas do cubo)
+    dados_base = consultar_cubo(cubo, local)
+    dados_filtrados_vinculo = dados_base[dados_base['Vínculo Funcional'] == vinculo]
+    dados_para_plotar = dados_filtrados_vinculo.set_index('Ano')[TEMAS["vinculo"]["colunas"]]
+    if dados_para_plotar.empty:
+        return None
+
+    # O Plotly criará uma linha para cada coluna (Federal, Estadual, Municipal)
+    fig_linha = px.line(
+        dados_para_plotar,
+        markers=True,
+        labels={'value': f'Quant. de Docentes ({vinculo})', 'Ano': 'Ano', 'variable': 'Dependência'}
+    )
+    fig_linha.update_layout(separators=',.')
+    fig_linha.update_yaxes(tickformat=",.0f")
+    fig_linha.update_xaxes(tickformat='d', tickvals=dados_para_plotar.index)
+    return fig_linha
+
+
+# --- DEPENDÊNCIA E LOCALIZAÇÃO ---
+def barras_dependencia(cubo, ano, local):
+    dados_base = consultar_cubo(cubo, local, ano)
+
+    dados_para_plotar = dados_base.melt(
+        id_vars=['Localização'],
+        value_vars=TEMAS["dependencia"]["colunas"],
+        var_name='Dependência',
+        value_name='Quant. de Docentes'
+    )
+    if dados_para_plotar.empty:
+        return None
+
+    fig = px.bar(
+        dados_para_plotar,
+        x='Localização',
+        y='Quant. de Docentes',
+        color='Dependência',
+        barmode='group',
+        text_auto=True,
+        title=f"Docentes por Localização e Dependência em {dados_base['Local'].iloc[0]} ({ano})"
+    )
+    fig.update_layout(separators=',.')
+    fig.update_yaxes(tickformat=",.0f")
+    return fig
+
+
+def linha_dependencia(cubo, local, dependencia):
+    # Selecionando APENAS a coluna da dependência escolhida e transformando
+    # as localizações 'Urbana' e 'Rural' em colunas, com .pivot()
+    dados_base = consultar_cubo(cubo, local)
+    dados_para_plotar = dados_base.pivot(index='Ano', columns='Localização', values=dependencia)
+    if dados_para_plotar.empty:
+        return None
+
+    # O Plotly cria automaticamente uma linha para 'Urbana' e outra para 'Rural'
+    fig_linha = px.line(
+        dados_para_plotar,
+        markers=True,
+        labels={'value': f'Quant. de Docentes (Rede {dependencia})', 'Ano': 'Ano', 'variable': 'Localização'}
+    )
+
+    fig_linha.update_layout(separators=',.')
+    fig_linha.update_yaxes(tickformat=",.0f")
+    fig_linha.update_xaxes(tickformat='d', tickvals=dados_para_plotar.index)
+    return fig_linha
+
+
+# --- COMPARAÇÃO ENTRE LOCAIS ---
+# Nome do eixo com as colunas de valores de cada tema nos gráficos de comparação
+EIXOS_COMPARACAO = {
+    "etapas": "Etapa de Ensino",
+    "idade": "Faixa Etária",
+    "formacao": "Formação Acadêmica",
+    "vinculo": "Dependência Administrativa",
+    "dependencia": "Dependência",
+}
+
+
+def rotulos_locais(dados):
+    """
+    Retorna o nome de cada local (pelo código) presente nos dados, com a
+    sigla da UF nos municípios cujo nome se repete na seleção.
+    """
+    nomes = dict(zip(dados["Código"].tolist(), dados["Local"].astype(str).tolist()))
+    repetidos = {nome for nome, quantidade in Counter(nomes.values()).items() if quantidade > 1}
+    return {
+        codigo: f"{nome} ({sigla_uf(uf_do_municipio(codigo))})"
+        if nome in repetidos and nivel_do_local(codigo) == "Município" else nome
+        for codigo, nome in nomes.items()
+    }
+
+
+def tabela_comparacao(cubo, tema, locais, ano=None, vinculo=None):
+    """
+    Soma a dimensão do tema por local e ano num único groupby sobre as
+    linhas de todos os locais, na ordem dos locais. Com `vinculo` (tema de
+    vínculo), considera só as linhas desse vínculo funcional.
+    """
+    dados = consultar_locais(cubo, locais, ano)
+    if vinculo is not None:
+        dados = dados[dados['Vínculo Funcional'] == vinculo]
+    tabela = dados.groupby(["Código", "Ano"], sort=False)[TEMAS[tema]["colunas"]].sum().reset_index()
+    tabela.insert(1, "Local", tabela["Código"].map(rotulos_locais(dados)))
+    return tabela
+
+
+def barras_comparacao(cubo, tema, ano, locais):
+    # Uma barra por local em cada coluna de valores do tema
+    eixo = EIXOS_COMPARACAO[tema]
+    dados_grafico = tabela_comparacao(cubo, tema, locais, ano).melt(
+        id_vars=['Local'],
+        value_vars=TEMAS[tema]["colunas"],
+        var_name=eixo,
+        value_name='Quant. de Docentes'
+    )
+    if dados_grafico.empty:
+        return None
+
+    fig = px.bar(
+        dados_grafico,
+        x=eixo,
+        y='Quant. de Docentes',
+        color='Local',
+        barmode='group',
+        title=f"Docentes por {eixo} nos locais selecionados ({ano})"
+    )
+    fig.update_layout(separators=',.')
+    fig.update_yaxes(tickformat=",.0f")
+    return fig
+
+
+def linha_comparacao(cubo, tema, locais, seletor):
+    # Uma linha por local: no tema de vínculo, o seletor escolhe o vínculo e
+    # as dependências são somadas; nos demais, escolhe a coluna de valores
+    if tema == "vinculo":
+        tabela = tabela_comparacao(cubo, tema, locais, vinculo=seletor)
+        tabela['Quant. de Docentes'] = tabela[TEMAS[tema]["colunas"]].sum(axis=1)
+    else:
+        tabela = tabela_comparacao(cubo, tema, locais)
+        tabela['Quant. de Docentes'] = tabela[seletor]
+    if tabela.empty:
+        return None
+
+    # O .pivot() ordena as colunas pelo nome; reindexamos na ordem dos locais
+    dados_para_plotar = tabela.pivot(index='Ano', columns='Local', values='Quant. de Docentes')
+    dados_para_plotar = dados_para_plotar[tabela['Local'].unique()]
+
+    fig_linha = px.line(
+        dados_para_plotar,
+        markers=True,
+        labels={'value': f'Quant. de Docentes ({seletor})', 'Ano': 'Ano', 'variable': 'Local'}
+    )
+    fig_linha.update_layout(separators=',.')
+    fig_linha.update_yaxes(tickformat=",.0f")
+    fig_linha.update_xaxes(tickformat='d', tickvals=dados_para_plotar.index)
+    return fig_linha
+
+
+# --- MAPA (todas as abas) ---
+def mapa(cubo, tema, ano, area, seletor):
+    # Uma cor por subdivisão da área (as UFs do Brasil, ou os municípios da
+    # UF); a malha vai só como URL, e o navegador a baixa uma única vez
+    url = url_malha(area)
+    coluna, valor_dimensao = seletor
+    dados = consultar_subdivisoes(cubo, area, ano)
+    dimensao = TEMAS[tema]["dimensao"]
+    if dimensao is not None:
+        if valor_dimensao is None:
+            # Sem um valor da dimensão, soma todos (só no modo absoluto)
+            dados = dados.groupby(["Código", "Local"], sort=False, observed=True)[coluna].sum().reset_index()
+        else:
+            dados = dados[dados[dimensao] == valor_dimensao]
+    if url is None or dados.empty:
+        return None
+
+    variacao = cubo.get("modo") == "variacao"
+    fig = go.Figure(go.Choropleth(
+        geojson=url,
+        featureidkey="properties.codarea",
+        locations=dados["Código"].astype(str),
+        z=dados[coluna],
+        text=dados["Local"].astype(str),
+        colorscale="RdBu" if variacao else "Blues",
+        zmid=0 if variacao else None,
+        colorbar={"title": {"text": "Quant. de Docentes"}, "tickformat": ",.0f"},
+        hovertemplate="%{text}<br>Quant. de Docentes: %{z}<extra></extra>"
+    ))
+    nome_area = NOME_BRASIL if area == CODIGO_BRASIL else nome_uf(area)
+    item = coluna if valor_dimensao is None else f"{coluna} ({valor_dimensao})"
+    fig.update_geos(fitbounds="locations", visible=False)
+    fig.update_layout(
+        title=f"Docentes - {item} em {nome_area} ({ano})",
+        separators=',.',
+        margin={"l": 0, "r": 0, "t": 40, "b": 0}
+    )
+    return fig
+
+
+# Funções de cada tema: (gráfico de barras, gráfico de linhas)
+FIGURAS = {
+    "etapas": (barras_etapas, linha_etapas),
+    "idade": (barras_idade, linha_idade),
+    "formacao": (barras_formacao, linha_formacao),
+    "vinculo": (barras_vinculo, linha_vinculo),
+    "dependencia": (barras_dependencia, linha_dependencia),
+}
+
+
+def opcoes_seletor(cubo, tema, local=CODIGO_BRASIL):
+    """
+    Retorna as opções do seletor do gráfico de linhas de um tema: os
+    vínculos funcionais presentes no local (já listados na indexação do
+    cubo), ou as colunas de valores nos demais temas.
+    """
+    if tema == "vinculo":
+        return list(cubo["valores_dimensao"].get(local, []))
+    return list(TEMAS[tema]["colunas"])
+
+
+# --- MODOS DE EXIBIÇÃO ---
+# Rótulo dos valores e formato dos números nos modos derivados
+ROTULOS_MODO = {
+    "percentual": ("% dos Docentes", ",.1f"),
+    "variacao": ("Variação Anual (%)", "+,.1f"),
+}
+
+
+def ajustar_modo(fig, modo):
+    """
+    Adapta uma figura construída sobre um cubo derivado: troca o rótulo
+    das quantidades e o formato do eixo de valores (o que usa o formato de
+    quantidades), e indica o modo no título.
+    """
+    rotulo, formato = ROTULOS_MODO[modo]
+
+    def trocar(texto):
+        if not texto:
+            return texto
+        return texto.replace("Quantidade de Docentes", rotulo).replace("Quant. de Docentes", rotulo)
+
+    def ajustar_eixo(eixo):
+        if eixo.tickformat == ",.0f":
+            eixo.update(tickformat=formato, ticksuffix="%")
+        eixo.title.text = trocar(eixo.title.text)
+
+    def ajustar_trace(trace):
+        trace.update(hovertemplate=trocar(trace.hovertemplate))
+        if trace.type == "choropleth":
+            trace.colorbar.update(title_text=trocar(trace.colorbar.title.text), tickformat=formato, ticksuffix="%")
+
+    fig.for_each_xaxis(ajustar_eixo)
+    fig.for_each_yaxis(ajustar_eixo)
+    fig.for_each_trace(ajustar_trace)
+    if fig.layout.title.text:
+        fig.update_layout(title_text=f"{fig.layout.title.text} · {MODOS[modo]}")
+    return fig
+
+
+def construir_figura(cubo, tema, tipo, ano, local, seletor=None):
+    """
+    Constrói a figura de um tema: tipo "barras" usa o ano e o local
+    (código do município, da UF ou CODIGO_BRASIL); tipo "linha" usa o
+    local e o item escolhido no seletor. Os tipos "barras_comparacao" e
+    "linha_comparacao" recebem em `local` uma tupla de códigos. O tipo
+    "mapa" recebe em `local` a área (CODIGO_BRASIL ou o código da UF) e no
+    seletor a coluna e o valor da dimensão. Um cubo derivado
+    (docentes.indicadores.visao) gera a figura do seu modo.
+    """
+    if tipo == "barras_comparacao":
+        return barras_comparacao(cubo, tema, ano, local)
+    if tipo == "linha_comparacao":
+        return linha_comparacao(cubo, tema, local, seletor)
+
+    barras, linha = FIGURAS[tema]
+    if tipo == "barras":
+        fig = barras(cubo, ano, local)
+    elif tipo == "mapa":
+        fig = mapa(cubo, tema, ano, local, seletor)
+    else:
+        fig = linha(cubo, local, seletor)
+    modo = cubo.get("modo", "absoluto")
+    if fig is not None and modo != "absoluto":
+        ajustar_modo(fig, modo)
+    return fig
@@ -0,0 +1,94 @@
+"""
+Indicadores derivados dos cubos: percentuais e variação anual.
+
+Os indicadores são calculados uma única vez por versão dos dados, junto
+com o cubo, para todos os locais e anos de uma vez. Cada modo de exibição
+é uma tabela com as mesmas linhas e colunas da tabela do cubo, só com os
+valores trocados, então as posições do índice e as funções de
+docentes.graficos valem para todos os modos sem alteração:
+
+- "percentual": a participação de cada valor no total definido pelo tema
+  (TEMAS[tema]["percentual"]), em %;
+- "variacao": a variação de cada valor em relação ao ano anterior do
+  mesmo local (e do mesmo valor da dimensão), em %. Fica vazia no primeiro
+  ano, quando falta o ano anterior ou quando o valor anterior é zero.
+"""
+import numpy as np
+
+from docentes.temas import TEMAS
+
+# Modos de exibição dos valores, com o rótulo do seletor das abas
+MODOS = {
+    "absoluto": "Absoluto",
+    "percentual": "Percentual",
+    "variacao": "Variação anual",
+}
+
+# Casas decimais dos indicadores
+CASAS_DECIMAIS = 1
+
+
+def percentuais(tabela, tema):
+    """
+    Retorna os valores da tabela agregada como percentuais do total
+    definido pelo tema: a soma das colunas da linha, ou a soma das linhas
+    da dimensão no mesmo local e ano. Totais zerados resultam em valores
+    vazios.
+    """
+    colunas = TEMAS[tema]["colunas"]
+    valores = tabela[colunas].astype("float64")
+    if TEMAS[tema]["percentual"] == "colunas":
+        totais = valores.sum(axis=1).to_numpy()[:, None]
+    else:
+        # A tabela está ordenada por código e ano, então cada total é a
+        # soma de um trecho contíguo de linhas
+        totais = valores.groupby([tabela["Código"], tabela["Ano"]], sort=False).transform("sum").to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(totais > 0, valores.to_numpy() / totais * 100, np.nan)
+
+
+def variacoes(tabela, tema):
+    """
+    Retorna a variação percentual de cada valor em relação ao ano anterior
+    do mesmo local e valor da dimensão.
+    """
+    colunas = TEMAS[tema]["colunas"]
+    dimensao = TEMAS[tema]["dimensao"]
+    chaves = [tabela["Código"]] + ([tabela[dimensao]] if dimensao else [])
+    valores = tabela[colunas].astype("float64")
+    grupos = valores.assign(Ano=tabela["Ano"].astype("int64")).groupby(chaves, sort=False, observed=True)
+    anteriores = grupos.shift(1)
+    # Só compara anos consecutivos
+    consecutivo = (anteriores["Ano"].to_numpy() == tabela["Ano"].to_numpy() - 1)[:, None]
+    anteriores = anteriores[colunas].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(consecutivo & (anteriores > 0), (valores.to_numpy() / anteriores - 1) * 100, np.nan)
+
+
+def acrescentar_modos(cubo, tema):
+    """
+    Calcula as tabelas dos modos derivados do cubo e as guarda em
+    cubo["modos"], cada uma como um cubo com o mesmo índice (ver `visao`).
+    Retorna o próprio cubo.
+    """
+    tabela = cubo["tabela"]
+    colunas = TEMAS[tema]["colunas"]
+    modos = {}
+    for modo, calcular in (("percentual", percentuais), ("variacao", variacoes)):
+        valores = np.round(calcular(tabela, tema), CASAS_DECIMAIS)
+        derivada = tabela.drop(columns=colunas)
+        for posicao, coluna in enumerate(colunas):
+            derivada[coluna] = valores[:, posicao]
+        modos[modo] = {**cubo, "tabela": derivada[list(tabela.columns)], "modo": modo}
+    cubo["modos"] = modos
+    return cubo
+
+
+def visao(cubo, modo):
+    """
+    Retorna o cubo do modo de exibição: o próprio cubo no modo absoluto,
+    ou o cubo derivado, com o mesmo índice e os valores do indicador.
+    """
+    if modo == "absoluto":
+        return cubo
+    return cubo["modos"][modo]
@@ -0,0 +1,85 @@
+"""
+Instantâneo de inicialização: os metadados que a barra lateral do app usa,
+num JSON pequeno por versão dos dados.
+
+Uso:
+    python -m docentes.inicio [--arquivo ARQUIVO]
+
+Um processo novo do app gastaria segundos importando o pandas, o pyarrow e
+o Plotly e carregando os cubos antes de desenhar qualquer coisa. Com o
+instantâneo, o app desenha a barra lateral (anos, UFs, municípios e a
+busca), o cabeçalho e as abas logo ao abrir, e só depois importa os
+módulos pesados e carrega os cubos, com os gráficos aparecendo à medida
+que ficam prontos. Este módulo só usa a biblioteca padrão.
+
+O instantâneo guarda a hierarquia de locais (ver
+docentes.territorio.montar_hierarquia) e a versão dos dados de onde ela
+saiu; é ignorado se a versão mudar. O app o grava sozinho na primeira vez
+que monta a hierarquia de uma versão, e este comando o gera antes, por
+exemplo ao preparar a imagem de um servidor.
+"""
+import argparse
+import json
+import os
+from pathlib import Path
+
+from docentes.dados import PASTA_DADOS, nome_da_versao, versao_dos_dados
+
+# Arquivo do instantâneo (por padrão, junto dos dados)
+ARQUIVO_INICIO = Path(os.environ.get("DOCENTES_ARQUIVO_INICIO", PASTA_DADOS / "inicio.json"))
+
+# Campos da hierarquia indexados por código (int), que o JSON grava como texto
+CAMPOS_POR_CODIGO = ("municipios", "chaves", "nomes")
+
+
+def gravar_inicio(versao, hierarquia, arquivo=ARQUIVO_INICIO):
+    """
+    Grava o instantâneo da versão dos dados, num temporário renomeado ao
+    final para que um processo lendo-o ao mesmo tempo não veja um arquivo
+    pela metade.
+    """
+    arquivo = Path(arquivo)
+    temporario = arquivo.with_name(f"{arquivo.name}.{os.getpid()}.tmp")
+    with open(temporario, "w", encoding="utf-8") as saida:
+        json.dump({"versao": nome_da_versao(versao), "hierarquia": hierarquia}, saida, ensure_ascii=False)
+    temporario.replace(arquivo)
+
+
+def ler_inicio(versao, arquivo=ARQUIVO_INICIO):
+    """
+    Retorna a hierarquia de locais gravada no instantâneo, ou None se ele
+    não existir ou for de outra versão dos dados.
+    """
+    try:
+        with open(arquivo, encoding="utf-8") as entrada:
+            instantaneo = json.load(entrada)
+    except (OSError, ValueError):
+        return None
+    if instantaneo.get("versao") != nome_da_versao(versao):
+        return None
+    hierarquia = instantaneo["hierarquia"]
+    for campo in CAMPOS_POR_CODIGO:
+        hierarquia[campo] = {int(codigo): valor for codigo, valor in hierarquia[campo].items()}
+    return hierarquia
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Gera o instantâneo de inicialização do app.")
+    parser.add_argument("--arquivo", default=ARQUIVO_INICIO, help="Arquivo do instantâneo")
+    args = parser.parse_args(argumentos)
+
+    from docentes.cubos import consultar_municipios
+    from docentes.precalculo import carregar_cubos_do_processo
+    from docentes.territorio import montar_hierarquia
+
+    versao = versao_dos_dados()
+    hierarquia = montar_hierarquia(consultar_municipios(carregar_cubos_do_processo()["etapas"]))
+    gravar_inicio(versao, hierarquia, args.arquivo)
+    print(
+        f"{len(hierarquia['anos'])} anos, {len(hierarquia['ufs'])} UFs e {len(hierarquia['todos'])} municípios "
+        f"→ {args.arquivo} ({Path(args.arquivo).stat().st_size / 1024:.0f} KiB)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Malhas territoriais do IBGE, simplificadas, para os mapas das abas.
+
+Uso:
+    python -m docentes.mapas [--uf CODIGO ...] [--origem PASTA_GEOJSON]
+
+Baixa da API de malhas do IBGE (ou lê de `--origem`, com os arquivos
+`ufs.json` e `municipios_<uf>.json` já baixados) a malha das UFs do
+Brasil e a dos municípios de cada UF, simplifica-as e grava-as em
+`static/malhas/`, de onde o Streamlit as serve como arquivos estáticos
+(server.enableStaticServing, em .streamlit/config.toml). Sem `--uf`, usa
+as UFs presentes nos dados. A pasta static/ não é versionada: as malhas
+são geradas na preparação do servidor, como a base colunar.
+
+Cada nível de zoom tem a sua tolerância de simplificação: a malha das UFs
+(mapa do Brasil) é bem mais simplificada que a dos municípios (mapa de
+uma UF). A simplificação preserva a topologia: as divisas são quebradas
+em arcos entre os pontos onde três ou mais limites se encontram, e cada
+arco é simplificado uma única vez (Douglas-Peucker) e reaproveitado pelos
+dois vizinhos, então não surgem buracos nem sobreposições entre eles.
+
+As figuras referenciam a malha pela URL: o navegador baixa cada arquivo
+uma vez e o guarda em cache, e a cada troca de filtro só os códigos e os
+valores dos locais são enviados.
+"""
+import argparse
+import json
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+
+from docentes.dados import PASTA_ESTATICA, carregar_tabelas, url_estatica
+from docentes.territorio import CODIGO_BRASIL, uf_do_municipio
+
+# Subpasta das malhas entre os arquivos estáticos servidos pelo Streamlit
+PASTA_MALHAS = PASTA_ESTATICA / "malhas"
+
+# Malhas da API do IBGE: as UFs do Brasil e os municípios de uma UF
+URL_IBGE_UFS = (
+    "https://servicodados.ibge.gov.br/api/v3/malhas/paises/BR"
+    "?formato=application/vnd.geo+json&qualidade=minima&intrarregiao=UF"
+)
+URL_IBGE_MUNICIPIOS = (
+    "https://servicodados.ibge.gov.br/api/v3/malhas/estados/{uf}"
+    "?formato=application/vnd.geo+json&qualidade=intermediaria&intrarregiao=municipio"
+)
+
+# Tolerância de simplificação (em graus) de cada nível de zoom
+TOLERANCIAS = {"brasil": 0.02, "uf": 0.002}
+# Casas decimais das coordenadas gravadas (5 casas ≈ 1 m)
+CASAS_COORDENADAS = 5
+
+
+def nome_malha(area):
+    """
+    Nome do arquivo da malha exibida para a área: as UFs, para o Brasil,
+    ou os municípios da UF.
+    """
+    return "brasil.geojson" if area == CODIGO_BRASIL else f"municipios_{area}.geojson"
+
+
+def url_malha(area):
+    """
+    Retorna a URL da malha da área (ver docentes.dados.url_estatica), ou
+    None se ela ainda não foi gerada.
+    """
+    caminho = PASTA_MALHAS / nome_malha(area)
+    if not caminho.exists():
+        return None
+    return url_estatica(caminho.relative_to(PASTA_ESTATICA))
+
+
+# --- SIMPLIFICAÇÃO ---
+def douglas_peucker(pontos, tolerancia):
+    """
+    Retorna os índices dos pontos mantidos pela simplificação de
+    Douglas-Peucker de uma linha (array n × 2). As pontas são sempre
+    mantidas; se coincidirem (um anel inteiro), as distâncias são medidas
+    até esse ponto.
+    """
+    manter = np.zeros(len(pontos), dtype=bool)
+    manter[0] = manter[-1] = True
+    pilha = [(0, len(pontos) - 1)]
+    while pilha:
+        inicio, fim = pilha.pop()
+        if fim - inicio < 2:
+            continue
+        a, b = pontos[inicio], pontos[fim]
+        trecho = pontos[inicio + 1:fim]
+        segmento = b - a
+        comprimento = np.hypot(*segmento)
+        if comprimento == 0:
+            distancias = np.hypot(*(trecho - a).T)
+        else:
+            distancias = np.abs(segmento[0] * (trecho[:, 1] - a[1]) - segmento[1] * (trecho[:, 0] - a[0])) / comprimento
+        maior = int(np.argmax(distancias))
+        if distancias[maior] > tolerancia or comprimento == 0:
+            meio = inicio + 1 + maior
+            manter[meio] = True
+            pilha.extend([(inicio, meio), (meio, fim)])
+    return np.flatnonzero(manter)
+
+
+def aneis_da_geometria(geometria):
+    """
+    Retorna os polígonos de uma geometria (Polygon ou MultiPolygon) como
+    uma lista de listas de anéis.
+    """
+    if geometria["type"] == "Polygon":
+        return [geometria["coordinates"]]
+    return geometria["coordinates"]
+
+
+def simplificar_malha(malha, tolerancia, casas=CASAS_COORDENADAS):
+    """
+    Simplifica uma FeatureCollection do IBGE preservando a topologia entre
+    vizinhos (ver o docstring do módulo). Mantém só a propriedade
+    "codarea" (o código IBGE) de cada feição.
+    """
+    # Anéis com as coordenadas arredondadas, sem o ponto de fechamento e
+    # sem pontos consecutivos repetidos
+    feicoes = []
+    for feicao in malha["features"]:
+        poligonos = []
+        for poligono in aneis_da_geometria(feicao["geometry"]):
+            aneis = []
+            for anel in poligono:
+                pontos = [(round(x, casas), round(y, casas)) for x, y, *_ in anel]
+                pontos = [ponto for posicao, ponto in enumerate(pontos) if posicao == 0 or ponto != pontos[posicao - 1]]
+                if pontos[0] == pontos[-1]:
+                    pontos.pop()
+                if len(pontos) >= 3:
+                    aneis.append(pontos)
+            if aneis:
+                poligonos.append(aneis)
+        feicoes.append((str(feicao["properties"]["codarea"]), poligonos))
+
+    # Um ponto é fixo quando tem mais (ou menos) de dois vizinhos distintos:
+    # é onde três ou mais limites se encontram
+    vizinhos = {}
+    for _, poligonos in feicoes:
+        for aneis in poligonos:
+            for pontos in aneis:
+                for anterior, ponto, seguinte in zip(pontos[-1:] + pontos[:-1], pontos, pontos[1:] + pontos[:1]):
+                    vizinhos.setdefault(ponto, set()).update((anterior, seguinte))
+    fixos = {ponto for ponto, adjacentes in vizinhos.items() if len(adjacentes) != 2}
+
+    arcos = {}
+
+    def simplificar_arco(arco):
+        # Cada arco é simplificado num sentido canônico, para que os dois
+        # anéis que o compartilham recebam exatamente os mesmos pontos
+        invertido = (arco[-1], arco[-2]) < (arco[0], arco[1])
+        chave = tuple(reversed(arco)) if invertido else tuple(arco)
+        if chave not in arcos:
+            indices = douglas_peucker(np.array(chave), tolerancia)
+            arcos[chave] = [chave[indice] for indice in indices]
+        simplificado = arcos[chave]
+        return simplificado[::-1] if invertido else simplificado
+
+    def simplificar_anel(pontos):
+        posicoes = [posicao for posicao, ponto in enumerate(pontos) if ponto in fixos]
+        # Anel sem pontos fixos (uma ilha, ou um município cercado por um
+        # só vizinho): começa pelo menor ponto, o mesmo para os dois lados
+        if not posicoes:
+            posicoes = [pontos.index(min(pontos))]
+        pontos = pontos[posicoes[0]:] + pontos[:posicoes[0]]
+        posicoes = [posicao - posicoes[0] for posicao in posicoes] + [len(pontos)]
+        pontos = pontos + pontos[:1]
+        resultado = []
+        for inicio, fim in zip(posicoes, posicoes[1:]):
+            resultado.extend(simplificar_arco(pontos[inicio:fim + 1])[:-1])
+        resultado.append(resultado[0])
+        # Anéis que degeneram mantêm os pontos originais
+        return resultado if len(resultado) >= 4 else pontos
+
+    features = []
+    for codigo, poligonos in feicoes:
+        coordenadas = [[simplificar_anel(pontos) for pontos in aneis] for aneis in poligonos]
+        features.append({
+            "type": "Feature",
+            "properties": {"codarea": codigo},
+            "geometry": {"type": "MultiPolygon", "coordinates": coordenadas},
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def contar_pontos(malha):
+    return sum(
+        len(anel)
+        for feicao in malha["features"]
+        for poligono in aneis_da_geometria(feicao["geometry"])
+        for anel in poligono
+    )
+
+
+# --- GERAÇÃO ---
+def obter_malha(origem, arquivo, url):
+    """
+    Lê a malha de `origem/arquivo`, se houver uma pasta de origem, ou a
+    baixa da API do IBGE.
+    """
+    if origem is not None:
+        with open(Path(origem) / arquivo, encoding="utf-8") as entrada:
+            return json.load(entrada)
+    with urllib.request.urlopen(url, timeout=120) as resposta:
+        return json.load(resposta)
+
+
+def gravar_malha(malha, area, destino=PASTA_MALHAS):
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    caminho = destino / nome_malha(area)
+    caminho_temporario = caminho.with_name(caminho.name + ".tmp")
+    with open(caminho_temporario, "w", encoding="utf-8") as saida:
+        json.dump(malha, saida, separators=(",", ":"))
+    caminho_temporario.replace(caminho)
+    return caminho
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Gera as malhas simplificadas do IBGE usadas nos mapas.")
+    parser.add_argument("--uf", type=int, action="append", help="Código IBGE da UF (pode ser repetido)")
+    parser.add_argument("--origem", help="Pasta com ufs.json e municipios_<uf>.json já baixados do IBGE")
+    parser.add_argument("--destino", default=PASTA_MALHAS, help="Pasta onde as malhas serão gravadas")
+    args = parser.parse_args(argumentos)
+
+    ufs = args.uf
+    if not ufs:
+        codigos = carregar_tabelas()["etapas"]["Código do Município"].astype("int64")
+        ufs = sorted(int(uf) for uf in uf_do_municipio(codigos).unique())
+
+    pedidos = [(CODIGO_BRASIL, "brasil", "ufs.json", URL_IBGE_UFS)] + [
+        (uf, "uf", f"municipios_{uf}.json", URL_IBGE_MUNICIPIOS.format(uf=uf)) for uf in ufs
+    ]
+    for area, nivel, arquivo, url in pedidos:
+        malha = obter_malha(args.origem, arquivo, url)
+        simplificada = simplificar_malha(malha, TOLERANCIAS[nivel])
+        caminho = gravar_malha(simplificada, area, args.destino)
+        print(
+            f"{caminho.name:<28} {len(simplificada['features']):>5} feições  "
+            f"{contar_pontos(malha):>8} → {contar_pontos(simplificada):>7} pontos  "
+            f"{caminho.stat().st_size / 1024:>8.1f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Instrumentação dos reruns: tempos por etapa, contadores e tamanhos.
+
+As etapas são medidas com `medir` (um bloco `with`), que registra a
+duração num histograma do processo e, se houver um rerun em andamento na
+thread, na lista de etapas desse rerun (com a profundidade, para exibir
+as etapas aninhadas). Contadores (acertos e faltas dos caches, por
+exemplo) são somados com `contar` e tamanhos (das figuras serializadas,
+por exemplo) com `observar_tamanho`. Os caches contam as consultas em
+`cache_consultas_total` e as faltas em `cache_faltas_total`.
+
+Os valores acumulados no processo podem ser exportados no formato texto
+do Prometheus (`texto_prometheus`), gravados periodicamente num arquivo
+para o coletor textfile do node_exporter (DOCENTES_METRICAS_ARQUIVO), e
+cada rerun pode ser registrado como uma linha JSON no log
+(DOCENTES_LOG_METRICAS=1). Com DOCENTES_DEPURACAO=1, a aplicação exibe um
+painel com as etapas do último rerun.
+"""
+import contextvars
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Registra cada rerun como uma linha JSON no log "docentes.metricas"
+LOG_METRICAS = os.environ.get("DOCENTES_LOG_METRICAS", "0") == "1"
+# Arquivo onde as métricas são gravadas no formato do Prometheus
+ARQUIVO_METRICAS = os.environ.get("DOCENTES_METRICAS_ARQUIVO")
+# Exibe o painel de depuração na aplicação
+DEPURACAO = os.environ.get("DOCENTES_DEPURACAO", "0") == "1"
+# Os tamanhos (que exigem serializar as figuras mais uma vez) só são
+# medidos quando as métricas são exportadas ou exibidas
+MEDIR_TAMANHOS = LOG_METRICAS or ARQUIVO_METRICAS is not None or DEPURACAO
+
+# Intervalo mínimo, em segundos, entre duas gravações do arquivo de métricas
+INTERVALO_ARQUIVO = 15
+# Limites (em segundos) das faixas dos histogramas de duração
+FAIXAS_DURACAO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger("docentes.metricas")
+if LOG_METRICAS and not logger.handlers:
+    # Uma linha JSON por rerun na saída de erros, sem prefixos de formatação
+    manipulador = logging.StreamHandler()
+    manipulador.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(manipulador)
+    logger.setLevel(logging.INFO)
+
+
+class Metricas:
+    """
+    Valores acumulados no processo, seguros para uso simultâneo por várias
+    sessões. Cada série é identificada pelo nome e por rótulos ordenados.
+    """
+
+    def __init__(self):
+        self.contadores = {}
+        self.duracoes = {}
+        self.tamanhos = {}
+        self._trava = threading.Lock()
+
+    def contar(self, nome, valor=1, rotulos=()):
+        with self._trava:
+            self.contadores[(nome, rotulos)] = self.contadores.get((nome, rotulos), 0) + valor
+
+    def observar_duracao(self, nome, segundos, rotulos=()):
+        """
+        Acumula a duração no histograma da etapa: uma contagem por faixa
+        (cumulativa só na exportação), a soma e o total de observações.
+        """
+        with self._trava:
+            serie = self.duracoes.setdefault((nome, rotulos), {"faixas": [0] * len(FAIXAS_DURACAO), "soma": 0.0, "total": 0})
+            for posicao, limite in enumerate(FAIXAS_DURACAO):
+                if segundos <= limite:
+                    serie["faixas"][posicao] += 1
+                    break
+            serie["soma"] += segundos
+            serie["total"] += 1
+
+    def observar_tamanho(self, nome, tamanho, rotulos=()):
+        with self._trava:
+            serie = self.tamanhos.setdefault((nome, rotulos), {"soma": 0, "total": 0})
+            serie["soma"] += tamanho
+            serie["total"] += 1
+
+    def instantaneo(self):
+        """
+        Retorna uma cópia dos valores acumulados, para exportação.
+        """
+        with self._trava:
+            return (
+                dict(self.contadores),
+                {chave: {**serie, "faixas": list(serie["faixas"])} for chave, serie in self.duracoes.items()},
+                {chave: dict(serie) for chave, serie in self.tamanhos.items()},
+            )
+
+
+# Métricas do processo, compartilhadas por todas as sessões
+METRICAS = Metricas()
+
+# Etapas do rerun em andamento na thread (None fora de um rerun)
+_rerun = contextvars.ContextVar("rerun", default=None)
+_ultima_gravacao = [0.0]
+
+
+def _rotulos(rotulos):
+    return tuple(sorted((chave, str(valor)) for chave, valor in rotulos.items()))
+
+
+@contextmanager
+def medir(nome, **rotulos):
+    """
+    Mede a duração do bloco como uma etapa `nome` com os rótulos
+    informados. Ex: with medir("bloco", tema="etapas", bloco="barras"): ...
+    """
+    rerun = _rerun.get()
+    if rerun is not None:
+        etapa = {"etapa": nome, **rotulos, "inicio_ms": 0.0, "duracao_ms": 0.0, "nivel": rerun["nivel"]}
+        rerun["etapas"].append(etapa)
+        rerun["nivel"] += 1
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao = time.perf_counter() - inicio
+        METRICAS.observar_duracao(nome, duracao, _rotulos(rotulos))
+        if rerun is not None:
+            rerun["nivel"] -= 1
+            etapa["inicio_ms"] = round((inicio - rerun["inicio"]) * 1000, 3)
+            etapa["duracao_ms"] = round(duracao * 1000, 3)
+
+
+def contar(nome, valor=1, **rotulos):
+    METRICAS.contar(nome, valor, _rotulos(rotulos))
+
+
+def observar_tamanho(nome, tamanho, **rotulos):
+    METRICAS.observar_tamanho(nome, tamanho, _rotulos(rotulos))
+
+
+def consultar_cache(cache, funcao, *args):
+    """
+    Chama uma função com st.cache_resource, medindo a chamada e contando a
+    consulta. As faltas são contadas pela própria função, com
+    `contar("cache_faltas_total", cache=...)` no corpo, que só é executado
+    quando o resultado não está no cache.
+    """
+    contar("cache_consultas_total", cache=cache)
+    with medir("carregar", cache=cache):
+        return funcao(*args)
+
+
+# --- RERUN ---
+def iniciar_rerun():
+    """
+    Começa a registrar as etapas do rerun da thread atual.
+    """
+    _rerun.set({"inicio": time.perf_counter(), "etapas": [], "nivel": 0})
+
+
+def finalizar_rerun(**rotulos):
+    """
+    Encerra o rerun da thread atual, acumula sua duração total e, se
+    configurado, registra-o no log e grava o arquivo de métricas. Retorna
+    a lista de etapas do rerun.
+    """
+    rerun = _rerun.get()
+    if rerun is None:
+        return []
+    _rerun.set(None)
+    duracao = time.perf_counter() - rerun["inicio"]
+    METRICAS.observar_duracao("rerun", duracao, _rotulos(rotulos))
+    if LOG_METRICAS:
+        logger.info(json.dumps(
+            {"evento": "rerun", **rotulos, "duracao_ms": round(duracao * 1000, 3), "etapas": rerun["etapas"]},
+            ensure_ascii=False
+        ))
+    if ARQUIVO_METRICAS and time.monotonic() - _ultima_gravacao[0] >= INTERVALO_ARQUIVO:
+        _ultima_gravacao[0] = time.monotonic()
+        gravar_prometheus(ARQUIVO_METRICAS)
+    return rerun["etapas"]
+
+
+# --- EXPORTAÇÃO ---
+def _valor_rotulo(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _serie(nome, rotulos, extras=()):
+    rotulos = tuple(rotulos) + tuple(extras)
+    if not rotulos:
+        return nome
+    texto = ",".join(f'{chave}="{_valor_rotulo(valor)}"' for chave, valor in rotulos)
+    return f"{nome}{{{texto}}}"
+
+
+def texto_prometheus(metricas=METRICAS, prefixo="docentes"):
+    """
+    Exporta as métricas no formato texto do Prometheus: contadores,
+    histogramas das durações (em segundos) e resumos dos tamanhos (em
+    bytes).
+    """
+    contadores, duracoes, tamanhos = metricas.instantaneo()
+    linhas = []
+    for nome in sorted({nome for nome, _ in contadores}):
+        linhas.append(f"# TYPE {prefixo}_{nome} counter")
+        for (serie, rotulos), valor in sorted(contadores.items()):
+            if serie == nome:
+                linhas.append(f"{_serie(f'{prefixo}_{nome}', rotulos)} {valor}")
+
+    nome = f"{prefixo}_etapa_segundos"
+    linhas.append(f"# TYPE {nome} histogram")
+    for (etapa, rotulos), serie in sorted(duracoes.items()):
+        rotulos = (("etapa", etapa),) + rotulos
+        acumulado = 0
+        for limite, quantidade in zip(FAIXAS_DURACAO, serie["faixas"]):
+            acumulado += quantidade
+            linhas.append(f"{_serie(nome + '_bucket', rotulos, [('le', limite)])} {acumulado}")
+        linhas.append(f"{_serie(nome + '_bucket', rotulos, [('le', '+Inf')])} {serie['total']}")
+        linhas.append(f"{_serie(nome + '_sum', rotulos)} {serie['soma']:.6f}")
+        linhas.append(f"{_serie(nome + '_count', rotulos)} {serie['total']}")
+
+    for nome in sorted({nome for nome, _ in tamanhos}):
+        linhas.append(f"# TYPE {prefixo}_{nome}_bytes summary")
+        for (serie_nome, rotulos), serie in sorted(tamanhos.items()):
+            if serie_nome == nome:
+                linhas.append(f"{_serie(f'{prefixo}_{nome}_bytes_sum', rotulos)} {serie['soma']}")
+                linhas.append(f"{_serie(f'{prefixo}_{nome}_bytes_count', rotulos)} {serie['total']}")
+    return "\n".join(linhas) + "\n"
+
+
+def gravar_prometheus(caminho, metricas=METRICAS):
+    """
+    Grava as métricas no arquivo (por renomeação, para que o coletor
+    nunca leia um arquivo pela metade).
+    """
+    caminho = Path(caminho)
+    descritor, temporario = tempfile.mkstemp(dir=caminho.parent, prefix=caminho.name, suffix=".tmp")
+    with os.fdopen(descritor, "w", encoding="utf-8") as arquivo:
+        arquivo.write(texto_prometheus(metricas))
+    Path(temporario).replace(caminho)
+
+
+def resumo_contadores(metricas=METRICAS):
+    """
+    Retorna os contadores como uma lista de dicionários, para exibição.
+    """
+    contadores, _, _ = metricas.instantaneo()
+    return [
+        {"métrica": nome, **dict(rotulos), "valor": valor}
+        for (nome, rotulos), valor in sorted(contadores.items())
+    ]
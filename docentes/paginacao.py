@@ -0,0 +1,44 @@
+"""
+Paginação, no servidor, das tabelas de dados exibidas nas abas.
+
+A filtragem por nome e a ordenação são feitas aqui, sobre o DataFrame
+inteiro, e só as linhas da página atual são enviadas ao navegador.
+"""
+import math
+
+from docentes.territorio import chave_de_busca, normalizar_para_ordenacao
+
+# Linhas por página nas tabelas de detalhamento
+TAMANHO_PAGINA = 25
+
+
+def filtrar_e_ordenar(df, filtro="", ordenar_por=None, crescente=True):
+    """
+    Filtra as linhas cujo 'Local' contém o trecho (sem considerar acentos
+    ou maiúsculas) e ordena pela coluna informada. A ordenação por 'Local'
+    também desconsidera acentos.
+    """
+    if filtro:
+        chaves = df["Local"].astype(str).map(chave_de_busca)
+        df = df[chaves.str.contains(chave_de_busca(filtro), regex=False).to_numpy()]
+    if ordenar_por == "Local":
+        df = df.sort_values(
+            "Local", ascending=crescente, kind="stable",
+            key=lambda nomes: nomes.astype(str).map(normalizar_para_ordenacao)
+        )
+    elif ordenar_por is not None:
+        df = df.sort_values(ordenar_por, ascending=crescente, kind="stable")
+    return df
+
+
+def contar_paginas(df, tamanho=TAMANHO_PAGINA):
+    return max(1, math.ceil(len(df) / tamanho))
+
+
+def fatiar_pagina(df, pagina, tamanho=TAMANHO_PAGINA):
+    """
+    Retorna as linhas da página (a partir de 1), limitando o número da
+    página ao intervalo válido.
+    """
+    pagina = min(max(1, pagina), contar_paginas(df, tamanho))
+    return df.iloc[(pagina - 1) * tamanho:pagina * tamanho]
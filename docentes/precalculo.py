@@ -0,0 +1,288 @@
+"""
+Pré-cálculo, em paralelo, das figuras de todas as combinações, num cache
+em disco por versão dos dados.
+
+Uso:
+    python -m docentes.precalculo [--processos N] [--ano ANO ...] [--nivel raiz|ufs|todos]
+                                  [--modo MODO ...] [--destino PASTA]
+
+Os agregados (os cubos) já são calculados uma vez por versão, na base
+colunar ou no banco; o que resta de caro num rerun é construir as
+figuras. Este comando constrói as figuras de barras e de linhas de todos
+os temas, anos, locais, opções do seletor e modos de exibição, dividindo
+os lotes de locais de cada tema entre processos (um por CPU, por padrão).
+Cada processo carrega os cubos uma vez.
+
+As figuras, serializadas em JSON e comprimidas, vão para um arquivo SQLite
+por versão dos dados em DOCENTES_PASTA_FIGURAS, gravado num temporário e
+renomeado ao final; os arquivos das outras versões são removidos. O
+arquivo também registra a versão do código das figuras (os módulos do
+pacote docentes e o Plotly), e é ignorado se ela mudar. O cache de figuras do app
+(docentes.cache_figuras) consulta o arquivo antes de construir uma figura:
+ler uma figura pronta custa poucos milissegundos, contra dezenas para
+construí-la, então um processo novo já começa com todas as figuras
+prontas. Os mapas não são pré-calculados.
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import plotly
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from docentes.banco import BACKEND, abrir_cubos, conectar
+from docentes.cache_figuras import combinacoes
+from docentes.cubos import consultar_municipios, montar_cubos
+from docentes.dados import PASTA_DADOS, PASTA_PROJETO, carregar_tabelas, nome_da_versao, versao_dos_dados
+from docentes.graficos import construir_figura
+from docentes.indicadores import MODOS, visao
+from docentes.temas import TEMAS
+from docentes.territorio import CODIGO_BRASIL, montar_hierarquia
+
+# Pasta dos arquivos de figuras pré-calculadas, um por versão dos dados
+PASTA_FIGURAS = Path(os.environ.get("DOCENTES_PASTA_FIGURAS", PASTA_DADOS / "figuras"))
+
+NIVEIS = ("raiz", "ufs", "todos")
+# Locais de um mesmo tema processados por tarefa de cada processo
+LOCAIS_POR_LOTE = 50
+# Pacote cujo código define as figuras geradas
+PASTA_CODIGO = PASTA_PROJETO / "docentes"
+
+
+# --- LOCAIS ---
+def locais_do_nivel(hierarquia, nivel="todos"):
+    """
+    Retorna os códigos dos locais até o nível pedido, na ordem dos filtros
+    do app: a visão padrão (o Brasil ou a UF única), as UFs e os
+    municípios.
+    """
+    locais = [hierarquia["raiz"]]
+    if nivel != "raiz" and hierarquia["raiz"] == CODIGO_BRASIL:
+        locais += hierarquia["ufs"]
+    if nivel == "todos":
+        locais += hierarquia["todos"]
+    return locais
+
+
+# --- PROCESSOS ---
+# Cubos de cada processo de trabalho, carregados uma vez em `iniciar_processo`
+CUBOS_DO_PROCESSO = {}
+
+
+def carregar_cubos_do_processo():
+    """
+    Carrega os cubos da versão atual dos dados: abre o banco, com
+    DOCENTES_BACKEND, ou os monta em memória.
+    """
+    if BACKEND != "memoria":
+        return abrir_cubos(versao_dos_dados())
+    return montar_cubos(carregar_tabelas())
+
+
+def iniciar_processo():
+    CUBOS_DO_PROCESSO.update(carregar_cubos_do_processo())
+
+
+def executar_no_processo(funcao, lote):
+    return funcao(CUBOS_DO_PROCESSO, *lote)
+
+
+def executar_lotes(funcao, lotes, cubos, processos):
+    """
+    Executa `funcao(cubos, *lote)` para cada lote e gera os resultados na
+    ordem dos lotes, à medida que ficam prontos. Com mais de um processo,
+    cada processo de trabalho carrega os seus próprios cubos; com um só,
+    usa os cubos recebidos.
+    """
+    if processos == 1:
+        for lote in lotes:
+            yield funcao(cubos, *lote)
+        return
+    with ProcessPoolExecutor(processos, initializer=iniciar_processo) as executor:
+        yield from executor.map(partial(executar_no_processo, funcao), lotes)
+
+
+# --- SERIALIZAÇÃO ---
+def versao_do_codigo():
+    """
+    Impressão digital do código do pacote docentes e da versão do Plotly:
+    figuras gravadas por outro código não são reaproveitadas. Entram todos
+    os módulos do pacote, e não só os de gráficos, porque as figuras
+    dependem também dos cubos, das consultas, dos rótulos e dos filtros.
+    """
+    resumo = hashlib.sha256(plotly.__version__.encode())
+    for arquivo in sorted(PASTA_CODIGO.glob("*.py")):
+        resumo.update(arquivo.name.encode())
+        resumo.update(arquivo.read_bytes())
+    return resumo.hexdigest()[:16]
+
+
+def texto_chave(chave):
+    return json.dumps(chave, ensure_ascii=False)
+
+
+def serializar(figura):
+    # Figuras vazias (sem dados para a seleção) também são guardadas
+    if figura is None:
+        return None
+    return zlib.compress(pio.to_json(figura, validate=False).encode())
+
+
+def desserializar(dados):
+    if dados is None:
+        return None
+    # A figura foi validada ao ser construída; validá-la de novo custaria
+    # dez vezes mais que a leitura
+    return go.Figure(json.loads(zlib.decompress(dados)), _validate=False)
+
+
+# --- GERAÇÃO ---
+def caminho_figuras(versao, pasta=PASTA_FIGURAS):
+    return Path(pasta) / f"figuras_{nome_da_versao(versao)}.sqlite"
+
+
+def calcular_lote(cubos, tema, locais, anos, modos):
+    """
+    Constrói as figuras de um tema para um lote de locais. Retorna o tema,
+    a lista de (chave, figura serializada) e o tempo gasto, em segundos.
+    """
+    inicio = time.perf_counter()
+    itens = []
+    for chave in combinacoes(cubos, anos, locais, modos, temas=[tema]):
+        _, tipo, ano, local, seletor, modo = chave
+        figura = construir_figura(visao(cubos[tema], modo), tema, tipo, ano, local, seletor)
+        itens.append((texto_chave(chave), serializar(figura)))
+    return tema, itens, time.perf_counter() - inicio
+
+
+def precalcular(versao, pasta=PASTA_FIGURAS, processos=None, anos=None, nivel="todos", modos=tuple(MODOS)):
+    """
+    Constrói e grava as figuras da versão dos dados, dividindo os lotes de
+    locais de cada tema entre `processos` processos. Retorna o resumo da
+    execução: figuras e tempo de processamento por tema, tempo total e
+    vazão.
+    """
+    inicio = time.perf_counter()
+    cubos = carregar_cubos_do_processo()
+    hierarquia = montar_hierarquia(consultar_municipios(cubos["etapas"]))
+    anos = sorted(set(anos or hierarquia["anos"]) & set(hierarquia["anos"]), reverse=True)
+    locais = locais_do_nivel(hierarquia, nivel)
+    lotes = [
+        (tema, locais[posicao:posicao + LOCAIS_POR_LOTE], anos, modos)
+        for tema in TEMAS
+        for posicao in range(0, len(locais), LOCAIS_POR_LOTE)
+    ]
+    processos = processos or os.cpu_count() or 1
+
+    caminho = caminho_figuras(versao, pasta)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_name(f"{caminho.name}.{os.getpid()}.tmp")
+    temporario.unlink(missing_ok=True)
+    por_tema = {tema: {"figuras": 0, "segundos": 0.0} for tema in TEMAS}
+    conexao = conectar(temporario, somente_leitura=False)
+    try:
+        conexao.execute("CREATE TABLE figuras (chave VARCHAR PRIMARY KEY, figura BLOB) WITHOUT ROWID")
+        for tema, itens, segundos in executar_lotes(calcular_lote, lotes, cubos, processos):
+            conexao.executemany("INSERT INTO figuras VALUES (?, ?)", itens)
+            por_tema[tema]["figuras"] += len(itens)
+            por_tema[tema]["segundos"] += segundos
+        conexao.execute("CREATE TABLE metadados (chave VARCHAR PRIMARY KEY, valor VARCHAR)")
+        conexao.execute("INSERT INTO metadados VALUES (?, ?)", ("codigo", versao_do_codigo()))
+        conexao.commit()
+    finally:
+        conexao.close()
+    temporario.replace(caminho)
+    for antigo in Path(pasta).glob("figuras_*.sqlite"):
+        if antigo != caminho:
+            antigo.unlink(missing_ok=True)
+
+    total = sum(resumo["figuras"] for resumo in por_tema.values())
+    segundos = time.perf_counter() - inicio
+    return {
+        "arquivo": str(caminho),
+        "processos": processos,
+        "locais": len(locais),
+        "anos": anos,
+        "modos": list(modos),
+        "temas": por_tema,
+        "figuras": total,
+        "segundos": segundos,
+        "figuras_por_segundo": total / segundos,
+    }
+
+
+# --- LEITURA ---
+class DiscoFiguras:
+    """
+    Arquivo de figuras pré-calculadas de uma versão dos dados, com uma
+    conexão somente leitura por thread.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = Path(caminho)
+        self._local = threading.local()
+
+    def executar(self, sql, parametros=()):
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = self._local.conexao = conectar(self.caminho)
+        return conexao.execute(sql, parametros)
+
+    def ler(self, chave):
+        """
+        Retorna (True, figura) se a chave (ver chave_figura) foi
+        pré-calculada, com figura None quando não há dados para ela, ou
+        (False, None) se não foi.
+        """
+        linha = self.executar("SELECT figura FROM figuras WHERE chave = ?", (texto_chave(chave),)).fetchone()
+        if linha is None:
+            return False, None
+        return True, desserializar(linha[0])
+
+    def __len__(self):
+        return self.executar("SELECT count(*) FROM figuras").fetchone()[0]
+
+
+def abrir_figuras(versao, pasta=PASTA_FIGURAS):
+    """
+    Retorna as figuras pré-calculadas da versão dos dados, ou None se elas
+    não foram geradas, ou foram geradas por outra versão do código.
+    """
+    caminho = caminho_figuras(versao, pasta)
+    if not caminho.exists():
+        return None
+    disco = DiscoFiguras(caminho)
+    (codigo,), = disco.executar("SELECT valor FROM metadados WHERE chave = 'codigo'").fetchall()
+    return disco if codigo == versao_do_codigo() else None
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Pré-calcula as figuras de todas as combinações num cache em disco.")
+    parser.add_argument("--destino", default=PASTA_FIGURAS, help="Pasta dos arquivos de figuras")
+    parser.add_argument("--processos", type=int, help="Processos de trabalho (padrão: um por CPU)")
+    parser.add_argument("--ano", type=int, action="append", help="Ano a calcular (pode ser repetido; padrão: todos)")
+    parser.add_argument("--nivel", choices=NIVEIS, default="todos", help="Até que nível de local calcular")
+    parser.add_argument("--modo", choices=list(MODOS), action="append", help="Modo de exibição (padrão: todos)")
+    args = parser.parse_args(argumentos)
+
+    resumo = precalcular(versao_dos_dados(), args.destino, args.processos, args.ano, args.nivel, tuple(args.modo or MODOS))
+    print(f"{'tema':<12} {'figuras':>8} {'s (soma)':>8} {'ms/figura':>10}")
+    for tema, dados in resumo["temas"].items():
+        media = dados["segundos"] / dados["figuras"] * 1000 if dados["figuras"] else 0
+        print(f"{tema:<12} {dados['figuras']:>8} {dados['segundos']:>8.1f} {media:>10.1f}")
+    print(
+        f"{resumo['figuras']} figuras de {resumo['locais']} locais em {resumo['segundos']:.1f} s "
+        f"({resumo['processos']} processos, {resumo['figuras_por_segundo']:.1f} figuras/s) → {resumo['arquivo']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
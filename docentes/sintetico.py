@@ -0,0 +1,108 @@
+"""
+Geração de dados sintéticos em escala, para medir desempenho.
+
+Uso:
+    python -m docentes.sintetico --escala 100 --destino /tmp/docentes_100x
+
+Replica os 78 municípios dos CSVs reais `escala` vezes, distribuindo as
+réplicas pelas 27 UFs (com códigos IBGE fictícios mas bem formados) e
+variando as quantidades aleatoriamente (ver `gerar_tabelas`). Os arquivos
+são gravados no mesmo formato dos CSVs do INEP, então podem ser usados
+pela aplicação com DOCENTES_PASTA_DADOS ou convertidos com
+`python -m docentes.base_colunar`.
+As exceções de validação dos dados reais (ver docentes.validacao) são
+copiadas junto, já que as réplicas herdam os mesmos problemas.
+"""
+import argparse
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from docentes.dados import PASTA_DADOS, carregar_csvs
+from docentes.temas import TEMAS
+from docentes.validacao import ARQUIVO_EXCECOES
+
+# Códigos IBGE das 27 UFs
+CODIGOS_UF = [
+    11, 12, 13, 14, 15, 16, 17,
+    21, 22, 23, 24, 25, 26, 27, 28, 29,
+    31, 32, 33, 35,
+    41, 42, 43,
+    50, 51, 52, 53,
+]
+
+
+def gerar_tabelas(tabelas, escala, semente=0):
+    """
+    Retorna um dicionário de DataFrames com os municípios de `tabelas`
+    replicados `escala` vezes. A réplica 0 mantém os dados originais; nas
+    demais, as quantidades de cada município são multiplicadas por um fator
+    aleatório entre 0,5 e 1,5.
+
+    A réplica k vai para a UF CODIGOS_UF[k % 27], com o código da UF, o
+    sufixo 50000, o bloco k // 27 (em passos da potência de 10 acima do
+    número de municípios) e a posição do município. Uma escala cujos
+    códigos passariam para a faixa da UF seguinte é recusada.
+    """
+    # Posição (a partir de 1) de cada município na lista original, a mesma
+    # em todos os temas
+    originais = sorted(set().union(*(df["Código do Município"].astype("int64") for df in tabelas.values())))
+    posicoes = pd.Series(np.arange(1, len(originais) + 1), index=originais)
+    passo = 10 ** len(str(len(originais)))
+    maior_sufixo = 50000 + (escala - 1) // len(CODIGOS_UF) * passo + len(originais)
+    if maior_sufixo >= 100000:
+        limite = ((99999 - 50000 - len(originais)) // passo + 1) * len(CODIGOS_UF)
+        raise ValueError(f"Escala {escala} grande demais para {len(originais)} municípios (no máximo {limite})")
+
+    sinteticas = {}
+    for nome, df in tabelas.items():
+        df = df.astype({"Município": str})
+        posicao = df["Código do Município"].astype("int64").map(posicoes)
+        replicas = []
+        for k in range(escala):
+            replica = df.copy()
+            if k > 0:
+                uf = CODIGOS_UF[k % len(CODIGOS_UF)]
+                replica["Município"] = replica["Município"] + f" ({k})"
+                # Sufixos a partir de 50000 não colidem com os códigos reais do ES
+                replica["Código do Município"] = uf * 100000 + 50000 + (k // len(CODIGOS_UF)) * passo + posicao
+                # O mesmo fator por município em todos os temas mantém as
+                # proporções entre as tabelas
+                fatores = np.random.default_rng([semente, k]).uniform(0.5, 1.5, size=len(originais) + 1)
+                fator = fatores[posicao.to_numpy()][:, None]
+                valores = replica[TEMAS[nome]["colunas"]].to_numpy(dtype="float64") * fator
+                replica[TEMAS[nome]["colunas"]] = np.rint(valores).astype("int64")
+            replicas.append(replica)
+        sinteticas[nome] = pd.concat(replicas, ignore_index=True)
+    return sinteticas
+
+
+def gravar_csvs(tabelas, destino):
+    """
+    Grava as tabelas no formato dos CSVs do INEP (separados por ';').
+    """
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    for nome, df in tabelas.items():
+        df.to_csv(destino / TEMAS[nome]["arquivo"], sep=';', index=False)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Gera CSVs sintéticos em escala a partir dos dados reais.")
+    parser.add_argument("--escala", type=int, default=10, help="Quantas vezes replicar os municípios")
+    parser.add_argument("--destino", required=True, help="Pasta onde os CSVs serão gravados")
+    parser.add_argument("--semente", type=int, default=0, help="Semente do gerador aleatório")
+    args = parser.parse_args(argumentos)
+
+    tabelas = gerar_tabelas(carregar_csvs(), args.escala, args.semente)
+    gravar_csvs(tabelas, args.destino)
+    if (PASTA_DADOS / ARQUIVO_EXCECOES).exists():
+        shutil.copy(PASTA_DADOS / ARQUIVO_EXCECOES, Path(args.destino) / ARQUIVO_EXCECOES)
+    for nome, df in tabelas.items():
+        print(f"{nome:<12} {len(df):>9} linhas")
+
+
+if __name__ == "__main__":
+    main()
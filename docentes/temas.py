@@ -0,0 +1,55 @@
+"""
+Definição dos cinco temas (abas) da aplicação.
+
+Cada tema informa o título da sua aba, o arquivo CSV de origem, a dimensão secundária (quando
+existe) e as colunas com as quantidades de docentes, na ordem de exibição.
+
+"percentual" define o total sobre o qual o modo percentual é calculado
+(ver docentes.indicadores): "colunas" divide cada coluna pela soma das
+colunas da linha (a participação de cada etapa, por exemplo); "dimensao"
+divide cada coluna pela soma das linhas da dimensão no mesmo local e ano
+(a participação feminina em cada faixa etária, por exemplo).
+"""
+
+# Rótulo da opção do filtro de município que exibe o total da UF
+OPCAO_GERAL = "Todos os Municípios"
+# Quantidade máxima de locais no modo de comparação
+MAXIMO_COMPARACAO = 10
+
+TEMAS = {
+    "etapas": {
+        "titulo": "📊 Etapas de Ensino",
+        "arquivo": "docentes_etapas.csv",
+        "dimensao": None,
+        "colunas": ['Creche', 'Pré-Escola', 'EF - Anos Iniciais', 'EF - Anos Finais', 'EM Propedêutico', 'EM Integrado'],
+        "percentual": "colunas",
+    },
+    "idade": {
+        "titulo": "📊 Faixa Etária e Sexo",
+        "arquivo": "docentes_idade.csv",
+        "dimensao": "Sexo",
+        "colunas": ['Até 24 anos', 'De 25 a 29 anos', 'De 30 a 39 anos', 'De 40 a 49 anos', 'De 50 a 54 anos', 'De 55 a 59 anos', '60 anos ou mais'],
+        "percentual": "dimensao",
+    },
+    "formacao": {
+        "titulo": "📊 Formação Acadêmica",
+        "arquivo": "docentes_formacao.csv",
+        "dimensao": None,
+        "colunas": ['Ensino Fundamental', 'Ensino Médio', 'Graduação - Licenciatura', 'Graduação - Sem Licenciatura', 'Especialização', 'Mestrado', 'Doutorado'],
+        "percentual": "colunas",
+    },
+    "vinculo": {
+        "titulo": "📊 Vínculo Funcional",
+        "arquivo": "docentes_vinculo.csv",
+        "dimensao": "Vínculo Funcional",
+        "colunas": ['Federal', 'Estadual', 'Municipal'],
+        "percentual": "dimensao",
+    },
+    "dependencia": {
+        "titulo": "📊 Dependência e Localização",
+        "arquivo": "docentes_dependencia.csv",
+        "dimensao": "Localização",
+        "colunas": ['Federal', 'Estadual', 'Municipal', 'Privada'],
+        "percentual": "dimensao",
+    },
+}
@@ -0,0 +1,181 @@
+"""
+Hierarquia territorial dos dados: Brasil → UF → município.
+
+A UF de cada município vem dos dois primeiros dígitos do seu código IBGE
+(7 dígitos), então não é preciso nenhuma tabela extra. Os locais são
+identificados por código em todos os níveis: 0 para o Brasil, o código
+IBGE de 2 dígitos para as UFs e o de 7 dígitos para os municípios (os
+nomes de municípios se repetem entre UFs, os códigos não).
+"""
+import unicodedata
+
+# Código e nome do nível nacional
+CODIGO_BRASIL = 0
+NOME_BRASIL = "Brasil"
+
+# Sigla e nome de cada UF, pelo código IBGE
+UFS = {
+    11: ("RO", "Rondônia"),
+    12: ("AC", "Acre"),
+    13: ("AM", "Amazonas"),
+    14: ("RR", "Roraima"),
+    15: ("PA", "Pará"),
+    16: ("AP", "Amapá"),
+    17: ("TO", "Tocantins"),
+    21: ("MA", "Maranhão"),
+    22: ("PI", "Piauí"),
+    23: ("CE", "Ceará"),
+    24: ("RN", "Rio Grande do Norte"),
+    25: ("PB", "Paraíba"),
+    26: ("PE", "Pernambuco"),
+    27: ("AL", "Alagoas"),
+    28: ("SE", "Sergipe"),
+    29: ("BA", "Bahia"),
+    31: ("MG", "Minas Gerais"),
+    32: ("ES", "Espírito Santo"),
+    33: ("RJ", "Rio de Janeiro"),
+    35: ("SP", "São Paulo"),
+    41: ("PR", "Paraná"),
+    42: ("SC", "Santa Catarina"),
+    43: ("RS", "Rio Grande do Sul"),
+    50: ("MS", "Mato Grosso do Sul"),
+    51: ("MT", "Mato Grosso"),
+    52: ("GO", "Goiás"),
+    53: ("DF", "Distrito Federal"),
+}
+
+
+def uf_do_municipio(codigo):
+    """
+    Retorna o código da UF a partir do código IBGE do município. Aceita
+    um inteiro ou uma Series/array de códigos.
+    """
+    return codigo // 100000
+
+
+def nome_uf(uf):
+    """
+    Retorna o nome da UF, ou o próprio código se ele não for conhecido.
+    """
+    return UFS.get(int(uf), (str(uf), str(uf)))[1]
+
+
+def sigla_uf(uf):
+    """
+    Retorna a sigla da UF, ou o próprio código se ele não for conhecido.
+    """
+    return UFS.get(int(uf), (str(uf), str(uf)))[0]
+
+
+def nivel_do_local(codigo):
+    """
+    Retorna o nível do local ("Brasil", "UF" ou "Município") pelo código.
+    """
+    if codigo == CODIGO_BRASIL:
+        return "Brasil"
+    if codigo < 100:
+        return "UF"
+    return "Município"
+
+
+def normalizar_para_ordenacao(texto):
+    """
+    Remove acentos de uma string para usá-la como chave de ordenação.
+    Ex: 'Águia Branca' -> 'Aguia Branca'
+    """
+    # Normaliza a string para decompor os caracteres acentuados
+    texto_normalizado = unicodedata.normalize('NFD', texto)
+    # Remove os caracteres de combinação (acentos)
+    return "".join(c for c in texto_normalizado if unicodedata.category(c) != 'Mn')
+
+
+def chave_de_busca(nome):
+    """
+    Normaliza um nome de local para buscas: sem espaços nas pontas, sem
+    acentos e sem diferença entre maiúsculas e minúsculas.
+    Ex: ' Águia Branca ' -> 'aguia branca'
+    """
+    return normalizar_para_ordenacao(str(nome).strip()).casefold()
+
+
+def montar_hierarquia(df):
+    """
+    Monta, a partir de uma tabela de municípios (com 'Código do Município'
+    e 'Município'), as listas usadas pelos filtros da barra lateral:
+
+    - "ufs": códigos das UFs presentes, em ordem alfabética do nome;
+    - "municipios": para cada UF, os códigos dos seus municípios em ordem
+      alfabética (sem considerar acentos);
+    - "todos": os códigos de todos os municípios, na mesma ordem;
+    - "chaves": o nome normalizado por `chave_de_busca` de cada município;
+    - "nomes": o nome de cada local (Brasil, UFs e municípios);
+    - "codigos": os códigos dos municípios de cada nome normalizado por
+      `chave_de_busca` (um nome pode existir em mais de uma UF);
+    - "anos": os anos presentes nos dados, do mais recente ao mais antigo;
+    - "raiz": o local exibido por padrão, o Brasil ou, se os dados
+      tiverem uma só UF, essa UF.
+    """
+    locais = df[["Código do Município", "Município"]].drop_duplicates("Código do Município")
+    codigos = locais["Código do Município"].astype("int64").tolist()
+    nomes_municipios = locais["Município"].astype(str).tolist()
+
+    nomes = {CODIGO_BRASIL: NOME_BRASIL}
+    municipios = {}
+    todos = []
+    chaves = {}
+    codigos_por_nome = {}
+    # Nomes iguais (em UFs diferentes) ficam na ordem dos códigos
+    ordem = sorted(zip(codigos, nomes_municipios), key=lambda local: (normalizar_para_ordenacao(local[1]), local[0]))
+    for codigo, nome in ordem:
+        uf = uf_do_municipio(codigo)
+        municipios.setdefault(uf, []).append(codigo)
+        todos.append(codigo)
+        chaves[codigo] = chave_de_busca(nome)
+        codigos_por_nome.setdefault(chaves[codigo], []).append(codigo)
+        nomes[codigo] = nome
+    for uf in municipios:
+        nomes[uf] = nome_uf(uf)
+
+    ufs = sorted(municipios, key=lambda uf: normalizar_para_ordenacao(nomes[uf]))
+    return {
+        "ufs": ufs,
+        "municipios": municipios,
+        "todos": todos,
+        "chaves": chaves,
+        "nomes": nomes,
+        "codigos": codigos_por_nome,
+        "anos": sorted((int(ano) for ano in df["Ano"].unique()), reverse=True),
+        "raiz": ufs[0] if len(ufs) == 1 else CODIGO_BRASIL,
+    }
+
+
+def buscar_municipios(hierarquia, nome, uf=None):
+    """
+    Retorna os códigos dos municípios com o nome informado (sem considerar
+    acentos, maiúsculas ou espaços sobrando), opcionalmente só os da UF.
+    """
+    codigos = hierarquia["codigos"].get(chave_de_busca(nome), [])
+    if uf is None:
+        return list(codigos)
+    return [codigo for codigo in codigos if uf_do_municipio(codigo) == uf]
+
+
+def filtrar_municipios(hierarquia, trecho, uf=None):
+    """
+    Busca para digitação: retorna os códigos dos municípios cujo nome
+    contém o trecho (sem considerar acentos ou maiúsculas), opcionalmente
+    só os da UF. Os nomes que começam pelo trecho vêm primeiro; dentro de
+    cada grupo, vale a ordem alfabética da hierarquia.
+    """
+    trecho = chave_de_busca(trecho)
+    candidatos = hierarquia["todos"] if uf is None else hierarquia["municipios"].get(uf, [])
+    chaves = hierarquia["chaves"]
+    no_inicio = []
+    no_meio = []
+    for codigo in candidatos:
+        posicao = chaves[codigo].find(trecho)
+        if posicao == 0:
+            no_inicio.append(codigo)
+        elif posicao > 0:
+            no_meio.append(codigo)
+    return no_inicio + no_meio
@@ -0,0 +1,415 @@
+"""
+Validação dos dados dos cinco temas antes da publicação de uma versão.
+
+Uso:
+    python -m docentes.validacao [--origem PASTA_CSV] [--relatorio ARQUIVO.csv]
+
+Todas as verificações são feitas de uma vez sobre as tabelas inteiras
+(todos os municípios e anos), com operações vetorizadas:
+
+- "valores": quantidades vazias ou negativas;
+- "duplicadas": mais de uma linha para o mesmo ano, município e valor da
+  dimensão;
+- "ausentes": municípios sem linhas num ano em algum tema (erro) ou sem
+  algum valor da dimensão (aviso);
+- "nomes": o mesmo código com nomes diferentes entre temas ou anos, mesmo
+  depois de removidos os espaços das pontas (aviso);
+- "totais_entre_temas": o total de docentes de cada tema, no município e
+  ano, fora dos limites em relação ao total do tema de referência (idade
+  e sexo, em que cada docente é contado uma única vez; nos demais, um
+  docente pode aparecer em mais de uma coluna);
+- "vinculo_dependencia": as colunas Federal, Estadual e Municipal dos
+  temas de vínculo e de dependência muito diferentes entre si;
+- "total_anual": o total de um tema no ano muito diferente do total do
+  ano anterior (um arquivo inteiro com outra unidade, por exemplo);
+- "variacao_atipica": valores de um município que se multiplicam ou se
+  dividem por FATOR_ATIPICO de um ano para o outro (aviso).
+
+Os erros impedem a publicação da versão na base colunar (ver
+docentes.base_colunar); os avisos só entram no relatório.
+
+Problemas conhecidos dos dados de origem, que não podem ser corrigidos
+aqui, ficam registrados em `validacao_excecoes.csv`, na pasta dos dados:
+cada linha traz a verificação, o tema, o ano e, opcionalmente, o código
+do município, e o motivo. Os erros que casam com uma exceção viram avisos
+com o motivo no detalhe, e continuam no relatório.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from docentes.dados import PASTA_DADOS, carregar_csvs
+from docentes.temas import TEMAS
+
+# Tema em que cada docente é contado uma única vez
+TEMA_REFERENCIA = "idade"
+# Limites do total de cada tema em relação ao total do tema de referência,
+# no mesmo município e ano (o vínculo só cobre a rede pública)
+LIMITES_TOTAIS = {
+    "etapas": (1, 4),
+    "formacao": (1, 4),
+    "vinculo": (0, 2),
+    "dependencia": (1, 2),
+}
+# Diferença absoluta tolerada nas comparações entre temas, para os
+# municípios pequenos
+TOLERANCIA_ABSOLUTA = 20
+# Colunas comuns aos temas de vínculo e de dependência, e a diferença
+# relativa tolerada entre elas (em relação ao valor da dependência)
+COLUNAS_VINCULO_DEPENDENCIA = ["Federal", "Estadual", "Municipal"]
+TOLERANCIA_RELATIVA = 0.3
+# Variação máxima do total de um tema entre dois anos consecutivos
+FATOR_TOTAL_ANUAL = 1.5
+# Variação de um valor entre dois anos consecutivos considerada atípica,
+# se a diferença for de pelo menos VARIACAO_MINIMA docentes
+FATOR_ATIPICO = 3
+VARIACAO_MINIMA = 50
+
+# Exceções registradas para problemas conhecidos dos dados de origem
+ARQUIVO_EXCECOES = "validacao_excecoes.csv"
+COLUNAS_EXCECOES = ["Verificação", "Tema", "Ano", "Código", "Motivo"]
+
+COLUNAS_RELATORIO = [
+    "Verificação", "Severidade", "Tema", "Ano", "Código", "Local", "Coluna", "Valor", "Referência", "Detalhe"
+]
+
+
+def _ocorrencias(verificacao, severidade, tema, dados, **colunas):
+    """
+    Monta as linhas do relatório de uma verificação a partir de um
+    DataFrame com parte das colunas do relatório.
+    """
+    dados = dados.reset_index(drop=True).assign(**colunas)
+    return dados.assign(**{"Verificação": verificacao, "Severidade": severidade, "Tema": tema})
+
+
+def _por_municipio(df):
+    """
+    Ano e código de cada linha, como inteiros, com os nomes do relatório.
+    """
+    return pd.DataFrame({
+        "Ano": df["Ano"].to_numpy(dtype="int64"),
+        "Código": df["Código do Município"].to_numpy(dtype="int64"),
+    })
+
+
+def _totais(df, colunas):
+    """
+    Soma as colunas por ano e município (somando também a dimensão).
+    """
+    return df.groupby(["Ano", "Código do Município"], observed=True)[colunas].sum().astype("int64")
+
+
+# --- VERIFICAÇÕES ---
+def verificar_valores(tabelas):
+    partes = []
+    for tema, df in tabelas.items():
+        colunas = TEMAS[tema]["colunas"]
+        valores = df[colunas].to_numpy(dtype="float64", na_value=np.nan)
+        linhas, posicoes = np.nonzero(np.isnan(valores) | (valores < 0))
+        if len(linhas):
+            partes.append(_ocorrencias(
+                "valores", "erro", tema, _por_municipio(df.iloc[linhas]),
+                Coluna=np.array(colunas, dtype=object)[posicoes], Valor=valores[linhas, posicoes],
+                Detalhe="quantidade vazia ou negativa"
+            ))
+    return partes
+
+
+def verificar_duplicadas(tabelas):
+    partes = []
+    for tema, df in tabelas.items():
+        dimensao = TEMAS[tema]["dimensao"]
+        chaves = ["Ano", "Código do Município"] + ([dimensao] if dimensao else [])
+        repetidas = df[df.duplicated(chaves, keep=False)].drop_duplicates(chaves)
+        if len(repetidas):
+            detalhe = "linhas repetidas"
+            if dimensao:
+                detalhe = f"linhas repetidas com {dimensao} = " + repetidas[dimensao].astype(str).to_numpy(dtype=object)
+            partes.append(_ocorrencias("duplicadas", "erro", tema, _por_municipio(repetidas), Detalhe=detalhe))
+    return partes
+
+
+def verificar_ausentes(tabelas):
+    """
+    Compara as combinações de cada tema com todos os municípios e anos
+    presentes em qualquer tema e, na dimensão, com todos os seus valores.
+    """
+    presentes = {tema: _por_municipio(df).drop_duplicates() for tema, df in tabelas.items()}
+    anos = np.unique(np.concatenate([pares["Ano"].to_numpy() for pares in presentes.values()]))
+    codigos = np.unique(np.concatenate([pares["Código"].to_numpy() for pares in presentes.values()]))
+    esperados = pd.MultiIndex.from_product([anos, codigos], names=["Ano", "Código"])
+
+    partes = []
+    for tema, df in tabelas.items():
+        faltantes = esperados.difference(pd.MultiIndex.from_frame(presentes[tema]))
+        if len(faltantes):
+            partes.append(_ocorrencias(
+                "ausentes", "erro", tema, faltantes.to_frame(index=False), Detalhe="município sem linhas no ano"
+            ))
+
+        dimensao = TEMAS[tema]["dimensao"]
+        if dimensao is None:
+            continue
+        # Cada (ano, município) do tema com cada valor da dimensão
+        pares = presentes[tema]
+        valores = df[dimensao].astype(str).unique()
+        grade = pd.DataFrame({
+            "Ano": np.repeat(pares["Ano"].to_numpy(), len(valores)),
+            "Código": np.repeat(pares["Código"].to_numpy(), len(valores)),
+            dimensao: np.tile(valores, len(pares)),
+        })
+        existentes = _por_municipio(df).assign(**{dimensao: df[dimensao].astype(str).to_numpy()})
+        grade = grade.merge(existentes.drop_duplicates(), how="left", indicator=True)
+        faltantes = grade[grade["_merge"] == "left_only"]
+        if len(faltantes):
+            partes.append(_ocorrencias(
+                "ausentes", "aviso", tema, faltantes[["Ano", "Código"]],
+                Detalhe=f"sem a linha de {dimensao} = " + faltantes[dimensao].to_numpy(dtype=object)
+            ))
+    return partes
+
+
+def verificar_nomes(tabelas):
+    """
+    Procura códigos com mais de um nome entre todos os temas e anos.
+    """
+    nomes = pd.concat([
+        df[["Código do Município", "Município"]].astype({"Município": str}).drop_duplicates()
+        for df in tabelas.values()
+    ]).drop_duplicates()
+    repetidos = nomes[nomes.duplicated("Código do Município", keep=False)]
+    if repetidos.empty:
+        return []
+    variantes = repetidos.groupby("Código do Município")["Município"].agg(lambda nomes: sorted(set(nomes)))
+    # Nomes que só diferem nos espaços internos ou nas maiúsculas
+    so_espacos = variantes.map(lambda nomes: len({" ".join(nome.split()).casefold() for nome in nomes}) == 1)
+    detalhe = np.where(so_espacos, "nomes que só diferem nos espaços ou maiúsculas: ", "nomes diferentes: ")
+    return [_ocorrencias(
+        "nomes", "aviso", None, pd.DataFrame({"Código": variantes.index.to_numpy(dtype="int64")}),
+        Detalhe=detalhe + variantes.map(" | ".join).to_numpy(dtype=object)
+    )]
+
+
+def verificar_totais_entre_temas(tabelas):
+    """
+    Compara o total de cada tema, por município e ano, com o do tema de
+    referência, dentro dos limites de LIMITES_TOTAIS.
+    """
+    referencia = _totais(tabelas[TEMA_REFERENCIA], TEMAS[TEMA_REFERENCIA]["colunas"]).sum(axis=1)
+    partes = []
+    for tema, (minimo, maximo) in LIMITES_TOTAIS.items():
+        total = _totais(tabelas[tema], TEMAS[tema]["colunas"]).sum(axis=1)
+        total, ref = total.align(referencia, join="inner")
+        fora = (total < minimo * ref - TOLERANCIA_ABSOLUTA) | (total > maximo * ref + TOLERANCIA_ABSOLUTA)
+        if fora.any():
+            indice = total.index[fora.to_numpy()]
+            partes.append(_ocorrencias(
+                "totais_entre_temas", "erro", tema,
+                pd.DataFrame({"Ano": indice.get_level_values(0).astype("int64"), "Código": indice.get_level_values(1).astype("int64")}),
+                Valor=total[fora].to_numpy(), **{"Referência": ref[fora].to_numpy()},
+                Detalhe=f"total fora de {minimo}× a {maximo}× o total de {TEMA_REFERENCIA}"
+            ))
+    return partes
+
+
+def verificar_vinculo_dependencia(tabelas):
+    colunas = COLUNAS_VINCULO_DEPENDENCIA
+    vinculo, dependencia = _totais(tabelas["vinculo"], colunas).align(_totais(tabelas["dependencia"], colunas), join="inner")
+    v, d = vinculo.to_numpy(), dependencia.to_numpy()
+    tolerancia = np.maximum(TOLERANCIA_ABSOLUTA, TOLERANCIA_RELATIVA * d)
+    linhas, posicoes = np.nonzero(np.abs(v - d) > tolerancia)
+    if not len(linhas):
+        return []
+    indice = vinculo.index[linhas]
+    return [_ocorrencias(
+        "vinculo_dependencia", "erro", "vinculo",
+        pd.DataFrame({"Ano": indice.get_level_values(0).astype("int64"), "Código": indice.get_level_values(1).astype("int64")}),
+        Coluna=np.array(colunas, dtype=object)[posicoes], Valor=v[linhas, posicoes], **{"Referência": d[linhas, posicoes]},
+        Detalhe="diferença grande para o tema dependencia"
+    )]
+
+
+def verificar_total_anual(tabelas):
+    partes = []
+    for tema, df in tabelas.items():
+        totais = df.groupby("Ano")[TEMAS[tema]["colunas"]].sum().sum(axis=1).astype("int64")
+        anos = totais.index.to_numpy(dtype="int64")
+        anteriores = totais.shift(1).to_numpy()
+        consecutivo = np.r_[False, anos[1:] == anos[:-1] + 1]
+        atual = totais.to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fora = consecutivo & ((atual > FATOR_TOTAL_ANUAL * anteriores) | (atual * FATOR_TOTAL_ANUAL < anteriores))
+        if fora.any():
+            partes.append(_ocorrencias(
+                "total_anual", "erro", tema, pd.DataFrame({"Ano": anos[fora]}),
+                Valor=atual[fora], **{"Referência": anteriores[fora]},
+                Detalhe=f"total do ano mais de {FATOR_TOTAL_ANUAL}× diferente do ano anterior"
+            ))
+    return partes
+
+
+def verificar_variacoes(tabelas):
+    """
+    Procura valores de um município que mudam mais de FATOR_ATIPICO vezes
+    (e pelo menos VARIACAO_MINIMA docentes) em relação ao ano anterior,
+    na mesma coluna e valor da dimensão.
+    """
+    partes = []
+    for tema, df in tabelas.items():
+        colunas = TEMAS[tema]["colunas"]
+        dimensao = TEMAS[tema]["dimensao"]
+        chaves = ["Código do Município"] + ([dimensao] if dimensao else [])
+        df = df.sort_values(chaves + ["Ano"], kind="stable")
+        anteriores = df.groupby(chaves, sort=False, observed=True)[colunas + ["Ano"]].shift(1)
+        consecutivo = (anteriores["Ano"].to_numpy() == df["Ano"].to_numpy() - 1)[:, None]
+        atual = df[colunas].to_numpy(dtype="float64")
+        anterior = anteriores[colunas].to_numpy(dtype="float64")
+        atipico = (
+            consecutivo
+            & (np.abs(atual - anterior) >= VARIACAO_MINIMA)
+            & ((atual > FATOR_ATIPICO * anterior) | (atual * FATOR_ATIPICO < anterior))
+        )
+        linhas, posicoes = np.nonzero(atipico)
+        if len(linhas):
+            detalhe = f"mais de {FATOR_ATIPICO}× diferente do ano anterior"
+            if dimensao:
+                detalhe = detalhe + f" ({dimensao} = " + df[dimensao].astype(str).to_numpy(dtype=object)[linhas] + ")"
+            partes.append(_ocorrencias(
+                "variacao_atipica", "aviso", tema, _por_municipio(df.iloc[linhas]),
+                Coluna=np.array(colunas, dtype=object)[posicoes], Valor=atual[linhas, posicoes],
+                **{"Referência": anterior[linhas, posicoes]}, Detalhe=detalhe
+            ))
+    return partes
+
+
+VERIFICACOES = [
+    verificar_valores,
+    verificar_duplicadas,
+    verificar_ausentes,
+    verificar_nomes,
+    verificar_totais_entre_temas,
+    verificar_vinculo_dependencia,
+    verificar_total_anual,
+    verificar_variacoes,
+]
+
+
+# --- EXCEÇÕES ---
+def ler_excecoes(pasta=PASTA_DADOS):
+    """
+    Lê as exceções registradas na pasta dos dados, ou retorna None se não
+    houver o arquivo.
+    """
+    caminho = Path(pasta) / ARQUIVO_EXCECOES
+    if not caminho.exists():
+        return None
+    excecoes = pd.read_csv(caminho, sep=";", dtype={"Verificação": str, "Tema": str, "Motivo": str})
+    faltando = set(COLUNAS_EXCECOES) - set(excecoes.columns)
+    if faltando:
+        raise ValueError(f"{caminho} sem as colunas {', '.join(sorted(faltando))}")
+    # As colunas vão na ordem de COLUNAS_EXCECOES, qualquer que seja a do arquivo
+    return excecoes[COLUNAS_EXCECOES].astype({"Ano": "Int64", "Código": "Int64"})
+
+
+def aplicar_excecoes(relatorio, excecoes):
+    """
+    Rebaixa a aviso os erros do relatório que casam com uma exceção (a
+    mesma verificação, tema e ano e, se a exceção tiver um código, o mesmo
+    município), acrescentando o motivo ao detalhe.
+    """
+    motivos = pd.Series(pd.NA, index=relatorio.index, dtype=object)
+    erros = relatorio["Severidade"] == "erro"
+    for verificacao, tema, ano, codigo, motivo in excecoes[COLUNAS_EXCECOES].itertuples(index=False, name=None):
+        casa = (
+            erros
+            & (relatorio["Verificação"] == verificacao)
+            & (relatorio["Tema"] == tema)
+            & (relatorio["Ano"] == ano)
+        )
+        if not pd.isna(codigo):
+            casa &= relatorio["Código"] == codigo
+        motivos[casa.fillna(False).to_numpy() & motivos.isna().to_numpy()] = motivo
+    registrados = motivos.notna().to_numpy()
+    relatorio.loc[registrados, "Severidade"] = "aviso"
+    relatorio.loc[registrados, "Detalhe"] = (
+        relatorio.loc[registrados, "Detalhe"].astype(str) + " (exceção registrada: " + motivos[registrados] + ")"
+    )
+    return relatorio
+
+
+# --- RELATÓRIO ---
+def validar(tabelas, excecoes=None):
+    """
+    Executa todas as verificações sobre as tabelas dos cinco temas (como
+    saem de docentes.dados) e retorna o relatório: um DataFrame com uma
+    linha por ocorrência, os erros primeiro. Os erros registrados em
+    `excecoes` (ver `ler_excecoes`) entram como avisos.
+    """
+    partes = [parte for verificar in VERIFICACOES for parte in verificar(tabelas)]
+    relatorio = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+    relatorio = relatorio.reindex(columns=COLUNAS_RELATORIO)
+
+    # Nome de cada município, do primeiro tema em que aparece
+    nomes = pd.concat([
+        df[["Código do Município", "Município"]].drop_duplicates("Código do Município") for df in tabelas.values()
+    ]).astype({"Código do Município": "int64", "Município": str}).drop_duplicates("Código do Município")
+    relatorio["Local"] = relatorio["Código"].map(nomes.set_index("Código do Município")["Município"])
+    relatorio = relatorio.astype({"Ano": "Int64", "Código": "Int64"})
+    if excecoes is not None:
+        relatorio = aplicar_excecoes(relatorio, excecoes)
+    ordem = relatorio["Severidade"].map({"erro": 0, "aviso": 1})
+    return relatorio.iloc[np.argsort(ordem.to_numpy(), kind="stable")].reset_index(drop=True)
+
+
+def tem_erros(relatorio):
+    return bool((relatorio["Severidade"] == "erro").any())
+
+
+def resumir(relatorio, exemplos=5):
+    """
+    Resume o relatório em texto: a contagem por verificação, tema e
+    severidade, com alguns exemplos de cada erro.
+    """
+    if relatorio.empty:
+        return "Nenhum problema encontrado."
+    linhas = []
+    grupos = relatorio.groupby(["Severidade", "Verificação", "Tema"], dropna=False, sort=False)
+    for (severidade, verificacao, tema), grupo in grupos:
+        linhas.append(f"{severidade:<6} {verificacao:<20} {'' if pd.isna(tema) else tema:<12} {len(grupo):>7} ocorrência(s)")
+        if severidade == "erro":
+            for _, ocorrencia in grupo.head(exemplos).iterrows():
+                campos = [f"{coluna}={ocorrencia[coluna]}" for coluna in ("Ano", "Local", "Coluna") if not pd.isna(ocorrencia[coluna])]
+                campos += [f"{coluna}={ocorrencia[coluna]:.0f}" for coluna in ("Valor", "Referência") if not pd.isna(ocorrencia[coluna])]
+                linhas.append(f"         {', '.join(campos)}: {ocorrencia['Detalhe']}")
+    return "\n".join(linhas)
+
+
+class ErroValidacao(ValueError):
+    """
+    Dados com erros de validação; `relatorio` traz todas as ocorrências.
+    """
+
+    def __init__(self, relatorio):
+        super().__init__("Os dados não passaram na validação:\n" + resumir(relatorio))
+        self.relatorio = relatorio
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Valida os CSVs dos cinco temas antes da publicação.")
+    parser.add_argument("--origem", default=PASTA_DADOS, help="Pasta com os arquivos docentes_*.csv")
+    parser.add_argument("--relatorio", help="Grava o relatório completo neste arquivo CSV")
+    args = parser.parse_args(argumentos)
+
+    relatorio = validar(carregar_csvs(args.origem), ler_excecoes(args.origem))
+    print(resumir(relatorio))
+    if args.relatorio:
+        relatorio.to_csv(args.relatorio, sep=";", index=False)
+    sys.exit(1 if tem_erros(relatorio) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,20 @@
-# Importando as bibliotecas necessárias
+# Importando as bibliotecas necessárias. Aqui ficam só os módulos leves:
+# o pandas, o pyarrow e o Plotly são importados pelas funções de carga e
+# depois que a barra lateral e o cabeçalho já foram desenhados (ver
+# CARREGAMENTO COMPLETO), para que um processo novo responda logo
+from functools import partial
+
 import streamlit as st
-import unicodedata
-import pandas as pd
-import plotly.express as px
+
+from docentes.dados import MEMORIA_COMPARTILHADA, carregar_tabelas, versao_dos_dados, versoes_dos_anos
+from docentes.inicio import gravar_inicio, ler_inicio
+from docentes.metricas import (
+    DEPURACAO, consultar_cache, contar, finalizar_rerun, iniciar_rerun, medir, resumo_contadores, texto_prometheus
+)
+from docentes.temas import MAXIMO_COMPARACAO, OPCAO_GERAL, TEMAS
+from docentes.territorio import (
+    CODIGO_BRASIL, filtrar_municipios, montar_hierarquia, nivel_do_local, sigla_uf, uf_do_municipio
+)
 
 # --- CONFIGURAÇÃO DA PÁGINA ---
 st.set_page_config(
@@ -11,81 +23,234 @@ st.set_page_config(
     layout="wide"
 )
 
+# Registra os tempos de cada etapa deste rerun (ver docentes.metricas)
+iniciar_rerun()
+
 # --- FUNÇÃO PARA CARREGAR TODOS OS DADOS ---
-@st.cache_data
-def carregar_dados():
+@st.cache_resource(max_entries=1)
+def carregar_dados(versao):
     """
-    Esta função carrega todos os 5 arquivos CSV em DataFrames separados
-    e os retorna em um dicionário para fácil acesso.
+    Esta função carrega os dados dos 5 temas em DataFrames separados e os
+    retorna em um dicionário para fácil acesso. Usa a base colunar quando
+    ela foi gerada (python -m docentes.base_colunar) e, senão, os CSVs.
+    O dicionário é compartilhado (sem cópia) entre todas as sessões do
+    processo, por isso deve ser tratado como somente leitura.
+    """
+    contar("cache_faltas_total", cache="dados")
+    return carregar_tabelas(compartilhada=MEMORIA_COMPARTILHADA)
+
+@st.cache_resource(max_entries=1)
+def carregar_cubos(versao):
+    """
+    Obtém, uma vez por versão dos dados, o cubo pré-agregado de cada tema:
+    mapeado da base colunar quando disponível, ou construído a partir dos
+    DataFrames. Também é compartilhado e somente leitura. Com
+    DOCENTES_BACKEND=sqlite, os cubos são consultados no banco
+    (docentes.banco) e os DataFrames não ficam na memória.
+    """
+    from docentes.banco import BACKEND, abrir_cubos
+    from docentes.cubos import montar_cubos
+
+    contar("cache_faltas_total", cache="cubos")
+    if BACKEND != "memoria":
+        return abrir_cubos(versao)
+    return montar_cubos(consultar_cache("dados", carregar_dados, versao), compartilhada=MEMORIA_COMPARTILHADA)
+
+@st.cache_resource(max_entries=1)
+def carregar_hierarquia(versao):
+    """
+    Obtém, uma vez por versão dos dados, as listas ordenadas de anos, de
+    UFs e de municípios de cada UF usadas nos filtros da barra lateral:
+    do instantâneo de inicialização (docentes.inicio), sem carregar os
+    cubos, ou, sem ele, a partir dos municípios do cubo de etapas, gravando
+    o instantâneo para os próximos processos.
+    """
+    contar("cache_faltas_total", cache="hierarquia")
+    hierarquia = ler_inicio(versao)
+    if hierarquia is None:
+        from docentes.cubos import consultar_municipios
+
+        hierarquia = montar_hierarquia(consultar_municipios(carregar_cubos(versao)["etapas"]))
+        try:
+            gravar_inicio(versao, hierarquia)
+        except OSError:
+            # Pasta dos dados somente leitura: cada processo monta a hierarquia
+            pass
+    return hierarquia
+
+@st.cache_resource
+def versao_anterior():
+    """
+    Guarda o último cache de figuras e a impressão digital de cada ano dos
+    dados, para que uma atualização da base reaproveite as figuras dos
+    anos que não mudaram.
+    """
+    return {}
+
+@st.cache_resource(max_entries=1)
+def carregar_cache_figuras(versao):
+    """
+    Cria, uma vez por versão dos dados, o cache de figuras compartilhado por
+    todas as sessões, herdando da versão anterior as figuras dos anos sem
+    alteração, e lendo do disco as figuras pré-calculadas da versão (python
+    -m docentes.precalculo), quando houver. Se configurado, pré-constrói em
+    segundo plano as figuras do nível mais alto (Brasil, ou a UF se houver
+    só uma) no ano mais recente.
+    """
+    from docentes.cache_figuras import AQUECER_FIGURAS, CacheFiguras, aquecer_em_segundo_plano
+    from docentes.precalculo import abrir_figuras
+
+    contar("cache_faltas_total", cache="cache_figuras")
+    cache = CacheFiguras(disco=abrir_figuras(versao))
+    versoes_anos = versoes_dos_anos()
+    anterior = versao_anterior()
+    if anterior:
+        anos_iguais = [ano for ano, impressao in versoes_anos.items() if anterior["versoes_anos"].get(ano) == impressao]
+        cache.herdar(anterior["figuras"], anos_iguais)
+    anterior.update(figuras=cache, versoes_anos=versoes_anos)
+    if AQUECER_FIGURAS:
+        cubos = carregar_cubos(versao)
+        hierarquia = carregar_hierarquia(versao)
+        aquecer_em_segundo_plano(cache, cubos, hierarquia["anos"][:1], [hierarquia["raiz"]])
+    return cache
+
+@st.cache_resource(max_entries=1)
+def carregar_cache_resultados(versao):
+    """
+    Cria, uma vez por versão dos dados, o cache de resultados das tabelas
+    (detalhamento e comparação), compartilhado por todas as sessões.
+    """
+    from docentes.cache_resultados import CacheResultados, pasta_resultados
+
+    contar("cache_faltas_total", cache="cache_resultados")
+    return CacheResultados("tabelas", pasta=pasta_resultados(versao))
+
+@st.cache_resource(max_entries=1)
+def carregar_pasta_exportacoes(versao):
+    """
+    Prepara, uma vez por versão dos dados, a pasta onde os arquivos
+    exportados são guardados e reaproveitados entre as sessões.
+    """
+    from docentes.exportacao import pasta_exportacoes
+
+    contar("cache_faltas_total", cache="pasta_exportacoes")
+    return pasta_exportacoes(versao)
+
+def dados_nao_encontrados(e):
+    """
+    Avisa que um arquivo de dados não foi encontrado e interrompe o rerun.
     """
-    # Nomes dos arquivos
-    nomes_arquivos = {
-        "dependencia": "docentes_dependencia.csv",
-        "etapas": "docentes_etapas.csv",
-        "formacao": "docentes_formacao.csv",
-        "idade": "docentes_idade.csv",
-        "vinculo": "docentes_vinculo.csv"
-    }
-    
-    dataframes = {}
-    for nome, caminho in nomes_arquivos.items():
-        # Carrega cada dataframe usando ';' como separador
-        df = pd.read_csv(caminho, delimiter=';')
-        df.columns = df.columns.str.strip()
-        dataframes[nome] = df
-            
-    return dataframes
-
-# Carrega todos os dataframes
-try:
-    dfs = carregar_dados()
-except FileNotFoundError as e:
     st.error(f"Erro ao carregar os dados: O arquivo {e.filename} não foi encontrado.")
     st.info("Por favor, certifique-se de que todos os 5 arquivos CSV estão na mesma pasta que o app.py.")
     st.stop()
 
-# --- DEFININDO BARRA LATERAL COM FILTROS (Ano e Município) ---
+# Só a hierarquia, para os filtros; os cubos são carregados depois de
+# desenhados a barra lateral e o cabeçalho
+try:
+    with medir("versao_dos_dados"):
+        versao = versao_dos_dados()
+    hierarquia = consultar_cache("hierarquia", carregar_hierarquia, versao)
+except FileNotFoundError as e:
+    dados_nao_encontrados(e)
 
-# Definindo função auxiliar para normalizar texto para ordenação
-def normalizar_para_ordenacao(texto):
-    """
-    Remove acentos de uma string para usá-la como chave de ordenação.
-    Ex: 'Águia Branca' -> 'Aguia Branca'
-    """
-    # Normaliza a string para decompor os caracteres acentuados
-    texto_normalizado = unicodedata.normalize('NFD', texto)
-    # Remove os caracteres de combinação (acentos)
-    return "".join(c for c in texto_normalizado if unicodedata.category(c) != 'Mn')
+# --- DEFININDO BARRA LATERAL COM FILTROS (Ano, UF e Município) ---
 
 # Foi usado o dataframe de 'etapas' como base para criar os filtros.
 st.sidebar.header("⚙️ Filtros")
 st.sidebar.markdown("Use os filtros abaixo para selecionar o ano e o município desejados.")
 
 # --- Filtro de Ano ---
+# Os anos vêm da hierarquia, já ordenados do mais recente ao mais antigo
 ano_selecionado = st.sidebar.selectbox(
     "Selecione o Ano",
-    options=sorted(
-                    dfs['etapas']['Ano'].unique(), 
-                    reverse=True
-                  )
+    options=hierarquia["anos"],
+    key="filtro_ano"
+)
+
+# Os filtros de UF e de município trabalham com códigos; os nomes exibidos
+# vêm da hierarquia, montada uma vez por versão dos dados
+nomes_locais = hierarquia["nomes"]
+
+# --- Filtro de UF (só aparece quando os dados têm mais de uma UF) ---
+if len(hierarquia["ufs"]) > 1:
+    uf_selecionada = st.sidebar.selectbox(
+        "Selecione a UF",
+        options=[CODIGO_BRASIL] + hierarquia["ufs"],
+        format_func=lambda codigo: nomes_locais[codigo],
+        key="filtro_uf"
+    )
+else:
+    uf_selecionada = hierarquia["raiz"]
+
+# --- Busca de Município ---
+# Busca sem diferenciar acentos e maiúsculas, sobre os nomes já
+# normalizados na hierarquia; com o Brasil selecionado, busca em todas as UFs
+busca = st.sidebar.text_input(
+    "Buscar município",
+    placeholder="Digite parte do nome",
+    key="busca_municipio"
 )
 
+def rotulo_municipio(codigo):
+    """
+    Nome do município exibido no filtro; na busca nacional, com a sigla da
+    UF, já que nomes de municípios se repetem entre UFs.
+    """
+    if uf_selecionada == CODIGO_BRASIL:
+        return f"{nomes_locais[codigo]} ({sigla_uf(uf_do_municipio(codigo))})"
+    return nomes_locais[codigo]
+
 # --- Filtro de Município ---
-# Criando a opção geral
-opcao_geral = ["Todos os Municípios"]
-# Criando uma lista ordenada dos municípios
-lista_municipios = sorted(
-    dfs['etapas']['Município'].unique(),
-    key=normalizar_para_ordenacao # Usando a função de normalização
+# A opção geral corresponde ao total da UF (ou do Brasil), já somado no cubo
+if busca:
+    municipios = filtrar_municipios(hierarquia, busca, None if uf_selecionada == CODIGO_BRASIL else uf_selecionada)
+    if not municipios:
+        st.sidebar.caption("Nenhum município encontrado.")
+elif uf_selecionada != CODIGO_BRASIL:
+    municipios = hierarquia["municipios"][uf_selecionada]
+else:
+    municipios = None
+
+if municipios is None:
+    local_selecionado = CODIGO_BRASIL
+else:
+    local_selecionado = st.sidebar.selectbox(
+        "Selecione o Município",
+        options=[uf_selecionada] + municipios,
+        format_func=lambda codigo: OPCAO_GERAL if codigo == uf_selecionada else rotulo_municipio(codigo),
+        key="filtro_municipio"
     )
-# Juntando as duas listas!
-opcoes_municipios = opcao_geral + lista_municipios
 
-# Usamos a nova lista completa como opções do selectbox
-municipio_selecionado = st.sidebar.selectbox(
-    "Selecione o Município",
-    options=opcoes_municipios
-)
+# --- Modo de Comparação ---
+# Com locais escolhidos, todas as abas passam a compará-los lado a lado
+comparar = st.sidebar.toggle("Comparar locais", key="modo_comparacao")
+locais_comparacao = []
+if comparar:
+    if len(hierarquia["ufs"]) > 1:
+        opcoes_comparacao = [CODIGO_BRASIL] + hierarquia["ufs"] + hierarquia["todos"]
+    else:
+        opcoes_comparacao = [hierarquia["raiz"]] + hierarquia["todos"]
+
+    def rotulo_comparacao(codigo):
+        """
+        Nome do local na comparação; municípios levam a sigla da UF
+        quando os dados têm mais de uma UF.
+        """
+        if nivel_do_local(codigo) == "Município" and len(hierarquia["ufs"]) > 1:
+            return f"{nomes_locais[codigo]} ({sigla_uf(uf_do_municipio(codigo))})"
+        return nomes_locais[codigo]
+
+    locais_comparacao = st.sidebar.multiselect(
+        "Selecione os locais para comparar",
+        options=opcoes_comparacao,
+        format_func=rotulo_comparacao,
+        max_selections=MAXIMO_COMPARACAO,
+        key="filtro_comparacao"
+    )
+
+# --- Exportação ---
+# Preenchida depois de carregados os cubos (ver CARREGAMENTO COMPLETO)
+barra_exportacao = st.sidebar.container()
 
 # --- CORPO PRINCIPAL DO APP ---
 
@@ -119,483 +284,91 @@ st.markdown("---")
 # --- CRIAÇÃO DAS ABAS TEMÁTICAS (TABS) ---
 st.subheader(f"Exibindo dados de quantidade de docentes, segundo o município e o ano selecionados.")
 
-# Nomeando as abas temáticas
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "📊 Etapas de Ensino",
-    "📊 Faixa Etária e Sexo",
-    "📊 Formação Acadêmica",
-    "📊 Vínculo Funcional",
-    "📊 Dependência e Localização"
-])
-
-# --- ABA 1: ETAPAS DE ENSINO ---
-with tab1:
-    st.markdown("#### Docentes por Etapa de Ensino")
-    df_etapas = dfs["etapas"]
-
-    # --- Definindo containers dentro da aba ---
-    # Container para o gráfico de barras
-    c1 = st.container(border=True)
-
-    # Selecionando as colunas para o gráfico
-    colunas_etapas = ['Creche', 'Pré-Escola', 'EF - Anos Iniciais', 'EF - Anos Finais', 'EM Propedêutico', 'EM Integrado']
-    
-    # Estabelecendo a lógica para o gráfico, conforme o filtro de município
-    if municipio_selecionado == "Todos os Municípios":
-        # SE o usuário escolher ver o estado todo:
-        # 1. Filtrar o DataFrame apenas pelo ano
-        df_filtrado = df_etapas[df_etapas['Ano'] == ano_selecionado]
-        # 2. Somar os valores de todos os municípios, resultando em uma série
-        dados_base = df_filtrado[colunas_etapas].sum()
-        # 3. Transformar a série em um DataFrame longo
-        dados_grafico = dados_base.reset_index()
-        dados_grafico.columns = ['Etapa de Ensino', 'Quant. de Docentes']
-
-    else:
-        # SENÃO (o usuário escolheu um município específico)...
-        # 1. Filtrar o DataFrame pelo ano E pelo município
-        df_filtrado = df_etapas[
-            (df_etapas['Ano'] == ano_selecionado) &
-            (df_etapas['Município'] == municipio_selecionado)
-        ]
-        # 2. TRANSFORMA a tabela larga em longa usando .melt()
-        dados_grafico = df_filtrado[colunas_etapas].melt(var_name='Etapa de Ensino', value_name='Quant. de Docentes')
-
-    # Gerando o gráfico    
-    if not dados_grafico.empty:
-            # Parametrizando o px.bar
-            fig = px.bar(
-                            dados_grafico, 
-                            x='Etapa de Ensino', 
-                            y='Quant. de Docentes', 
-                            color='Etapa de Ensino',
-                            text_auto=True, 
-                            title=f"Docentes por Etapa de Ensino em {municipio_selecionado} ({ano_selecionado})"
-                        )
-            # Adicionando a formatação de números brasileiros
-            fig.update_layout(
-                                separators=',.',
-                                showlegend=False
-                            )
-            fig.update_yaxes(tickformat=",.0f")
-            
-            c1.plotly_chart(fig, use_container_width=True)    
-    else:
-            c1.warning("Nenhum dado encontrado para a seleção atual.")
-        
-    # Exibindo o dataframe filtrado correspondente
-    with c1.expander("Ver tabela de dados"):
-        st.dataframe(df_filtrado)    
-
-    # --- Container 2: Gráfico de Linhas (a evolução temporal) ---
-    st.markdown("---") # Linha divisória
-    c1t = st.container(border=True)
-    c1t.markdown("##### Análise da Evolução Temporal (2022-2024)")
-
-    # 1. Preparando os dados para a análise temporal
-    if municipio_selecionado == "Todos os Municípios":
-        # Se for o estado todo, agrupamos por ano e somamos
-        dados_temporais = df_etapas.groupby('Ano')[colunas_etapas].sum()
-    else:
-        # Se for um município, filtramos e definimos o ano como índice
-        dados_temporais = df_etapas[df_etapas['Município'] == municipio_selecionado].set_index('Ano')[colunas_etapas]
-    
-    # 2. Criamos o FILTRO para a etapa de ensino que você sugeriu
-    col_filtro, col_vazia = c1t.columns([2, 3])
-    with col_filtro:
-        etapa_selecionada = st.selectbox(
-            "Selecione a Etapa para ver a tendência:",
-            options=colunas_etapas
-        )
-    
-    # 3. Selecionamos apenas a coluna (etapa) que o usuário escolheu
-    dados_linha = dados_temporais[[etapa_selecionada]] # Usar colchetes duplos mantém como DataFrame
-
-    # 4. Usamos px.line com formatação ---
-if not dados_linha.empty:
-    # Criando a figura base com Plotly Express
-    fig_linha = px.line(
-                        dados_linha,
-                        markers=True, # Adiciona pontos sobre a linha para destacar os anos
-                        labels={'value': 'Quant. de Docentes', 'Ano': 'Ano'}
-                    )
-
-    # Formata os separadores para o padrão brasileiro
-    fig_linha.update_layout(separators=',.',showlegend=False)
-    
-    # Formata o eixo Y (quantidade) para ter separador de milhar e sem decimais
-    fig_linha.update_yaxes(tickformat=",.0f")
-    
-    # Formata o eixo X (ano) para mostrar apenas os números inteiros
-    # O 'd' em tickformat significa 'decimal integer'
-    fig_linha.update_xaxes(tickformat='d', tickvals=dados_temporais.index)
-
-    # Exibindo a figura do Plotly
-    c1t.plotly_chart(fig_linha, use_container_width=True)
-else:
-    c1t.warning("Nenhum dado encontrado para a seleção.")
-
-    # Mensagem explicativa sobre os dados
-    st.info("O mesmo docente pode ser contabilizado mais de uma vez, por atuar em diferentes etapas de ensino.")
-
-# --- ABA 2: FAIXA ETÁRIA E SEXO ---
-with tab2:
-    st.markdown("#### Docentes por Faixa Etária e Sexo")
-    df_idade = dfs["idade"]
-
-    c2 = st.container(border=True)
-
-    colunas_idade = ['Até 24 anos', 'De 25 a 29 anos', 'De 30 a 39 anos', 'De 40 a 49 anos', 'De 50 a 54 anos', 'De 55 a 59 anos', '60 anos ou mais']
-
-    # Lógica de preparação de dados
-    if municipio_selecionado == "Todos os Municípios":
-        df_filtrado = df_idade[df_idade['Ano'] == ano_selecionado]
-        dados_base = df_filtrado.groupby('Sexo')[colunas_idade].sum().reset_index()
-    else:
-        dados_base = df_idade[
-            (df_idade['Ano'] == ano_selecionado) &
-            (df_idade['Município'] == municipio_selecionado)
-        ]
-
-    # Transformação com .melt()
-    dados_grafico = dados_base.melt(
-        id_vars=['Sexo'], 
-        value_vars=colunas_idade, 
-        var_name='Faixa Etária', 
-        value_name='Quant. de Docentes'
-    )
-
-    # Ordenação correta das categorias
-    ordem_faixa_etaria = ['Até 24 anos', 'De 25 a 29 anos', 'De 30 a 39 anos', 'De 40 a 49 anos', 'De 50 a 54 anos', 'De 55 a 59 anos', '60 anos ou mais']
-    dados_grafico['Faixa Etária'] = pd.Categorical(dados_grafico['Faixa Etária'], categories=ordem_faixa_etaria, ordered=True)
-
-    # Gerando o gráfico
-    if not dados_grafico.empty:
-        fig = px.bar(
-            dados_grafico,
-            x='Faixa Etária',
-            y='Quant. de Docentes',
-            color='Sexo',
-            barmode='group',
-            text_auto=True,
-            title=f"Docentes por Faixa Etária e Sexo em {municipio_selecionado} ({ano_selecionado})"
-        )
-        fig.update_layout(separators=',.')
-        fig.update_yaxes(tickformat=",.0f")
-        c2.plotly_chart(fig, use_container_width=True)
-    else:
-        c2.warning("Nenhum dado encontrado para a seleção atual.")
-
-    with c2.expander("Ver tabela de dados"):
-        st.dataframe(dados_base)
-
-    # --- Container 2: Gráfico de Linhas (Evolução Temporal) ---
-    st.markdown("---")
-    c2t = st.container(border=True)
-    c2t.markdown("##### Análise Comparativa da Evolução Temporal (Feminino vs. Masculino), por Faixa Etária")
-
-    colunas_idade = ['Até 24 anos', 'De 25 a 29 anos', 'De 30 a 39 anos', 'De 40 a 49 anos', 'De 50 a 54 anos', 'De 55 a 59 anos', '60 anos ou mais']
-
-    # Preparamos os dados base
-    if municipio_selecionado == "Todos os Municípios":
-        dados_base = df_idade
-    else:
-        dados_base = df_idade[df_idade['Município'] == municipio_selecionado]
-
-    # Adicionamos o filtro para a Faixa Etária
-    col_filtro, col_vazia = c2t.columns([2, 3])
-    with col_filtro:
-        idade_selecionada = st.selectbox(
-            "Selecione a Faixa Etária para Análise:",
-            options=colunas_idade,
-            key="filtro_idade_linha_final"
-        )
-
-    # Agrupamos por Ano E Sexo, selecionando e somando a coluna da idade escolhida
-    dados_agrupados = dados_base.groupby(['Ano', 'Sexo'])[idade_selecionada].sum()
-
-    # O .unstack() transforma 'Feminino' e 'Masculino' em colunas
-    dados_para_plotar = dados_agrupados.unstack()
-
-    # Gerando o Gráfico
-    if not dados_para_plotar.empty:
-        fig_linha = px.line(
-            dados_para_plotar,
-            markers=True,
-            labels={'value': f'Quant. de Docentes ({idade_selecionada})', 'Ano': 'Ano', 'variable': 'Sexo'}
-        )
-        fig_linha.update_layout(separators=',.')
-        fig_linha.update_yaxes(tickformat=",.0f")
-        fig_linha.update_xaxes(tickformat='d', tickvals=dados_para_plotar.index)
-        
-        c2t.plotly_chart(fig_linha, use_container_width=True)
-    else:
-        c2t.warning("Nenhum dado encontrado para a seleção.")
-
-# --- ABA 3: NÍVEL DE FORMAÇÃO ---
-with tab3:
-    st.markdown("#### Docentes por Escolaridade ou Nível de Formação Acadêmica")
-    df_formacao = dfs["formacao"]
-
-    c3 = st.container(border=True)
-
-    colunas_formacao = ['Ensino Fundamental', 'Ensino Médio', 'Graduação - Licenciatura', 'Graduação - Sem Licenciatura', 'Especialização', 'Mestrado', 'Doutorado']
-
-    if municipio_selecionado == "Todos os Municípios":
-        df_filtrado = df_formacao[df_formacao['Ano'] == ano_selecionado]
-        dados_base = df_filtrado[colunas_formacao].sum()
-        dados_para_plotar = dados_base.reset_index()
-        dados_para_plotar.columns = ['Formação Acadêmica', 'Quant. de Docentes']
-    else:
-        df_filtrado = df_formacao[
-            (df_formacao['Ano'] == ano_selecionado) &
-            (df_formacao['Município'] == municipio_selecionado)
-        ]
-        dados_para_plotar = df_filtrado[colunas_formacao].melt(var_name='Formação Acadêmica', value_name='Quant. de Docentes')
-
-    # Ordenação correta das categorias
-    ordem_formacao = ['Ensino Fundamental', 'Ensino Médio', 'Graduação - Licenciatura', 'Graduação - Sem Licenciatura', 'Especialização', 'Mestrado', 'Doutorado']
-    dados_para_plotar['Formação Acadêmica'] = pd.Categorical(dados_para_plotar['Formação Acadêmica'], categories=ordem_formacao, ordered=True)
-    dados_para_plotar = dados_para_plotar.sort_values('Formação Acadêmica')
-
-    if not dados_para_plotar.empty:
-        fig = px.bar(
-            dados_para_plotar,
-            x='Quant. de Docentes',
-            y='Formação Acadêmica',
-            color='Formação Acadêmica',
-            orientation='h',
-            text_auto=True,
-            title=f"Docentes por Escolaridade ou Formação Acadêmica em {municipio_selecionado} ({ano_selecionado})"
-        )
-        fig.update_layout(separators=',.', showlegend=False)
-        fig.update_xaxes(tickformat=",.0f")
-        c3.plotly_chart(fig, use_container_width=True)
-    else:
-        c3.warning("Nenhum dado encontrado para a seleção atual.")
-    
-    with c3.expander("Ver tabela de dados"):
-        st.dataframe(df_filtrado)
-
-    # --- Container 2: Gráfico de Linhas (Evolução Temporal) ---
-    st.markdown("---")
-    c3t = st.container(border=True)
-    c3t.markdown("##### Análise da Evolução Temporal por Nível de Formação")
-
-    colunas_formacao = ['Ensino Fundamental', 'Ensino Médio', 'Graduação - Licenciatura', 'Graduação - Sem Licenciatura', 'Especialização', 'Mestrado', 'Doutorado']
-
-    if municipio_selecionado == "Todos os Municípios":
-        dados_temporais = df_formacao.groupby('Ano')[colunas_formacao].sum()
-    else:
-        dados_temporais = df_formacao[df_formacao['Município'] == municipio_selecionado].groupby('Ano')[colunas_formacao].sum()
-        
-    col_filtro, col_vazia = c3t.columns([1, 1])
-    with col_filtro:
-        formacao_selecionada = st.selectbox(
-            "Selecione o Nível de Formação para ver a tendência:",
-            options=colunas_formacao,
-            key="filtro_formacao_linha"
-        )
-        
-    dados_linha = dados_temporais[[formacao_selecionada]]
-
-    if not dados_linha.empty:
-        fig_linha = px.line(dados_linha, markers=True, labels={'value': 'Quant. de Docentes', 'Ano': 'Ano'})
-        fig_linha.update_layout(separators=',.', showlegend=False)
-        fig_linha.update_yaxes(tickformat=",.0f")
-        fig_linha.update_xaxes(tickformat='d', tickvals=dados_temporais.index)
-        c3t.plotly_chart(fig_linha, use_container_width=True)
-    else:
-        c3t.warning("Nenhum dado encontrado para a seleção.")
-
-# --- ABA 4: VÍNCULO FUNCIONAL ---
-with tab4:
-    st.markdown("#### Docentes por Vínculo Funcional e Dependência Administrativa")
-    df_vinculo = dfs["vinculo"]
-
-    c4 = st.container(border=True)
-    colunas_vinculo = ['Federal', 'Estadual', 'Municipal']
-
-    if municipio_selecionado == "Todos os Municípios":
-        df_filtrado = df_vinculo[df_vinculo['Ano'] == ano_selecionado]
-        dados_base = df_filtrado.groupby('Vínculo Funcional')[colunas_vinculo].sum().reset_index()
-    else:
-        dados_base = df_vinculo[
-            (df_vinculo['Ano'] == ano_selecionado) &
-            (df_vinculo['Município'] == municipio_selecionado)
-        ]
-
-    dados_para_plotar = dados_base.melt(
-        id_vars=['Vínculo Funcional'], 
-        value_vars=colunas_vinculo, 
-        var_name='Dependência Administrativa', 
-        value_name='Quant. de Docentes'
-    )
-    dados_para_plotar = dados_para_plotar[dados_para_plotar['Quant. de Docentes'] > 0]
-
-    if not dados_para_plotar.empty:
-        fig = px.bar(
-            dados_para_plotar,
-            x='Quant. de Docentes',
-            y='Vínculo Funcional',
-            color='Dependência Administrativa',
-            facet_col='Dependência Administrativa',
-            facet_col_spacing=0.05, # Usando o parâmetro correto de espaçamento
-            orientation='h',
-            text_auto=True,
-            title=f"Docentes por Vínculo em {municipio_selecionado} ({ano_selecionado})"
-        )
-        fig.for_each_annotation(lambda a: a.update(text="")) # Remove títulos dos subplots
-        fig.update_layout(separators=',.')
-        fig.update_xaxes(tickformat=",.0f", title_text="Quantidade de Docentes")
-        c4.plotly_chart(fig, use_container_width=True)
-    else:
-        c4.warning("Nenhum dado encontrado para a seleção atual.")
-    
-    with c4.expander("Ver tabela de dados"):
-        st.dataframe(dados_base)
-
-    # --- Container 2: Gráfico de Linhas (Evolução Temporal) ---
-    st.markdown("---")
-    c4t = st.container(border=True)
-    c4t.markdown("##### Análise Comparativa da Evolução Temporal (Dependências Administrativas), por Vínculo Funcional")
-
-    colunas_dependencia = ['Federal', 'Estadual', 'Municipal']
-
-    # Preparamos os dados base
-    if municipio_selecionado == "Todos os Municípios":
-        dados_base = df_vinculo
-    else:
-        dados_base = df_vinculo[df_vinculo['Município'] == municipio_selecionado]
-
-    # Adicionamos o filtro para o Vínculo Funcional
-    lista_vinculos = dados_base['Vínculo Funcional'].unique().tolist()
-    col_filtro, col_vazia = c4t.columns([2, 3])
-    with col_filtro:
-        vinculo_selecionado = st.selectbox(
-            "Selecione o Vínculo para Análise:",
-            options=lista_vinculos,
-            key="filtro_vinculo_linha_final"
-        )
-
-    # Filtramos primeiro pelo vínculo selecionado
-    dados_filtrados_vinculo = dados_base[dados_base['Vínculo Funcional'] == vinculo_selecionado]
-
-    # Agora, agrupamos por Ano e somamos as colunas de dependência
-    dados_para_plotar = dados_filtrados_vinculo.groupby('Ano')[colunas_dependencia].sum()
-
-    # Gerando o Gráfico
-    if not dados_para_plotar.empty:
-        # O Plotly criará uma linha para cada coluna (Federal, Estadual, Municipal)
-        fig_linha = px.line(
-            dados_para_plotar,
-            markers=True,
-            labels={'value': f'Quant. de Docentes ({vinculo_selecionado})', 'Ano': 'Ano', 'variable': 'Dependência'}
-        )
-        fig_linha.update_layout(separators=',.')
-        fig_linha.update_yaxes(tickformat=",.0f")
-        fig_linha.update_xaxes(tickformat='d', tickvals=dados_para_plotar.index)
-        
-        c4t.plotly_chart(fig_linha, use_container_width=True)
-    else:
-        c4t.warning("Nenhum dado encontrado para a seleção.")
-
-    # Mensagem explicativa sobre os dados
-    st.info("O mesmo docente pode ser contabilizado mais de uma vez, por atuar com mais de um vínculo.")
-
-# --- ABA 5: DEPENDÊNCIA E LOCALIZAÇÃO ---
-with tab5:
-    st.markdown("#### Docentes por Dependência Administrativa e Localização")
-    df_dependencia = dfs["dependencia"]
-
-    c5 = st.container(border=True)
-    colunas_dependencia = ['Federal', 'Estadual', 'Municipal', 'Privada']
+# Nomeando as abas temáticas. Com on_change="rerun" o Streamlit acompanha a
+# aba aberta, e só o conteúdo dela é calculado e enviado ao navegador.
+abas = st.tabs(
+    [tema["titulo"] for tema in TEMAS.values()],
+    key="aba_selecionada",
+    on_change="rerun"
+)
 
-    if municipio_selecionado == "Todos os Municípios":
-        df_filtrado = df_dependencia[df_dependencia['Ano'] == ano_selecionado]
-        dados_base = df_filtrado.groupby('Localização')[colunas_dependencia].sum().reset_index()
-    else:
-        dados_base = df_dependencia[
-            (df_dependencia['Ano'] == ano_selecionado) &
-            (df_dependencia['Município'] == municipio_selecionado)
-        ]
-
-    dados_para_plotar = dados_base.melt(
-        id_vars=['Localização'], 
-        value_vars=colunas_dependencia, 
-        var_name='Dependência', 
-        value_name='Quant. de Docentes'
+# --- CARREGAMENTO COMPLETO ---
+# Num processo novo, a barra lateral, o cabeçalho e as abas já estão no
+# navegador; aqui são importados o pandas e o Plotly e carregados os cubos
+# (e, com eles, os dataframes, se forem mantidos em memória). Nos demais
+# reruns, tudo já está carregado e isto leva microssegundos.
+with st.spinner("Carregando os dados..."):
+    from docentes.abas import (
+        ABAS, CHAVES_FILTROS, aba_comparacao, botao_exportacao, link_exportacao, mapa_do_tema, seletor_modo
     )
+    from docentes.exportacao import FORMATOS, arquivo_exportacao_completa, formatos_disponiveis, nome_exportacao_completa
+    from docentes.indicadores import visao
+
+    try:
+        cubos = consultar_cache("cubos", carregar_cubos, versao)
+        figuras = consultar_cache("cache_figuras", carregar_cache_figuras, versao)
+        resultados = consultar_cache("cache_resultados", carregar_cache_resultados, versao)
+        pasta_exportacao = consultar_cache("pasta_exportacoes", carregar_pasta_exportacoes, versao)
+    except FileNotFoundError as e:
+        dados_nao_encontrados(e)
+
+# O formato vale para o botão de cada aba e para a exportação completa,
+# que traz todos os locais, anos e temas num ZIP com um arquivo por tema
+formato_exportacao = barra_exportacao.selectbox(
+    "Formato de exportação",
+    options=formatos_disponiveis(),
+    format_func=lambda formato: FORMATOS[formato]["rotulo"],
+    key="formato_exportacao"
+)
+link_exportacao(
+    barra_exportacao,
+    pasta_exportacao / nome_exportacao_completa(formato_exportacao),
+    "Exportar todos os dados",
+    partial(arquivo_exportacao_completa, pasta_exportacao, cubos, formato_exportacao),
+    "exportar_tudo"
+)
 
-    if not dados_para_plotar.empty:
-        fig = px.bar(
-            dados_para_plotar,
-            x='Localização',
-            y='Quant. de Docentes',
-            color='Dependência',
-            barmode='group',
-            text_auto=True,
-            title=f"Docentes por Localização e Dependência em {municipio_selecionado} ({ano_selecionado})"
-        )
-        fig.update_layout(separators=',.')
-        fig.update_yaxes(tickformat=",.0f")
-        c5.plotly_chart(fig, use_container_width=True)
-    else:
-        c5.warning("Nenhum dado encontrado para a seleção atual.")
-
-    with c5.expander("Ver tabela de dados"):
-        st.dataframe(dados_base)
-    
-    # --- Container 2: Gráfico de Linhas (Evolução Temporal) ---
-    st.markdown("---")
-    c5t = st.container(border=True)
-    c5t.markdown("##### Análise Comparativa da Evolução Temporal (Urbana vs. Rural), por Dependência Administrativa")
-
-    colunas_dependencia = ['Federal', 'Estadual', 'Municipal', 'Privada']
-
-    # Preparamos os dados base (Estado ou Município)
-    if municipio_selecionado == "Todos os Municípios":
-        dados_base = df_dependencia
-    else:
-        dados_base = df_dependencia[df_dependencia['Município'] == municipio_selecionado]
-
-    # Filtro de dependência administrativa
-    col_filtro, col_vazia = c5t.columns([2, 3])
-    with col_filtro:
-        dependencia_selecionada = st.selectbox(
-            "Selecione a Dependência para Análise:",
-            options=colunas_dependencia,
-            key="filtro_dependencia_linha"
-        )
-
-    # --- PREPARAÇÃO DOS DADOS COM BASE NA DEPENDÊNCIA SELECIONADA ---
-
-    # Selecionando APENAS a coluna da dependência que o usuário escolheu e somamos
-    dados_agrupados = dados_base.groupby(['Ano', 'Localização'])[dependencia_selecionada].sum()
-
-    # 3. Transformando as localizações 'Urbana' e 'Rural' em colunas, com .unstack()
-    dados_para_plotar = dados_agrupados.unstack()
-
-    # --- Gerando o Gráfico ---
-    if dados_para_plotar.empty:
-        c5t.warning("Nenhum dado encontrado para a seleção atual.")
-    else:
-        # O Plotly cria automaticamente uma linha para 'Urbana' e outra para 'Rural'
-        fig_linha = px.line(
-            dados_para_plotar,
-            markers=True,
-            labels={'value': f'Quant. de Docentes (Rede {dependencia_selecionada})', 'Ano': 'Ano', 'variable': 'Localização'}
-        )
-
-        fig_linha.update_layout(separators=',.')
-        fig_linha.update_yaxes(tickformat=",.0f")
-        fig_linha.update_xaxes(tickformat='d', tickvals=dados_para_plotar.index)
-        
-        c5t.plotly_chart(fig_linha, use_container_width=True)
-
-    # Mensagem explicativa sobre os dados
-    st.info("O mesmo docente pode ser contabilizado mais de uma vez, por atuar em mais de uma localização e/ou dependência administrativa.")
+# Mantendo a seleção dos filtros internos das abas que estão fechadas
+for chave in CHAVES_FILTROS:
+    if chave in st.session_state:
+        st.session_state[chave] = st.session_state[chave]
+
+aba_aberta = None
+for aba, (nome, renderizar_aba) in zip(abas, ABAS.items()):
+    if aba.open:
+        aba_aberta = nome
+        with aba, medir("aba", tema=nome):
+            if locais_comparacao:
+                aba_comparacao(nome, cubos[nome], ano_selecionado, locais_comparacao, figuras, resultados)
+                local_exportado = tuple(locais_comparacao)
+            else:
+                modo = seletor_modo(nome)
+                renderizar_aba(visao(cubos[nome], modo), ano_selecionado, local_selecionado, figuras, resultados)
+                mapa_do_tema(nome, visao(cubos[nome], modo), ano_selecionado, local_selecionado, figuras)
+                local_exportado = local_selecionado
+            botao_exportacao(nome, cubos[nome], ano_selecionado, local_exportado, formato_exportacao, pasta_exportacao)
 
 # --- RODAPÉ DA APLICAÇÃO ---
 st.markdown("---")
-st.markdown("© 2025 DocentES. Desenvolvido por Farley C. Sardinha. Todos os direitos reservados.")
\ No newline at end of file
+st.markdown("© 2025 DocentES. Desenvolvido por Farley C. Sardinha. Todos os direitos reservados.")
+
+# --- PAINEL DE DEPURAÇÃO (DOCENTES_DEPURACAO=1) ---
+etapas_rerun = finalizar_rerun(aba=aba_aberta, comparacao=bool(locais_comparacao))
+if DEPURACAO:
+    with st.sidebar.expander("Depuração: tempos deste rerun"):
+        total = sum(etapa["duracao_ms"] for etapa in etapas_rerun if etapa["nivel"] == 0)
+        st.caption(f"{len(etapas_rerun)} etapas medidas, {total:.1f} ms nas etapas de primeiro nível")
+        st.dataframe(
+            [{**etapa, "etapa": "  " * etapa["nivel"] + etapa["etapa"]} for etapa in etapas_rerun],
+            hide_index=True
+        )
+        st.markdown("**Contadores do processo**")
+        st.dataframe(resumo_contadores(), hide_index=True)
+        st.download_button(
+            "Baixar métricas (Prometheus)",
+            data=texto_prometheus,
+            file_name="docentes_metricas.txt",
+            mime="text/plain",
+            on_click="ignore",
+            key="baixar_metricas"
+        )
@@ -0,0 +1,27 @@
+import pytest
+
+from docentes.cubos import montar_cubos
+from docentes.dados import carregar_csvs, preparar_tabela
+from docentes.sintetico import gerar_tabelas
+
+
+@pytest.fixture(scope="session")
+def tabelas():
+    """
+    As tabelas dos CSVs do repositório (os 78 municípios do ES).
+    """
+    return carregar_csvs()
+
+
+@pytest.fixture(scope="session")
+def tabelas_nacionais(tabelas):
+    """
+    Os municípios do ES replicados em mais duas UFs (ver docentes.sintetico).
+    """
+    return {nome: preparar_tabela(df, nome) for nome, df in gerar_tabelas(tabelas, 3).items()}
+
+
+@pytest.fixture(scope="session")
+def cubos_nacionais(tabelas_nacionais, tmp_path_factory):
+    # Sem base colunar, os cubos são construídos a partir das tabelas
+    return montar_cubos(tabelas_nacionais, pasta_base=tmp_path_factory.mktemp("sem_base"))
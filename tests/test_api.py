@@ -0,0 +1,116 @@
+import asyncio
+import io
+import json
+
+import pyarrow as pa
+import pytest
+
+from docentes.api import Servico, criar_aplicacao
+
+
+@pytest.fixture(scope="module")
+def aplicacao():
+    return criar_aplicacao(Servico())
+
+
+def pedir(aplicacao, caminho, consulta="", **cabecalhos):
+    """
+    Faz um GET direto na aplicação ASGI e retorna o status, os cabeçalhos
+    e o corpo da resposta.
+    """
+    escopo = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": caminho,
+        "raw_path": caminho.encode(),
+        "root_path": "",
+        "query_string": consulta.encode(),
+        "headers": [(nome.replace("_", "-").lower().encode(), valor.encode()) for nome, valor in cabecalhos.items()],
+        "server": ("teste", 80),
+        "client": ("teste", 1234),
+    }
+    mensagens = []
+
+    async def receber():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def enviar(mensagem):
+        mensagens.append(mensagem)
+
+    asyncio.run(aplicacao(escopo, receber, enviar))
+    inicio = mensagens[0]
+    cabecalhos_resposta = {nome.decode(): valor.decode() for nome, valor in inicio["headers"]}
+    corpo = b"".join(mensagem.get("body", b"") for mensagem in mensagens[1:])
+    return inicio["status"], cabecalhos_resposta, corpo
+
+
+def test_versao(aplicacao):
+    status, _, corpo = pedir(aplicacao, "/api/versao")
+    assert status == 200
+    versao = json.loads(corpo)
+    assert versao["anos"] == [2024, 2023, 2022]
+    assert versao["temas"]["idade"]["valores_dimensao"] == ["Feminino", "Masculino"]
+    assert pedir(aplicacao, "/api/versao", "formato=arrow")[0] == 400
+
+
+def test_tema_json_e_arrow(aplicacao):
+    status, cabecalhos, corpo = pedir(aplicacao, "/api/etapas", "local=3200102&ano=2024")
+    assert status == 200
+    assert cabecalhos["content-type"].startswith("application/json")
+    linhas = json.loads(corpo)["linhas"]
+    assert [(linha["Código"], linha["Ano"]) for linha in linhas] == [(3200102, 2024)]
+
+    status, cabecalhos, corpo = pedir(aplicacao, "/api/etapas", "local=3200102", accept="application/vnd.apache.arrow.stream")
+    assert status == 200
+    assert cabecalhos["content-type"] == "application/vnd.apache.arrow.stream"
+    tabela = pa.ipc.open_stream(io.BytesIO(corpo)).read_all()
+    assert tabela.num_rows == 3
+    assert tabela.schema.metadata[b"tema"] == b"etapas"
+
+
+def test_subdivisoes_e_dimensao(aplicacao):
+    corpo = pedir(aplicacao, "/api/idade", "ano=2024&subdivisoes=1&dimensao=Feminino")[2]
+    linhas = json.loads(corpo)["linhas"]
+    assert len(linhas) == 78
+    assert {linha["Sexo"] for linha in linhas} == {"Feminino"}
+
+
+def test_locais(aplicacao):
+    status, _, corpo = pedir(aplicacao, "/api/locais", "uf=32")
+    assert status == 200
+    assert len(json.loads(corpo)) == 78
+    assert pedir(aplicacao, "/api/locais", "uf=99")[0] == 404
+    assert pedir(aplicacao, "/api/locais", "uf=es")[0] == 400
+
+
+@pytest.mark.parametrize("caminho, consulta, status", [
+    ("/api/xyz", "", 404),
+    ("/api/etapas", "local=abc", 400),
+    ("/api/etapas", "local=9999999", 404),
+    ("/api/etapas", "ano=1990", 404),
+    ("/api/etapas", "modo=xyz", 400),
+    ("/api/etapas", "dimensao=Feminino", 400),
+    ("/api/etapas", "formato=xml", 400),
+])
+def test_parametros_invalidos(aplicacao, caminho, consulta, status):
+    resposta_status, _, corpo = pedir(aplicacao, caminho, consulta)
+    assert resposta_status == status
+    assert "erro" in json.loads(corpo)
+
+
+def test_etag(aplicacao):
+    _, cabecalhos, _ = pedir(aplicacao, "/api/etapas", "ano=2024")
+    etag = cabecalhos["etag"]
+    assert pedir(aplicacao, "/api/etapas", "ano=2024", if_none_match=etag)[0] == 304
+    # A mesma consulta normalizada (o local padrão é a UF única) tem o mesmo ETag
+    assert pedir(aplicacao, "/api/etapas", "ano=2024&local=32&modo=absoluto", if_none_match=etag)[0] == 304
+    # Outra consulta, outro ETag
+    status, outros, _ = pedir(aplicacao, "/api/etapas", "ano=2023", if_none_match=etag)
+    assert status == 200
+    assert outros["etag"] != etag
+    assert pedir(aplicacao, "/api/etapas", "ano=2024&formato=arrow", if_none_match=etag)[0] == 200
+    # A validação vem antes da comparação do ETag
+    assert pedir(aplicacao, "/api/xyz", "ano=2024", if_none_match=etag)[0] == 404
+    assert pedir(aplicacao, "/api/etapas", "ano=1990", if_none_match=etag)[0] == 404
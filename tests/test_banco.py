@@ -0,0 +1,70 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from docentes.banco import Banco, caminho_banco, conectar, gravar_banco
+from docentes.cubos import (
+    consultar_cubo, consultar_locais, consultar_municipios, consultar_subdivisoes, consultar_tudo, percorrer_cubo
+)
+from docentes.indicadores import MODOS, visao
+from docentes.temas import TEMAS
+from docentes.territorio import CODIGO_BRASIL
+
+LOCAIS = [CODIGO_BRASIL, 12, 32, 3200102, 3205309, 1250001, 99, 9999999]
+
+
+@pytest.fixture(scope="module")
+def cubos_banco(cubos_nacionais, tmp_path_factory):
+    caminho = caminho_banco("teste", tmp_path_factory.mktemp("banco"))
+    gravar_banco(cubos_nacionais, caminho)
+    return Banco(caminho).cubos()
+
+
+def visoes(cubos_nacionais, cubos_banco):
+    for tema in TEMAS:
+        for modo in MODOS:
+            yield visao(cubos_nacionais[tema], modo), visao(cubos_banco[tema], modo)
+
+
+def test_consultas_iguais_as_da_memoria(cubos_nacionais, cubos_banco):
+    for memoria, banco in visoes(cubos_nacionais, cubos_banco):
+        for local in LOCAIS:
+            for ano in (None, 2023, 1990):
+                pd.testing.assert_frame_equal(consultar_cubo(banco, local, ano), consultar_cubo(memoria, local, ano))
+                pd.testing.assert_frame_equal(
+                    consultar_subdivisoes(banco, local, ano), consultar_subdivisoes(memoria, local, ano)
+                )
+        for ano in (None, 2024):
+            pd.testing.assert_frame_equal(consultar_tudo(banco, ano), consultar_tudo(memoria, ano))
+            locais = (3205309, CODIGO_BRASIL, 13, 3200102)
+            pd.testing.assert_frame_equal(consultar_locais(banco, locais, ano), consultar_locais(memoria, locais, ano))
+        pd.testing.assert_frame_equal(consultar_locais(banco, (), 2024), consultar_locais(memoria, (), 2024))
+
+
+def test_percorrer_em_blocos(cubos_nacionais, cubos_banco):
+    memoria, banco = cubos_nacionais["vinculo"], cubos_banco["vinculo"]
+    blocos = list(percorrer_cubo(banco, 1000))
+    assert all(len(bloco) == 1000 for bloco in blocos[:-1])
+    pd.testing.assert_frame_equal(pd.concat(blocos), pd.concat(percorrer_cubo(memoria, 1000)))
+
+
+def test_metadados_iguais(cubos_nacionais, cubos_banco):
+    for tema in TEMAS:
+        assert cubos_banco[tema].get("valores_dimensao", {}) == cubos_nacionais[tema].get("valores_dimensao", {})
+        colunas = ["Código do Município", "Ano"]
+        pd.testing.assert_frame_equal(
+            consultar_municipios(cubos_banco[tema]).sort_values(colunas, ignore_index=True),
+            consultar_municipios(cubos_nacionais[tema]).sort_values(colunas, ignore_index=True),
+            check_dtype=False,
+            check_categorical=False,
+        )
+
+
+def test_caminho_com_caracteres_reservados_da_uri(cubos_nacionais, tmp_path):
+    caminho = caminho_banco("teste", tmp_path / "a?b#c%20d")
+    gravar_banco({"etapas": cubos_nacionais["etapas"]}, caminho)
+    banco = Banco(caminho)
+    assert list(banco.metadados) == ["etapas"]
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        conectar(caminho).execute("CREATE TABLE outra (x INTEGER)")
@@ -0,0 +1,124 @@
+import threading
+import time
+
+from docentes.cache_resultados import CacheResultados, pasta_resultados
+
+
+def contador():
+    """
+    Função de cálculo que conta as próprias chamadas.
+    """
+    chamadas = []
+
+    def calcular(valor=b"x" * 1000):
+        chamadas.append(valor)
+        return valor
+
+    return calcular, chamadas
+
+
+def test_resultado_calculado_uma_vez():
+    cache = CacheResultados("teste")
+    calcular, chamadas = contador()
+    assert cache.obter("a", calcular) == cache.obter("a", calcular)
+    assert len(chamadas) == 1
+    assert (cache.acertos, cache.faltas) == (1, 1)
+
+
+def test_validade_expira_o_resultado():
+    cache = CacheResultados("teste", validade=0.05)
+    calcular, chamadas = contador()
+    cache.obter("a", calcular)
+    cache.obter("a", calcular)
+    assert len(chamadas) == 1
+    time.sleep(0.1)
+    cache.obter("a", calcular)
+    assert len(chamadas) == 2
+
+
+def test_limite_de_bytes_remove_o_mais_antigo_sem_uso():
+    cache = CacheResultados("teste", limite_bytes=2500)
+    calcular, chamadas = contador()
+    cache.obter("a", calcular)
+    cache.obter("b", calcular)
+    # "a" passa a ser o mais recente; "b" sai quando "c" estoura o limite
+    cache.obter("a", calcular)
+    cache.obter("c", calcular)
+    assert len(cache) == 2
+    assert cache.bytes == 2000
+    cache.obter("a", calcular)
+    assert len(chamadas) == 3
+    cache.obter("b", calcular)
+    assert len(chamadas) == 4
+
+
+def test_resultado_maior_que_o_limite_fica_sozinho():
+    cache = CacheResultados("teste", limite_bytes=500)
+    calcular, chamadas = contador()
+    cache.obter("a", calcular)
+    cache.obter("a", calcular)
+    assert len(cache) == 1
+    assert len(chamadas) == 1
+
+
+def test_limite_de_entradas():
+    cache = CacheResultados("teste", capacidade=2)
+    calcular, _ = contador()
+    for chave in "abc":
+        cache.obter(chave, calcular)
+    assert len(cache) == 2
+
+
+def test_um_so_calculo_com_varias_threads():
+    cache = CacheResultados("teste")
+    chamadas = []
+    largada = threading.Barrier(8)
+    resultados = []
+
+    def calcular():
+        chamadas.append(1)
+        time.sleep(0.1)
+        return object()
+
+    def consultar():
+        largada.wait()
+        resultados.append(cache.obter("a", calcular))
+
+    threads = [threading.Thread(target=consultar) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(chamadas) == 1
+    assert len({id(resultado) for resultado in resultados}) == 1
+    assert (cache.acertos, cache.faltas) == (7, 1)
+
+
+def test_erro_no_calculo_libera_quem_espera():
+    cache = CacheResultados("teste")
+    calcular, chamadas = contador()
+
+    def falhar():
+        raise RuntimeError("falhou")
+
+    try:
+        cache.obter("a", falhar)
+    except RuntimeError:
+        pass
+    assert cache.obter("a", calcular) == b"x" * 1000
+    assert len(chamadas) == 1
+
+
+def test_copia_em_disco_compartilhada(tmp_path):
+    calcular, chamadas = contador()
+    CacheResultados("teste", pasta=tmp_path).obter(("a", 1), calcular)
+    outro_processo = CacheResultados("teste", pasta=tmp_path)
+    assert outro_processo.obter(("a", 1), calcular) == b"x" * 1000
+    assert len(chamadas) == 1
+
+
+def test_pasta_resultados_mantem_a_versao_anterior(tmp_path):
+    assert pasta_resultados("v1", None) is None
+    for versao in ["v1", "v2", "v3"]:
+        pasta_resultados(versao, tmp_path)
+    assert sorted(pasta.name for pasta in tmp_path.iterdir()) == ["v2", "v3"]
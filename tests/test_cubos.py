@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from docentes.cubos import consultar_cubo, consultar_subdivisoes, indexar_cubo, trechos
+from docentes.territorio import CODIGO_BRASIL
+
+UFS = [12, 13, 32]
+
+
+def test_trechos():
+    inicios, fins = trechos(np.array([0, 0, 12, 12, 12, 32, 1250001]))
+    assert inicios.tolist() == [0, 2, 5, 6]
+    assert fins.tolist() == [2, 5, 6, 7]
+    # A primeira linha sempre abre um trecho, mesmo com a chave 0 (o Brasil)
+    assert [lista.tolist() for lista in trechos(np.array([0]))] == [[0], [1]]
+
+
+def test_indexar_cubo_pequeno():
+    tabela = pd.DataFrame({
+        "Código": [0, 0, 0, 32, 32, 3200102],
+        "Ano": [2023, 2024, 2024, 2023, 2024, 2024],
+        "Sexo": ["F", "F", "M", "M", "F", "F"],
+    })
+    cubo = indexar_cubo(tabela, "Sexo")
+    assert cubo["posicoes"] == {
+        0: (0, 3), 32: (3, 5), 3200102: (5, 6),
+        (0, 2023): (0, 1), (0, 2024): (1, 3), (32, 2023): (3, 4), (32, 2024): (4, 5), (3200102, 2024): (5, 6),
+    }
+    assert cubo["valores_dimensao"] == {0: ["F", "M"], 32: ["M", "F"], 3200102: ["F"]}
+
+
+def test_trechos_de_cada_local(cubos_nacionais):
+    cubo = cubos_nacionais["etapas"]
+    codigos = cubo["codigos"]
+    anos = cubo["tabela"]["Ano"].to_numpy()
+    locais = [chave for chave in cubo["posicoes"] if not isinstance(chave, tuple)]
+    assert locais == np.unique(codigos).tolist()
+    # Os trechos dos locais cobrem a tabela inteira, sem buracos nem sobreposições
+    limites = [cubo["posicoes"][local] for local in locais]
+    assert limites[0][0] == 0 and limites[-1][1] == len(codigos)
+    assert all(fim == proximo for (_, fim), (proximo, _) in zip(limites, limites[1:]))
+    for chave, (inicio, fim) in cubo["posicoes"].items():
+        local, ano = chave if isinstance(chave, tuple) else (chave, None)
+        assert (codigos[inicio:fim] == local).all()
+        if ano is not None:
+            assert (anos[inicio:fim] == ano).all()
+            # Linhas vizinhas são de outro local ou de outro ano
+            assert inicio == 0 or (codigos[inicio - 1], anos[inicio - 1]) != (local, ano)
+            assert fim == len(codigos) or (codigos[fim], anos[fim]) != (local, ano)
+
+
+@pytest.mark.parametrize("ano", [None, 2023])
+def test_subdivisoes_do_brasil_sao_as_ufs(cubos_nacionais, ano):
+    trecho = consultar_subdivisoes(cubos_nacionais["etapas"], CODIGO_BRASIL, ano)
+    assert sorted(set(trecho["Código"])) == UFS
+    assert len(trecho) == len(UFS) * (3 if ano is None else 1)
+
+
+@pytest.mark.parametrize("uf", UFS)
+def test_subdivisoes_da_uf_sao_os_seus_municipios(cubos_nacionais, uf):
+    cubo = cubos_nacionais["etapas"]
+    codigos = cubo["codigos"]
+    municipios = sorted(set(codigos[(codigos >= uf * 100000) & (codigos < (uf + 1) * 100000)].tolist()))
+    assert len(municipios) == 78
+    trecho = consultar_subdivisoes(cubo, uf, 2024)
+    assert trecho["Código"].tolist() == municipios
+    assert (trecho["Ano"] == 2024).all()
+    # Sem ano, todos os anos dos mesmos municípios
+    assert sorted(set(consultar_subdivisoes(cubo, uf)["Código"])) == municipios
+
+
+def test_subdivisoes_de_um_municipio_e_de_um_local_ausente(cubos_nacionais):
+    cubo = cubos_nacionais["etapas"]
+    pd.testing.assert_frame_equal(consultar_subdivisoes(cubo, 3205309, 2024), consultar_cubo(cubo, 3205309, 2024))
+    assert consultar_subdivisoes(cubo, 99).empty
+    assert consultar_cubo(cubo, 9999999).empty
+    assert consultar_cubo(cubo, 32, 1990).empty
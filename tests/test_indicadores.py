@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from docentes.indicadores import acrescentar_modos, percentuais, variacoes, visao
+from docentes.temas import TEMAS
+
+COLUNAS_ETAPAS = TEMAS["etapas"]["colunas"]
+COLUNAS_VINCULO = TEMAS["vinculo"]["colunas"]
+
+
+def tabela_etapas(linhas):
+    """
+    Tabela agregada do tema etapas a partir de (código, ano, valores).
+    """
+    return pd.DataFrame(
+        [[codigo, ano, *valores] for codigo, ano, valores in linhas],
+        columns=["Código", "Ano"] + COLUNAS_ETAPAS,
+    )
+
+
+def tabela_vinculo(linhas):
+    """
+    Tabela agregada do tema vinculo a partir de (código, ano, vínculo, valores).
+    """
+    return pd.DataFrame(
+        [[codigo, ano, vinculo, *valores] for codigo, ano, vinculo, valores in linhas],
+        columns=["Código", "Ano", "Vínculo Funcional"] + COLUNAS_VINCULO,
+    )
+
+
+def test_percentuais_das_colunas():
+    tabela = tabela_etapas([
+        (32, 2023, [1, 1, 2, 0, 0, 0]),
+        (32, 2024, [0, 0, 0, 0, 0, 0]),
+    ])
+    resultado = percentuais(tabela, "etapas")
+    np.testing.assert_allclose(resultado[0], [25, 25, 50, 0, 0, 0])
+    # Total zerado: valores vazios, e não divisão por zero
+    assert np.isnan(resultado[1]).all()
+
+
+def test_percentuais_da_dimensao():
+    tabela = tabela_vinculo([
+        (32, 2024, "Concursado", [1, 3, 0]),
+        (32, 2024, "Temporário", [3, 1, 0]),
+        (3200102, 2024, "Concursado", [2, 0, 0]),
+    ])
+    resultado = percentuais(tabela, "vinculo")
+    # O total é a soma das linhas da dimensão no mesmo local e ano, coluna a coluna
+    np.testing.assert_allclose(resultado[:2, :2], [[25, 75], [75, 25]])
+    np.testing.assert_allclose(resultado[2, 0], 100)
+    assert np.isnan(resultado[:, 2]).all()
+    assert np.isnan(resultado[2, 1])
+
+
+def test_variacoes():
+    tabela = tabela_etapas([
+        (32, 2022, [10, 0, 5, 0, 0, 0]),
+        (32, 2023, [15, 4, 5, 0, 0, 0]),
+        (32, 2024, [12, 4, 0, 0, 0, 0]),
+        (3200102, 2024, [1, 1, 1, 1, 1, 1]),
+    ])
+    resultado = variacoes(tabela, "etapas")
+    # Primeiro ano do local: sem ano anterior
+    assert np.isnan(resultado[0]).all()
+    np.testing.assert_allclose(resultado[1, [0, 2]], [50, 0])
+    # Valor anterior zero: vazio, e não infinito
+    assert np.isnan(resultado[1, [1, 3, 4, 5]]).all()
+    np.testing.assert_allclose(resultado[2, :3], [-20, 0, -100])
+    # A linha anterior na tabela é de outro local
+    assert np.isnan(resultado[3]).all()
+
+
+def test_variacoes_sem_o_ano_anterior():
+    tabela = tabela_etapas([
+        (32, 2022, [10, 10, 10, 10, 10, 10]),
+        (32, 2024, [20, 20, 20, 20, 20, 20]),
+    ])
+    # 2023 falta: 2024 não é comparado com 2022
+    assert np.isnan(variacoes(tabela, "etapas")).all()
+
+
+def test_variacoes_por_valor_da_dimensao():
+    tabela = tabela_vinculo([
+        (32, 2023, "Concursado", [10, 10, 10]),
+        (32, 2023, "Temporário", [5, 5, 5]),
+        (32, 2024, "Concursado", [20, 20, 20]),
+        (32, 2024, "Efetivo", [1, 1, 1]),
+    ])
+    resultado = variacoes(tabela, "vinculo")
+    np.testing.assert_allclose(resultado[2], [100, 100, 100])
+    # Valor da dimensão que não existia no ano anterior
+    assert np.isnan(resultado[3]).all()
+
+
+def test_modos_mantem_o_indice():
+    tabela = tabela_etapas([(32, 2023, [1, 2, 0, 0, 0, 0]), (32, 2024, [3, 2, 0, 0, 0, 0])])
+    cubo = acrescentar_modos({"tabela": tabela, "posicoes": {32: (0, 2)}}, "etapas")
+    assert visao(cubo, "absoluto") is cubo
+    for modo in ("percentual", "variacao"):
+        derivado = visao(cubo, modo)
+        assert derivado["posicoes"] is cubo["posicoes"]
+        assert derivado["tabela"].columns.tolist() == tabela.columns.tolist()
+    assert visao(cubo, "percentual")["tabela"]["Creche"].tolist() == [33.3, 60.0]
+    assert visao(cubo, "variacao")["tabela"]["Creche"].iloc[1] == 200.0
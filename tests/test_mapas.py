@@ -0,0 +1,72 @@
+import numpy as np
+
+from docentes.mapas import contar_pontos, douglas_peucker, simplificar_malha
+
+# Limite comum, em zigue-zague, de x = 1 entre y = 0 e y = 1
+LIMITE = [(1 + (0.01 if passo % 2 else -0.01), passo / 20) for passo in range(1, 20)]
+
+
+def feicao(codigo, anel):
+    return {
+        "type": "Feature",
+        "properties": {"codarea": codigo, "nome": "ignorado"},
+        "geometry": {"type": "Polygon", "coordinates": [anel + anel[:1]]},
+    }
+
+
+def malha_de_vizinhos():
+    """
+    Dois quadrados lado a lado com o limite comum em zigue-zague. O anel da
+    direita percorre o limite no sentido oposto e começa no meio dele.
+    """
+    esquerda = [(0, 0), (1, 0)] + LIMITE + [(1, 1), (0, 1)]
+    direita = LIMITE[::-1][10:] + [(1, 0), (2, 0), (2, 1), (1, 1)] + LIMITE[::-1][:10]
+    return {"type": "FeatureCollection", "features": [feicao("1", esquerda), feicao(2, direita)]}
+
+
+def arestas(feicao):
+    """
+    Arestas (sem sentido) dos anéis de uma feição MultiPolygon.
+    """
+    return {
+        frozenset(par)
+        for poligono in feicao["geometry"]["coordinates"]
+        for anel in poligono
+        for par in zip(anel, anel[1:])
+    }
+
+
+def test_douglas_peucker():
+    pontos = np.array([(0, 0), (1, 0.01), (2, 0), (3, 1), (4, 0)])
+    assert douglas_peucker(pontos, 0.1).tolist() == [0, 2, 3, 4]
+    assert douglas_peucker(pontos, 0.001).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_limite_comum_continua_comum():
+    malha = simplificar_malha(malha_de_vizinhos(), 0.05)
+    esquerda, direita = malha["features"]
+    assert [feicao["properties"] for feicao in malha["features"]] == [{"codarea": "1"}, {"codarea": "2"}]
+    # O zigue-zague some, mas os dois lados ficam com as mesmas arestas
+    comuns = arestas(esquerda) & arestas(direita)
+    assert comuns == {frozenset([(1, 0), (1, 1)])}
+    assert contar_pontos(malha) == 10
+    for simplificada in malha["features"]:
+        anel = simplificada["geometry"]["coordinates"][0][0]
+        assert anel[0] == anel[-1]
+
+
+def test_limite_comum_com_tolerancia_pequena():
+    malha = simplificar_malha(malha_de_vizinhos(), 0.001)
+    esquerda, direita = malha["features"]
+    # Nada é removido, e o limite inteiro continua compartilhado
+    comuns = arestas(esquerda) & arestas(direita)
+    assert len(comuns) == len(LIMITE) + 1
+    assert contar_pontos(malha) == contar_pontos(malha_de_vizinhos())
+
+
+def test_ilha_sem_pontos_fixos():
+    circulo = [(round(np.cos(angulo), 5), round(np.sin(angulo), 5)) for angulo in np.linspace(0, 2 * np.pi, 60, endpoint=False)]
+    malha = simplificar_malha({"type": "FeatureCollection", "features": [feicao("3", circulo)]}, 0.05)
+    anel = malha["features"][0]["geometry"]["coordinates"][0][0]
+    assert 4 <= len(anel) < 60
+    assert anel[0] == anel[-1]
@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+from docentes.sintetico import CODIGOS_UF, gerar_tabelas
+from docentes.temas import TEMAS
+
+
+def tabela_etapas(municipios):
+    """
+    Tabela do tema etapas com `municipios` municípios fictícios do ES.
+    """
+    df = pd.DataFrame({
+        "Ano": 2024,
+        "Código do Município": range(3200001, 3200001 + municipios),
+        "Município": [f"Município {posicao}" for posicao in range(municipios)],
+    })
+    return df.assign(**dict.fromkeys(TEMAS["etapas"]["colunas"], 10))
+
+
+def test_replicas_com_os_codigos_das_ufs(tabelas):
+    sinteticas = gerar_tabelas(tabelas, 30)
+    for nome, df in sinteticas.items():
+        assert len(df) == 30 * len(tabelas[nome])
+    codigos = sinteticas["etapas"]["Código do Município"]
+    assert codigos.nunique() == 30 * 78
+    assert set(codigos // 100000) <= set(CODIGOS_UF)
+    # A réplica 0 mantém os dados originais
+    pd.testing.assert_frame_equal(
+        sinteticas["idade"].head(len(tabelas["idade"])), tabelas["idade"].astype({"Município": str}), check_dtype=False
+    )
+
+
+def test_codigos_nao_invadem_a_uf_seguinte():
+    # Com mais de 100 municípios, os blocos de réplicas vão em passos de 1000
+    tabelas = {"etapas": tabela_etapas(150)}
+    limite = 50 * len(CODIGOS_UF)
+    df = gerar_tabelas(tabelas, limite)["etapas"].iloc[150:]
+    codigos = df["Código do Município"]
+    assert codigos.nunique() == len(codigos)
+    # Cada réplica fica na faixa de códigos da sua UF
+    replicas = df["Município"].str.extract(r"\((\d+)\)$")[0].astype("int64")
+    assert (codigos // 100000 == replicas.map(lambda k: CODIGOS_UF[k % len(CODIGOS_UF)])).all()
+    with pytest.raises(ValueError, match=f"no máximo {limite}"):
+        gerar_tabelas(tabelas, limite + 1)
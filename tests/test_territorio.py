@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+from docentes.territorio import CODIGO_BRASIL, buscar_municipios, filtrar_municipios, montar_hierarquia
+
+MUNICIPIOS = [
+    (3200102, "Afonso Cláudio"),
+    (3200169, "Águia Branca"),
+    (3200508, "Alfredo Chaves"),
+    (3204906, "São Mateus"),
+    (3205309, "Vitória"),
+    (3101102, "Águas Vermelhas"),
+    (3170206, "Uberlândia"),
+    (5213806, "Morrinhos"),
+    (3143302, "Morrinhos"),
+]
+
+
+@pytest.fixture(scope="module")
+def hierarquia():
+    df = pd.DataFrame(
+        [(codigo, nome, ano) for codigo, nome in MUNICIPIOS for ano in (2023, 2024)],
+        columns=["Código do Município", "Município", "Ano"],
+    )
+    return montar_hierarquia(df)
+
+
+def test_hierarquia(hierarquia):
+    # Ordem alfabética sem acentos: Espírito Santo, Goiás, Minas Gerais
+    assert hierarquia["ufs"] == [32, 52, 31]
+    assert hierarquia["municipios"][32] == [3200102, 3200169, 3200508, 3204906, 3205309]
+    assert hierarquia["todos"][:3] == [3200102, 3101102, 3200169]
+    assert hierarquia["anos"] == [2024, 2023]
+    assert hierarquia["raiz"] == CODIGO_BRASIL
+    assert hierarquia["nomes"][31] == "Minas Gerais"
+
+
+@pytest.mark.parametrize("trecho, uf, codigos", [
+    # Sem acentos nem maiúsculas; quem começa pelo trecho vem primeiro
+    ("agu", None, [3101102, 3200169]),
+    ("ÁGU", None, [3101102, 3200169]),
+    ("  vitoria ", None, [3205309]),
+    ("a", 32, [3200102, 3200169, 3200508, 3204906, 3205309]),
+    ("ch", 32, [3200508]),
+    ("os", None, [3143302, 5213806]),
+    # Só os municípios da UF
+    ("agua", 31, [3101102]),
+    ("morrinhos", 52, [5213806]),
+    ("vitoria", 31, []),
+    ("xyz", None, []),
+    # UF sem municípios nos dados
+    ("a", 12, []),
+])
+def test_filtrar_municipios(hierarquia, trecho, uf, codigos):
+    assert filtrar_municipios(hierarquia, trecho, uf) == codigos
+
+
+def test_filtrar_sem_trecho_retorna_todos(hierarquia):
+    assert filtrar_municipios(hierarquia, "") == hierarquia["todos"]
+    assert filtrar_municipios(hierarquia, "", 32) == hierarquia["municipios"][32]
+
+
+def test_buscar_municipios(hierarquia):
+    # O mesmo nome em duas UFs, na ordem dos códigos
+    assert buscar_municipios(hierarquia, "morrinhos") == [3143302, 5213806]
+    assert buscar_municipios(hierarquia, " Morrinhos ", 52) == [5213806]
+    assert buscar_municipios(hierarquia, "Sao Mateus") == [3204906]
+    assert buscar_municipios(hierarquia, "Mateus") == []
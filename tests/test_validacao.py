@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from docentes.dados import PASTA_DADOS
+from docentes.validacao import ARQUIVO_EXCECOES, COLUNAS_EXCECOES, ler_excecoes, tem_erros, validar
+
+
+@pytest.fixture(scope="module")
+def excecoes_do_repositorio():
+    return pd.read_csv(PASTA_DADOS / ARQUIVO_EXCECOES, sep=";", dtype=str)
+
+
+def gravar_excecoes(pasta, excecoes):
+    excecoes.to_csv(pasta / ARQUIVO_EXCECOES, sep=";", index=False)
+    return ler_excecoes(pasta)
+
+
+def test_dados_do_repositorio_passam_com_as_excecoes(tabelas):
+    assert tem_erros(validar(tabelas))
+    relatorio = validar(tabelas, ler_excecoes())
+    assert not tem_erros(relatorio)
+    registrados = relatorio[relatorio["Detalhe"].str.contains("exceção registrada", regex=False)]
+    assert set(registrados["Verificação"]) == {"totais_entre_temas", "total_anual"}
+    assert set(registrados["Ano"]) == {2024}
+
+
+def test_excecoes_com_as_colunas_em_outra_ordem(tabelas, excecoes_do_repositorio, tmp_path):
+    excecoes = gravar_excecoes(tmp_path, excecoes_do_repositorio[COLUNAS_EXCECOES[::-1]])
+    assert excecoes.columns.tolist() == COLUNAS_EXCECOES
+    assert not tem_erros(validar(tabelas, excecoes))
+
+
+def test_excecao_de_um_municipio(tabelas, excecoes_do_repositorio, tmp_path):
+    excecoes = excecoes_do_repositorio.copy()
+    excecoes.loc[excecoes["Verificação"] == "totais_entre_temas", "Código"] = "3205309"
+    relatorio = validar(tabelas, gravar_excecoes(tmp_path, excecoes))
+    erros = relatorio[relatorio["Severidade"] == "erro"]
+    # Só o município da exceção deixa de ser erro
+    assert set(erros["Verificação"]) == {"totais_entre_temas"}
+    assert 3205309 not in set(erros["Código"])
+    assert len(erros) == 77
+
+
+def test_arquivo_de_excecoes_ausente_ou_incompleto(excecoes_do_repositorio, tmp_path):
+    assert ler_excecoes(tmp_path) is None
+    with pytest.raises(ValueError, match="Motivo"):
+        gravar_excecoes(tmp_path, excecoes_do_repositorio.drop(columns="Motivo"))